@@ -1,93 +1,128 @@
 import tkinter as tk
-from tkinter import messagebox, filedialog
+from tkinter import messagebox, filedialog, ttk
+import queue
 import sys
-import pandas as pd
+import threading
+import time
 import os
-from model import solve_senka
+from instrument import collect, format_timings
+from params import MIP_GAP, MIP_TIME_LIMIT, PARAM_DEFAULTS, parse_params
 
+# Only tkinter and the light modules are imported before the window exists.
+# numpy, scipy, pandas and the solver (the bulk of the start-up time, much
+# more so in the PyInstaller onefile build) are imported where they are
+# used, and preload() imports them in the background once the window is up.
 
-class TextRedirector:
-    def __init__(self, widget):
-        self.widget = widget
 
-    def write(self, text):
-        self.widget.config(state="normal")
-        self.widget.insert(tk.END, text)
-        self.widget.see(tk.END)
-        self.widget.config(state="disabled")
-        self.widget.update_idletasks()
+# the background preload starts this long after the window is created (ms)
+PRELOAD_DELAY_MS = 100
 
-    def flush(self):
-        pass
+# console refresh interval while a solve is running (ms)
+CONSOLE_POLL_MS = 50
 
+# watch mode: how often the loaded file is checked (ms) and how long it must
+# stay unchanged before it is reloaded (s), so a burst of saves solves once
+WATCH_POLL_MS = 500
+WATCH_DEBOUNCE = 0.8
 
-def load_sorties_from_excel(path):
-    df = pd.read_excel(path, header=None)
+# scenario status refresh interval while scenarios are solving (ms)
+SCENARIO_POLL_MS = 100
 
-    if df.shape[0] < 9 or df.shape[1] < 2:
-        raise ValueError("データの形式が正しくありません．少なくとも9行2列以上のデータが必要です．")
+# (label, parameter, unit) choices of the senka frontier chart
+FRONTIER_CHOICES = (
+    ("最大課金額", "max_money", "円"),
+    ("稼働時間", "activetime", "時間"),
+    ("遠征時間", "inactivetime", "時間"),
+)
 
-    sortie_names = []
-    sortie_weights = []
-    senka = []
-    maxproportion = []
 
-    for col in range(1, df.shape[1]):  # start from column B
-        column = df.iloc[:, col]
+def preload():
+    """
+    Import the solver side, load the catalog and solve one tiny LP so the
+    solver library is loaded too. Runs off the Tk thread; the methods that
+    need these modules import them themselves, so this only moves the wait.
+    """
+    import pandas    # loader, frontier and scenario tables
+    import cache, frontier, loader, scenarios
+    from catalog import load_catalog
+    from model import SenkaModel
 
-        if column.iloc[0:9].isnull().any():
-            raise ValueError(f"列 {col + 1} が完成されていません．最初の9行にすべて値が入っている必要があります．")
+    SenkaModel([[0, 0, 0, 0, 0, 60]], [1.0], [1.0], catalog=load_catalog(), **PARAM_DEFAULTS).solve_lp()
 
-        name = column.iloc[0]
-        if not isinstance(name, str):
-            raise ValueError(f"列 {col + 1} の出撃の名前が文字列ではありません．")
 
-        try:
-            weights = [float(x) for x in column.iloc[1:7]]  # rows 2–7
-            s = float(column.iloc[7])                      # row 8
-            m = float(column.iloc[8])                    # row 9 (max proportion)
-        except Exception:
-            raise ValueError(
-                f"列 {col + 1} に数値以外の値が入っています (行2～8)."
-            )
+class TextRedirector:
+    """
+    File-like stdout/stderr replacement that only queues text. The GUI
+    drains the queue on a timer and inserts each batch in one widget update,
+    so printing is safe from worker threads and cheap for long solver logs.
+    """
+    def __init__(self, output_queue):
+        self.queue = output_queue
 
-        if m < 0 or m > 1:
-            raise ValueError(
-                f"列 {col + 1} の最大割合は0～1の間でなければなりません．"
-            )
+    def write(self, text):
+        self.queue.put(text)
+
+    def flush(self):
+        pass
 
-        sortie_names.append(name)
-        sortie_weights.append(weights)
-        senka.append(s)
-        maxproportion.append(m)
 
-    return sortie_names, sortie_weights, senka, maxproportion
+def file_signature(path):
+    """
+    (mtime, size) of path, or None while it cannot be read (e.g. mid-save)
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
 
 class App(tk.Tk):
     def __init__(self):
         super().__init__()
         self.title("月間戦果最適化計算機 v0.32")
-        self.geometry("700x800")
+        self.geometry("700x950")
 
         self.sortie_names = None
         self.sortie_weights = None
         self.senka = None
         self.maxproportion = None
+        self.sortie_path = None
+        # compiled model for the loaded data; parameter edits only patch it
+        self.model = None
+        self.console_queue = queue.Queue()
+        self.solve_queue = queue.Queue()
+        self.solve_thread = None
+        self.cancel_event = None
         self.enable_short_bucket = tk.BooleanVar(value=True)
+        self.integer = tk.BooleanVar(value=False)
+        self.time_limit = tk.StringVar(value=str(MIP_TIME_LIMIT))
+        self.mip_gap = tk.StringVar(value=str(MIP_GAP))
+        self.watch = tk.BooleanVar(value=False)
+        self._watch_signature = None
+        self._watch_pending = None
+        self.results_window = None
+        # scenario panel: one entry per queued parameter set
+        self.scenarios = []
+        self.scenario_pool = None
+        self.scenario_sortie_names = None
+        self.baseline = None
+        self.comparison_window = None
+        self._scenario_polling = False
         self.params = {}
 
         param_defs = [
-            ("稼働時間", "activetime", 12, "一日あたりのプレイ時間"),
-            ("遠征時間", "inactivetime", 6, "周回はしないが，遠征は継続的に稼働できる時間"),
-            ("休息時間", "sleeptime", 6, "睡眠時間を想定，この時間設定以下の遠征が3艦隊送られる"),
-            ("日数", "days", 31, "計算日数"),
-            ("最大課金額", "max_money", 0, "課金額の上限，0にすると無課金扱いになる"),
-            ("特別戦果", "special", 3000, "引継ぎ戦果と特別戦果の合計"),
-            ("燃料オフセット", "initialfuel", 200000, "遠征と課金からの獲得資源以外の燃料予算（初期備蓄・任務・自然回復・プレ箱等）"),
-            ("弾薬オフセット", "initialammo", 200000, "上記同様"),
-            ("鋼材オフセット", "initialsteel", 150000, "上記同様"),
-            ("バケツオフセット", "initialbucket", 1900, "上記同様"),
-            ("遠征用cond値", "initialcond", 0, "遠征に使用できるcondの初期値"),
+            ("稼働時間", "activetime", PARAM_DEFAULTS["activetime"], "一日あたりのプレイ時間"),
+            ("遠征時間", "inactivetime", PARAM_DEFAULTS["inactivetime"], "周回はしないが，遠征は継続的に稼働できる時間"),
+            ("休息時間", "sleeptime", PARAM_DEFAULTS["sleeptime"], "睡眠時間を想定，この時間設定以下の遠征が3艦隊送られる"),
+            ("日数", "days", PARAM_DEFAULTS["days"], "計算日数"),
+            ("最大課金額", "max_money", PARAM_DEFAULTS["max_money"], "課金額の上限，0にすると無課金扱いになる"),
+            ("特別戦果", "special", PARAM_DEFAULTS["special"], "引継ぎ戦果と特別戦果の合計"),
+            ("燃料オフセット", "initialfuel", PARAM_DEFAULTS["initialfuel"], "遠征と課金からの獲得資源以外の燃料予算（初期備蓄・任務・自然回復・プレ箱等）"),
+            ("弾薬オフセット", "initialammo", PARAM_DEFAULTS["initialammo"], "上記同様"),
+            ("鋼材オフセット", "initialsteel", PARAM_DEFAULTS["initialsteel"], "上記同様"),
+            ("バケツオフセット", "initialbucket", PARAM_DEFAULTS["initialbucket"], "上記同様"),
+            ("遠征用cond値", "initialcond", PARAM_DEFAULTS["initialcond"], "遠征に使用できるcondの初期値"),
         ]
 
         param_frame = tk.LabelFrame(self, text="パラメータ設定")
@@ -118,14 +153,27 @@ class App(tk.Tk):
             variable=self.enable_short_bucket
         ).pack(pady=5)
 
+        mip_frame = tk.Frame(self)
+        mip_frame.pack(pady=(0, 5))
+        tk.Checkbutton(
+            mip_frame,
+            text="整数解（出撃数・購入数を整数にする）",
+            variable=self.integer
+        ).pack(side="left")
+        tk.Label(mip_frame, text="制限時間(秒)").pack(side="left", padx=(10, 2))
+        tk.Entry(mip_frame, textvariable=self.time_limit, width=6).pack(side="left")
+        tk.Label(mip_frame, text="MIPギャップ").pack(side="left", padx=(10, 2))
+        tk.Entry(mip_frame, textvariable=self.mip_gap, width=8).pack(side="left")
+
         btn_frame = tk.Frame(self)
         btn_frame.pack(pady=5)
 
-        tk.Button(
+        self.load_button = tk.Button(
             btn_frame,
             text="エクセルを読み込む",
             command=self.load_excel
-        ).pack(side="left")
+        )
+        self.load_button.pack(side="left")
 
         self.excel_label = tk.StringVar(value="No file loaded")
         tk.Label(
@@ -135,11 +183,70 @@ class App(tk.Tk):
             fg="gray"
         ).pack(side="left", padx=10)
 
-        tk.Button(
+        tk.Checkbutton(
             self,
+            text="読み込んだファイルの変更を監視して自動で再計算",
+            variable=self.watch
+        ).pack()
+
+        run_frame = tk.Frame(self)
+        run_frame.pack(pady=5)
+        self.run_button = tk.Button(
+            run_frame,
             text="最適化を実行",
             command=self.run
-        ).pack(pady=5)
+        )
+        self.run_button.pack(side="left")
+        self.cancel_button = tk.Button(
+            run_frame,
+            text="計算を中止",
+            command=self.cancel_solve,
+            state="disabled"
+        )
+        self.cancel_button.pack(side="left", padx=5)
+
+        frontier_frame = tk.Frame(self)
+        frontier_frame.pack(pady=(0, 5))
+        tk.Label(frontier_frame, text="戦果曲線:").pack(side="left")
+        self.frontier_label = tk.StringVar(value=FRONTIER_CHOICES[0][0])
+        tk.OptionMenu(
+            frontier_frame,
+            self.frontier_label,
+            *(label for label, _, _ in FRONTIER_CHOICES)
+        ).pack(side="left", padx=5)
+        self.frontier_button = tk.Button(
+            frontier_frame,
+            text="曲線を計算",
+            command=self.run_frontier
+        )
+        self.frontier_button.pack(side="left")
+
+        scenario_frame = tk.LabelFrame(self, text="シナリオ比較")
+        scenario_frame.pack(padx=10, pady=5, fill="x")
+
+        row = tk.Frame(scenario_frame)
+        row.pack(fill="x", padx=5)
+        tk.Label(row, text="名前").pack(side="left")
+        self.scenario_name = tk.StringVar(value="シナリオ1")
+        tk.Entry(row, textvariable=self.scenario_name, width=14).pack(side="left", padx=(2, 5))
+        tk.Button(row, text="現在の設定を追加", command=self.add_scenario).pack(side="left")
+        tk.Button(row, text="削除", command=self.remove_scenario).pack(side="left", padx=2)
+        tk.Button(row, text="基準にする", command=self.set_baseline).pack(side="left")
+
+        self.scenario_list = tk.Listbox(scenario_frame, height=5, font=("Consolas", 9))
+        self.scenario_list.pack(fill="x", padx=5, pady=2)
+
+        row = tk.Frame(scenario_frame)
+        row.pack(pady=(0, 5))
+        tk.Button(row, text="すべて計算", command=self.run_scenarios).pack(side="left")
+        tk.Button(row, text="選択をキャンセル", command=self.cancel_scenario).pack(side="left", padx=5)
+        tk.Button(row, text="比較表を表示", command=self.show_comparison_window).pack(side="left")
+
+        tk.Button(
+            self,
+            text="計算結果のキャッシュを削除",
+            command=self.clear_cache
+        ).pack()
 
         self.result = tk.StringVar(value="Result: —")
         tk.Label(
@@ -169,280 +276,831 @@ class App(tk.Tk):
         )
         dev_label.pack(padx=5, pady=5, fill="x")
 
-    def show_results_window(
-        self,
-        sortie_names,
-        sortie_vals,
-        run_vals,
-        off_vals,
-        sleep_vals,
-        shop_vals,
-        spent_from_sorties,
-        earned_from_expeds,
-        bought_from_shop,
-        remaining
-    ):
-        win = tk.Toplevel(self)
-        win.title("最適化結果")
-        win.geometry("1300x800")
-
-        expedition_names = [
-            "長距離", "長距離キラ", "海峡警備キラ", "ブルネイ哨戒キラ",
-            "海上護衛", "海上護衛キラ", "タンカー護衛", "タンカー護衛キラ",
-            "鼠輸送", "鼠輸送キラ", "北方鼠", "北方鼠キラ",
-            "東京急行", "東京急行キラ", "東京急行(弐)", "東京急行(弐)キラ"
-        ]
-
-        shop_names = [
-            "タンカー徴用", "弾薬", "高速修復材",
-            "出撃セット", "間宮", "工廠セット"
-        ]
-
-        # -----------------------------
-        # Main numeric sections
-        # -----------------------------
-        sections = [
-            ("出撃数", sortie_names,
-            [sortie_vals[i] for i in range(len(sortie_names))]),
-
-            ("稼働する遠征の時間数", expedition_names,
-            [run_vals[i] + off_vals[i] for i in range(16)]),
-
-            ("休息時間の遠征選択", expedition_names,
-            [sleep_vals[i] for i in range(16)]),
-
-            ("アイテム屋からの購入数", shop_names,
-            [shop_vals[i] for i in range(6)])
-        ]
-
-        col = 0
-        for title, names, values in sections:
-
-            tk.Label(
-                win,
-                text=title,
-                font=("Consolas", 12, "bold")
-            ).grid(row=0, column=col, columnspan=2, pady=(10, 0))
-
-            tk.Label(win, text="Name").grid(row=1, column=col, sticky="w", padx=5)
-            tk.Label(win, text="Value").grid(row=1, column=col+1, sticky="w", padx=5)
-
-            for i, name in enumerate(names):
-                tk.Label(
-                    win,
-                    text=name,
-                    width=20,
-                    anchor="w"
-                ).grid(row=i+2, column=col, padx=5, pady=2, sticky="w")
-
-                tk.Label(
-                    win,
-                    text=f"{values[i]:.2f}",
-                    width=12,
-                    anchor="w"
-                ).grid(row=i+2, column=col+1, padx=5, pady=2, sticky="w")
-
-            col += 2
-
-        # -----------------------------
-        # Resource breakdown column
-        # -----------------------------
-        resource_names = ["燃料", "弾薬", "鋼材", "バケツ", "cond"]
-
-        resource_sections = [
-            ("出撃による消費資源", spent_from_sorties),
-            ("遠征による獲得資源", earned_from_expeds),
-            ("課金による獲得資源", bought_from_shop),
-            ("最終残量", remaining),
-        ]
-
-        # Create one frame occupying the next two columns
-        resource_frame = tk.Frame(win)
-        resource_frame.grid(row=0, column=col, rowspan=40, padx=20, sticky="n")
-
-        current_row = 0
-
-        for title, values in resource_sections:
-
-            tk.Label(
-                resource_frame,
-                text=title,
-                font=("Consolas", 12, "bold")
-            ).grid(row=current_row, column=0, columnspan=2, pady=(10, 0))
+        self.after(WATCH_POLL_MS, self.poll_watch)
+        self.preloaded = threading.Event()
+        self.after(PRELOAD_DELAY_MS, self.start_preload)
+
+    def start_preload(self):
+        def run():
+            try:
+                preload()
+            except Exception:
+                pass    # the first real use reports the problem
+            finally:
+                self.preloaded.set()
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def show_results_window(self, result, reuse=False):
+        """
+        Every number of the result in one scrollable table. Zero rows can be
+        hidden, rows filtered by name and sorted by clicking a heading (名前,
+        値 or 戦果寄与, within each section), and the shown rows saved as CSV.
+        reuse=True refills the last results window in place (watch mode),
+        keeping its filter and sort.
+        """
+        from catalog import load_catalog
+        from result_table import result_rows
+
+        win = self.results_window
+        if not (reuse and win is not None and win.winfo_exists()):
+            win = self.build_results_window()
+
+        catalog = self.model.catalog if self.model is not None else load_catalog()
+        # senka per sortie of the solved model, for the contribution column
+        sortie_senka = self.model.senka if self.model is not None else self.senka
+
+        self.results_rows = result_rows(
+            result, catalog.expedition_names, catalog.shop_names, sortie_senka
+        )
+        self.results_senka = result.senka
+        self.refresh_results_table()
 
-            current_row += 1
+    def build_results_window(self):
+        from result_table import SORT_FIELDS, TABLE_COLUMNS
 
-            tk.Label(resource_frame, text="Resource").grid(
-                row=current_row, column=0, sticky="w", padx=5
-            )
-            tk.Label(resource_frame, text="Value").grid(
-                row=current_row, column=1, sticky="w", padx=5
-            )
+        win = tk.Toplevel(self)
+        win.title("最適化結果")
+        win.geometry("900x700")
+        self.results_window = win
+        self.results_sort = (None, True)
+        self.results_hide_zero = tk.BooleanVar(value=False)
+        self.results_filter = tk.StringVar()
+
+        bar = tk.Frame(win)
+        bar.pack(fill="x", padx=10, pady=(10, 5))
+        tk.Checkbutton(
+            bar, text="0の行を隠す", variable=self.results_hide_zero,
+            command=self.refresh_results_table
+        ).pack(side="left")
+        tk.Label(bar, text="名前で絞り込み:").pack(side="left", padx=(15, 2))
+        tk.Entry(bar, textvariable=self.results_filter, width=25).pack(side="left")
+        self.results_filter.trace_add("write", lambda *_: self.refresh_results_table())
+        tk.Button(bar, text="CSVで保存", command=self.export_results_csv).pack(side="right")
+
+        self.results_summary = tk.StringVar()
+        tk.Label(win, textvariable=self.results_summary, anchor="w").pack(fill="x", padx=10)
+
+        body = tk.Frame(win)
+        body.pack(fill="both", expand=True, padx=10, pady=(5, 10))
+        # a Treeview only draws the rows in view, so thousands of sorties stay cheap
+        tree = ttk.Treeview(body, columns=TABLE_COLUMNS, show="headings")
+        scroll = ttk.Scrollbar(body, orient="vertical", command=tree.yview)
+        tree.configure(yscrollcommand=scroll.set)
+        scroll.pack(side="right", fill="y")
+        tree.pack(side="left", fill="both", expand=True)
+
+        widths = {"区分": 200, "名前": 260, "値": 100, "戦果寄与": 100, "範囲": 160}
+        for column in TABLE_COLUMNS:
+            numeric = column in ("値", "戦果寄与")
+            tree.column(column, width=widths[column], anchor="e" if numeric else "w", stretch=not numeric)
+            if column in SORT_FIELDS:
+                tree.heading(column, text=column, command=lambda c=column: self.sort_results(c))
+            else:
+                # 区分 goes back to the original order
+                tree.heading(column, text=column, command=lambda: self.sort_results(None))
+        self.results_tree = tree
+        return win
+
+    def sort_results(self, column):
+        """
+        Clicking the sorted column again flips the direction
+        """
+        current, descending = self.results_sort
+        if column is not None and column == current:
+            descending = not descending
+        else:
+            # names read best A→Z, numbers largest first
+            descending = column != "名前"
+        self.results_sort = (column, descending)
+        self.refresh_results_table()
+
+    def shown_results_rows(self):
+        from result_table import visible_rows
+
+        column, descending = self.results_sort
+        return visible_rows(
+            self.results_rows, hide_zero=self.results_hide_zero.get(),
+            query=self.results_filter.get(), sort=column, descending=descending
+        )
 
-            current_row += 1
+    def refresh_results_table(self):
+        if self.results_window is None or not self.results_window.winfo_exists():
+            return
 
-            for i, name in enumerate(resource_names):
-                tk.Label(
-                    resource_frame,
-                    text=name,
-                    width=10,
-                    anchor="w"
-                ).grid(row=current_row, column=0, padx=5, pady=2, sticky="w")
+        from result_table import SORT_FIELDS, format_row
 
-                tk.Label(
-                    resource_frame,
-                    text=f"{values[i]:.2f}",
-                    width=12,
-                    anchor="w"
-                ).grid(row=current_row, column=1, padx=5, pady=2, sticky="w")
+        rows = self.shown_results_rows()
+        tree = self.results_tree
+        tree.delete(*tree.get_children())
+        for row in rows:
+            tree.insert("", "end", values=format_row(row))
 
-                current_row += 1
+        column, descending = self.results_sort
+        for name in SORT_FIELDS:
+            arrow = (" ▼" if descending else " ▲") if name == column else ""
+            tree.heading(name, text=name + arrow)
+        self.results_summary.set(
+            f"特別戦果＋出撃戦果: {self.results_senka:.2f}    表示 {len(rows)} / {len(self.results_rows)} 行"
+        )
 
-            current_row += 1  # spacing between tables
+    def export_results_csv(self):
+        from result_table import write_csv
 
-    def get_params(self):
+        path = filedialog.asksaveasfilename(
+            parent=self.results_window, defaultextension=".csv",
+            filetypes=[("CSV", "*.csv")], initialfile="result.csv"
+        )
+        if not path:
+            return
         try:
-            # --- strict integer check for days ---
-            days_str = self.params["days"].get()
-            if not days_str.isdigit():
-                raise ValueError("日数は整数で入力してください．")
-
-            params = {
-                "activetime": float(self.params["activetime"].get()),
-                "inactivetime": float(self.params["inactivetime"].get()),
-                "sleeptime": float(self.params["sleeptime"].get()),
-                "days": int(days_str),
-                "max_money": float(self.params["max_money"].get()),
-                "special": float(self.params["special"].get()),
-                "initialfuel": float(self.params["initialfuel"].get()),
-                "initialammo": float(self.params["initialammo"].get()),
-                "initialsteel": float(self.params["initialsteel"].get()),
-                "initialbucket": float(self.params["initialbucket"].get()),
-                "initialcond": float(self.params["initialcond"].get()),
-            }
-        except ValueError as e:
-            raise ValueError(str(e) if str(e) else "パラメータの値が正しくありません．数値を入力してください．")
-
-        # ---- negativity check for first five parameters ----
-        first_five_keys = [
-            "activetime",
-            "inactivetime",
-            "sleeptime",
-            "days",
-            "max_money"
-        ]
-
-        key_labels = {
-            "activetime": "稼働時間",
-            "inactivetime": "遠征時間",
-            "sleeptime": "休息時間",
-            "days": "日数",
-            "max_money": "最大課金額"
-        }
-
-        for key in first_five_keys:
-            if params[key] < 0:
-                raise ValueError(f"{key_labels[key]} は0以上でなければなりません．")
+            write_csv(path, self.shown_results_rows())
+        except OSError as e:
+            messagebox.showerror("Error", f"CSVを保存できませんでした: {e}", parent=self.results_window)
 
-        return params
+    def get_params(self):
+        return parse_params({key: var.get() for key, var in self.params.items()})
 
+    def get_mip_options(self):
+        try:
+            time_limit = float(self.time_limit.get())
+            mip_gap = float(self.mip_gap.get())
+        except ValueError:
+            raise ValueError("制限時間とMIPギャップには数値を入力してください")
+        if time_limit <= 0 or mip_gap < 0:
+            raise ValueError("制限時間は正，MIPギャップは0以上の値にしてください")
+        # the limit belongs to integer mode; an LP always runs to optimality
+        integer = self.integer.get()
+        return {"integer": integer, "time_limit": time_limit if integer else None, "mip_gap": mip_gap}
+
+
+    def clear_cache(self):
+        from cache import default_cache
+
+        entries, size = default_cache().size()
+        default_cache().clear()
+        messagebox.showinfo(
+            "キャッシュ削除",
+            f"{entries}件 ({size / 2**20:.1f} MB) のキャッシュを削除しました．"
+        )
 
     def load_excel(self):
+        from loader import SUPPORTED_EXTENSIONS, load_sorties
+
         path = filedialog.askopenfilename(
-            filetypes=[("Excel files", "*.xlsx *.xls")]
+            filetypes=[
+                ("Sortie data", " ".join("*" + ext for ext in SUPPORTED_EXTENSIONS)),
+                ("Excel files", "*.xlsx *.xls"),
+                ("CSV files", "*.csv"),
+                ("Parquet files", "*.parquet"),
+                ("JSON files", "*.json"),
+            ]
         )
         if not path:
             return
 
         try:
-            (
-                self.sortie_names,
-                self.sortie_weights,
-                self.senka,
-                self.maxproportion
-            ) = load_sorties_from_excel(path)
+            timings = {}
+            with collect(timings):
+                (
+                    self.sortie_names,
+                    self.sortie_weights,
+                    self.senka,
+                    self.maxproportion
+                ) = load_sorties(path)
+            self.model = None
+            self.sortie_path = path
+            self._watch_signature = file_signature(path)
+            self._watch_pending = None
 
             self.excel_label.set(os.path.basename(path))
 
             messagebox.showinfo(
                 "エクセル読み込み成功",
-                f"{len(self.sortie_weights)}種の出撃が読み込まれました."
+                f"{len(self.sortie_weights)}種の出撃が読み込まれました.\n"
+                f"読み込み時間: {format_timings(timings) if timings else 'キャッシュから読み込み'}"
             )
         except Exception as e:
             messagebox.showerror("エクセル読み込みエラー", str(e))
 
 
-    def run(self):
+    def _has_data(self):
         if self.sortie_weights is None or self.senka is None or self.maxproportion is None:
             messagebox.showerror(
                 "エクセル不備",
                 "最適化を実行する前に，出撃データをエクセルから読み込んでください。"
             )
-            return
+            return False
+        return True
 
-        old_stdout = sys.stdout
-        old_stderr = sys.stderr
-
-        redirector = TextRedirector(self.console)
-        sys.stdout = redirector
-        sys.stderr = redirector
+    def _ready(self):
+        return self._has_data() and self.solve_thread is None
 
+    def _start_worker(self, target, args, status):
         self.console.config(state="normal")
         self.console.delete("1.0", tk.END)
         self.console.config(state="disabled")
 
+        self.old_streams = (sys.stdout, sys.stderr)
+        redirector = TextRedirector(self.console_queue)
+        sys.stdout = redirector
+        sys.stderr = redirector
+
+        self.run_button.config(state="disabled")
+        self.frontier_button.config(state="disabled")
+        self.load_button.config(state="disabled")
+        self.cancel_button.config(state="normal")
+        self.result.set(status)
+
+        # one event per solve, so a late click cannot stop the next one
+        self.cancel_event = threading.Event()
+        self.solve_thread = threading.Thread(target=target, args=(*args, self.cancel_event), daemon=True)
+        self.solve_thread.start()
+        self.after(CONSOLE_POLL_MS, self.poll_solve)
+
+    def cancel_solve(self):
+        """
+        Ask the running solve to stop; it hands back its best point so far
+        """
+        if self.solve_thread is None:
+            return
+        self.cancel_event.set()
+        self.cancel_button.config(state="disabled")
+        self.result.set("中止しています…")
+
+    def _loaded(self):
+        """
+        The loaded data and model, handed to a worker (Tk thread)
+        """
+        return (self.sortie_names, self.sortie_weights, self.senka, self.maxproportion), self.model
+
+    def _get_model(self, sorties, model, params, enable_short_bucket, catalog):
+        """
+        model patched to params, or a new one for sorties (worker thread).
+        A new model goes back through solve_queue and is only assigned to
+        self.model on the Tk thread.
+        """
+        from model import SenkaModel
+
+        if model is None or model.enable_short_bucket != enable_short_bucket:
+            _, sortie_weights, senka, maxproportion = sorties
+            model = SenkaModel(
+                sortie_weights,
+                senka,
+                maxproportion,
+                enable_short_bucket=enable_short_bucket,
+                catalog=catalog,
+                **params
+            )
+            self.solve_queue.put(("state", {"model": model}))
+        else:
+            model.update(**params)
+        return model
+
+    def run(self):
+        if not self._ready():
+            return
+
+        # tk variables are read here, on the main thread
         try:
-            print("Starting optimization...\n")
             params = self.get_params()
-            (
-                senka_value,
-                sortie_vals,
-                run_vals,
-                off_vals,
-                sleep_vals,
-                shop_vals,
-                spent_from_sorties,
-                earned_from_expeds,
-                bought_from_shop,
-                remaining
-            ) = solve_senka(
-                self.sortie_weights,
-                self.senka,
-                self.maxproportion,
-                enable_short_bucket=self.enable_short_bucket.get(),
-                **params
+            mip_options = self.get_mip_options()
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+
+        self._start_worker(
+            self.solve_worker,
+            (*self._loaded(), params, self.enable_short_bucket.get(), mip_options),
+            "最適化中…"
+        )
+
+    def run_frontier(self):
+        if not self._ready():
+            return
+
+        try:
+            params = self.get_params()
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+
+        choice = next(c for c in FRONTIER_CHOICES if c[0] == self.frontier_label.get())
+        self._start_worker(
+            self.frontier_worker,
+            (*self._loaded(), params, self.enable_short_bucket.get(), choice),
+            "戦果曲線を計算中…"
+        )
+
+    def poll_watch(self):
+        """
+        Watch mode: once the loaded file has changed and then stayed
+        unchanged for WATCH_DEBOUNCE seconds, reload it and re-solve
+        """
+        self.after(WATCH_POLL_MS, self.poll_watch)
+        if not self.watch.get() or self.sortie_path is None:
+            self._watch_pending = None
+            return
+
+        signature = file_signature(self.sortie_path)
+        if signature is None or signature == self._watch_signature:
+            self._watch_pending = None
+            return
+
+        now = time.monotonic()
+        if self._watch_pending is None or self._watch_pending[0] != signature:
+            # every new save restarts the wait
+            self._watch_pending = (signature, now)
+            return
+        if now - self._watch_pending[1] < WATCH_DEBOUNCE or self.solve_thread is not None:
+            return
+
+        self._watch_signature = signature
+        self._watch_pending = None
+        try:
+            params = self.get_params()
+            mip_options = self.get_mip_options()
+        except ValueError as e:
+            self.result.set(f"自動再計算できません: {e}")
+            return
+
+        self._start_worker(
+            self.watch_worker,
+            (self.sortie_path, *self._loaded(), params, self.enable_short_bucket.get(), mip_options),
+            "ファイルの変更を検出，再計算中…"
+        )
+
+    def watch_worker(self, path, sorties, model, params, enable_short_bucket, mip_options, cancel):
+        """
+        Reload the watched file, report which sorties changed and re-solve;
+        the loaded model only gets the changed columns and hot starts. The
+        new data goes back through solve_queue.
+        """
+        from loader import load_sorties
+        from model import changed_sorties
+
+        old_names, *old = sorties
+        try:
+            sorties = load_sorties(path)
+            names, sortie_weights, senka, maxproportion = sorties
+
+            changed = changed_sorties(old, (sortie_weights, senka, maxproportion))
+            if changed is None:
+                print(f"出撃の種類数が変わりました ({len(old_names)} → {len(names)})")
+            elif names != old_names:
+                print("出撃名が変わりました")
+            if changed is not None and changed.size:
+                print("変更された出撃:", ", ".join(names[i] for i in changed))
+            elif changed is not None:
+                print("出撃データに変更はありません")
+
+            if model is not None:
+                update = model.update_sorties(sortie_weights, senka, maxproportion)
+                if update["mode"] == "patched":
+                    print(
+                        f"モデル更新: 係数 {update['coefficients']} 個, "
+                        f"目的関数 {update['costs']} 個を差し替え（ウォームスタート）"
+                    )
+                elif update["mode"] == "rebuilt":
+                    print("モデル更新: 問題の形が変わったため再構築")
+        except Exception as e:
+            print("\nERROR:")
+            print(e)
+            self.solve_queue.put(("watch_error", e))
+            return
+
+        self.solve_queue.put(("state", {
+            "sortie_names": names, "sortie_weights": sortie_weights, "senka": senka, "maxproportion": maxproportion,
+        }))
+        self.solve_worker(sorties, model, params, enable_short_bucket, mip_options, cancel, kind="watch")
+
+    def solve_worker(self, sorties, model, params, enable_short_bucket, mip_options, cancel, kind="ok"):
+        """
+        Runs off the Tk thread on the data and model handed over by
+        _loaded(); reports back through solve_queue only
+        """
+        from cache import default_cache, result_key
+        from catalog import load_catalog
+        from model import SHADOW_KEYS, format_presolve, format_stats
+        from solvers import SolveStopped, get_backend
+
+        try:
+            print("Starting optimization...\n")
+
+            sortie_names, sortie_weights, senka, maxproportion = sorties
+            catalog = load_catalog()
+            key = result_key(
+                sortie_weights, senka, maxproportion, enable_short_bucket, params,
+                catalog=catalog, backend=model.backend if model else get_backend(),
+                presolve=True, sensitivity=True, **mip_options
             )
+            result = default_cache().get(key)
+
+            if result is not None:
+                print("前回と同じ条件の計算結果をキャッシュから読み込みました．")
+            else:
+                model = self._get_model(sorties, model, params, enable_short_bucket, catalog)
+                result = model.solve(sensitivity=True, **mip_options, cancel=cancel)
+                # a result stopped by a limit or cancel is not stored
+                default_cache().put(key, result)
+
+            result.sortie_names = sortie_names
             print("\nOptimization finished.")
 
-            print("Sortie schedule:", sortie_vals)
-            print("Expeditions (run + off):", {i: run_vals[i]+off_vals[i] for i in run_vals})
-            print("Expeditions (sleep):", sleep_vals)
-            print("Shop purchases:", shop_vals)
-
-            self.result.set(f"特別戦果＋出撃戦果: {senka_value:.2f}")
-
-            # Show detailed window
-            self.show_results_window(
-                self.sortie_names,
-                sortie_vals,
-                run_vals,
-                off_vals,
-                sleep_vals,
-                shop_vals,
-                spent_from_sorties,
-                earned_from_expeds,
-                bought_from_shop,
-                remaining
-            )
+            print("Sortie schedule:", dict(zip(result.sortie_names, result.sortie)))
+            print("Expeditions (run + off):", result.exped_active)
+            print("Expeditions (sleep):", result.exped_sleep)
+            print("Shop purchases:", result.shop)
+            if result.sensitivity is not None:
+                print("Shadow prices:", dict(zip(SHADOW_KEYS, result.sensitivity["shadow_prices"])))
+                print("Reduced costs:", result.sensitivity["reduced_costs"])
+            print()
+            print(format_stats(result.stats))
+            if result.stats["presolve"]:
+                print(format_presolve(result.stats["presolve"], sortie_names, catalog))
+
+            self.solve_queue.put((kind, result))
+
+        except SolveStopped as e:
+            print()
+            print(e)
+            self.solve_queue.put(("stopped", e))
 
         except Exception as e:
             print("\nERROR:")
             print(e)
+            self.solve_queue.put(("error", e))
+
+    def frontier_worker(self, sorties, model, params, enable_short_bucket, choice, cancel):
+        from catalog import load_catalog
+        from frontier import senka_frontier
+        from solvers import SolveStopped
+
+        label, key, _ = choice
+        try:
+            print(f"{label}に対する戦果曲線を計算中...\n")
+
+            model = self._get_model(sorties, model, params, enable_short_bucket, load_catalog())
+            frontier = senka_frontier(model, key, cancel=cancel)
+
+            print(f"折れ点 {frontier.points.size} 個, LP {frontier.solves} 回")
+            print(f"処理時間: {format_timings(frontier.timings)}")
+            self.solve_queue.put(("frontier", (choice, frontier)))
+
+        except SolveStopped as e:
+            print()
+            print(e)
+            self.solve_queue.put(("stopped", e))
+
+        except Exception as e:
+            print("\nERROR:")
+            print(e)
+            self.solve_queue.put(("error", e))
+
+    def drain_console(self):
+        chunks = []
+        try:
+            while True:
+                chunks.append(self.console_queue.get_nowait())
+        except queue.Empty:
+            pass
+
+        if chunks:
+            self.console.config(state="normal")
+            self.console.insert(tk.END, "".join(chunks))
+            self.console.see(tk.END)
+            self.console.config(state="disabled")
+
+    def poll_solve(self):
+        self.drain_console()
+
+        while True:
+            try:
+                kind, payload = self.solve_queue.get_nowait()
+            except queue.Empty:
+                self.after(CONSOLE_POLL_MS, self.poll_solve)
+                return
+            if kind != "state":
+                break
+            # data and models made by the worker are only assigned here, on the Tk thread
+            for name, value in payload.items():
+                setattr(self, name, value)
+
+        self.solve_thread = None
+        sys.stdout, sys.stderr = self.old_streams
+        self.drain_console()
+        self.run_button.config(state="normal")
+        self.frontier_button.config(state="normal")
+        self.load_button.config(state="normal")
+        self.cancel_button.config(state="disabled")
+
+        # the worker has imported the solver by now
+        from solvers import STOP_REASONS
+
+        if kind == "stopped":
+            self.result.set(f"Result: — ({STOP_REASONS[payload.reason]})")
+            return
+
+        if kind == "error":
+            self.result.set("Result: —")
+            messagebox.showerror("Error", str(payload))
+            return
+
+        if kind == "watch_error":
+            # most likely a half-written save; the next save retries
+            self.result.set(f"自動再計算: 読み込みエラー ({payload})")
+            return
+
+        if kind == "frontier":
+            self.result.set("Result: —")
+            self.show_frontier_window(*payload)
+            return
+
+        text = f"特別戦果＋出撃戦果: {payload.senka:.2f}"
+        if payload.lp_bound is not None:
+            text += f"  (LP上界: {payload.lp_bound:.2f}, {payload.stats['status']})"
+        if payload.stats.get("stopped"):
+            text += f"  途中終了: {STOP_REASONS[payload.stats['stopped']]}"
+        self.result.set(text)
+
+        # Show detailed window
+        self.show_results_window(payload, reuse=kind == "watch")
+
+    def show_frontier_window(self, choice, frontier):
+        """
+        Line chart of the breakpoints and one line per segment with its
+        slope and the purchases / sorties used at its two ends
+        """
+        label, _, unit = choice
+        win = tk.Toplevel(self)
+        win.title(f"戦果曲線 ({label})")
+        win.geometry("900x760")
+
+        width, height = 860, 400
+        left, right, top, bottom = 80, 20, 20, 50
+        canvas = tk.Canvas(win, width=width, height=height, bg="white")
+        canvas.pack(padx=10, pady=10)
+
+        xs, ys = frontier.points, frontier.senka
+        x_lo, x_hi = xs[0], xs[-1]
+        y_lo, y_hi = ys.min(), ys.max()
+        if y_hi - y_lo < 1e-9:
+            y_lo, y_hi = y_lo - 1, y_hi + 1
+
+        def px(x):
+            return left + (x - x_lo) / (x_hi - x_lo) * (width - left - right)
+
+        def py(y):
+            return height - bottom - (y - y_lo) / (y_hi - y_lo) * (height - top - bottom)
+
+        canvas.create_line(left, top, left, height - bottom)
+        canvas.create_line(left, height - bottom, width - right, height - bottom)
+        for t in range(5):
+            x = x_lo + (x_hi - x_lo) * t / 4
+            y = y_lo + (y_hi - y_lo) * t / 4
+            canvas.create_text(px(x), height - bottom + 12, text=f"{x:,.0f}" if x_hi > 100 else f"{x:.1f}")
+            canvas.create_text(left - 8, py(y), text=f"{y:,.0f}", anchor="e")
+        canvas.create_text((left + width - right) / 2, height - 12, text=f"{label} [{unit}]")
+
+        canvas.create_line(
+            *(coord for x, y in zip(xs, ys) for coord in (px(x), py(y))),
+            fill="steelblue", width=2
+        )
+        for x, y in zip(xs, ys):
+            canvas.create_oval(px(x) - 3, py(y) - 3, px(x) + 3, py(y) + 3, fill="red", outline="")
+
+        text = tk.Text(win, height=18, width=120, font=("Consolas", 9))
+        scroll = tk.Scrollbar(win, command=text.yview)
+        text.config(yscrollcommand=scroll.set)
+        scroll.pack(side="right", fill="y")
+        text.pack(padx=10, pady=(0, 10), fill="both", expand=True)
+
+        from catalog import load_catalog
+
+        shop_names = (self.model.catalog if self.model is not None else load_catalog()).shop_names
+        sortie_names = self.sortie_names or [str(i) for i in range(frontier.results[0].sortie.size)]
+
+        def mix(names, start, end):
+            return ", ".join(
+                f"{name} {a:.2f}→{b:.2f}"
+                for name, a, b in zip(names, start, end) if a > 0 or b > 0
+            ) or "なし"
+
+        lines = [f"折れ点 {xs.size} 個 (LP {frontier.solves} 回)", ""]
+        for k, slope in enumerate(frontier.slopes):
+            start, end = frontier.results[k], frontier.results[k + 1]
+            lines.append(
+                f"{xs[k]:,.2f} – {xs[k + 1]:,.2f} {unit}: 戦果 {ys[k]:.2f} → {ys[k + 1]:.2f}, "
+                f"傾き {slope:.6g} 戦果/{unit}"
+            )
+            lines.append(f"    購入: {mix(shop_names, start.shop, end.shop)}")
+            lines.append(f"    出撃: {mix(sortie_names, start.sortie, end.sortie)}")
+        text.insert(tk.END, "\n".join(lines))
+        text.config(state="disabled")
+
+    # -----------------------------
+    # Scenario comparison
+    # -----------------------------
+    def _selected_scenario(self):
+        selection = self.scenario_list.curselection()
+        return self.scenarios[selection[0]] if selection else None
+
+    def add_scenario(self):
+        """
+        Queue the current form (parameters, bucket and integer options) as a scenario
+        """
+        name = self.scenario_name.get().strip()
+        try:
+            if not name:
+                raise ValueError("シナリオ名を入力してください")
+            if any(entry["scenario"]["name"] == name for entry in self.scenarios):
+                raise ValueError(f"シナリオ「{name}」は既にあります")
+            scenario = {
+                "name": name,
+                "params": self.get_params(),
+                "enable_short_bucket": self.enable_short_bucket.get(),
+                **self.get_mip_options(),
+            }
+        except ValueError as e:
             messagebox.showerror("Error", str(e))
-        finally:
-            sys.stdout = old_stdout
-            sys.stderr = old_stderr
+            return
+
+        self.scenarios.append({
+            "scenario": scenario, "status": "未計算", "future": None,
+            "cancel": None, "cancelled": False, "result": None, "error": None,
+        })
+        if self.baseline is None:
+            self.baseline = name
+        self.scenario_name.set(f"シナリオ{len(self.scenarios) + 1}")
+        self.refresh_scenario_list()
+
+    def remove_scenario(self):
+        entry = self._selected_scenario()
+        if entry is None:
+            return
+        if entry["future"] is not None:
+            entry["future"].cancel()
+            entry["cancel"].set()
+        self.scenarios.remove(entry)
+        if self.baseline == entry["scenario"]["name"]:
+            self.baseline = self.scenarios[0]["scenario"]["name"] if self.scenarios else None
+        self.refresh_scenario_list()
+
+    def set_baseline(self):
+        entry = self._selected_scenario()
+        if entry is None:
+            return
+        self.baseline = entry["scenario"]["name"]
+        self.refresh_scenario_list()
+        if self.comparison_window is not None and self.comparison_window.winfo_exists():
+            self.show_comparison_window()
+
+    def run_scenarios(self):
+        """
+        Solve every scenario that is not already queued or running on the pool
+        """
+        if not self.scenarios or not self._has_data():
+            return
+
+        from cache import default_cache
+        from catalog import load_catalog
+        from scenarios import ScenarioPool
+
+        if self.scenario_pool is None:
+            self.scenario_pool = ScenarioPool()
+
+        # the data as loaded now; a later load does not affect these solves
+        sorties = (self.sortie_weights, self.senka, self.maxproportion)
+        self.scenario_sortie_names = self.sortie_names
+        catalog = load_catalog()
+        for entry in self.scenarios:
+            if entry["future"] is not None:
+                continue
+            entry.update(status="待機中", cancel=threading.Event(), cancelled=False, result=None, error=None)
+            entry["future"] = self.scenario_pool.submit(
+                sorties, entry["scenario"], catalog=catalog, cache=default_cache(), cancel=entry["cancel"]
+            )
+
+        self.refresh_scenario_list()
+        if not self._scenario_polling:
+            self._scenario_polling = True
+            self.after(SCENARIO_POLL_MS, self.poll_scenarios)
+
+    def cancel_scenario(self):
+        """
+        A queued scenario is dropped from the pool; a running one is told
+        to stop and whatever it returns is discarded
+        """
+        entry = self._selected_scenario()
+        if entry is None or entry["future"] is None:
+            return
+        entry["cancelled"] = True
+        entry["cancel"].set()
+        entry["status"] = "キャンセル" if entry["future"].cancel() else "キャンセル中"
+        self.refresh_scenario_list()
+
+    def poll_scenarios(self):
+        running = False
+        for entry in self.scenarios:
+            future = entry["future"]
+            if future is None:
+                continue
+            if not future.done():
+                running = True
+                if future.running() and entry["status"] == "待機中":
+                    entry["status"] = "計算中"
+                continue
+
+            entry["future"] = None
+            if entry["cancelled"] or future.cancelled():
+                entry["status"] = "キャンセル"
+            elif future.exception() is not None:
+                entry["status"] = "エラー"
+                entry["error"] = str(future.exception())
+            else:
+                entry["status"] = "完了"
+                entry["result"] = future.result()
+
+        self.refresh_scenario_list()
+        if running:
+            self.after(SCENARIO_POLL_MS, self.poll_scenarios)
+            return
+
+        self._scenario_polling = False
+        if any(entry["result"] is not None for entry in self.scenarios):
+            self.show_comparison_window()
+
+    def refresh_scenario_list(self):
+        selection = self.scenario_list.curselection()
+        baseline = next(
+            (e["result"] for e in self.scenarios if e["scenario"]["name"] == self.baseline), None
+        )
+
+        self.scenario_list.delete(0, tk.END)
+        for entry in self.scenarios:
+            name = entry["scenario"]["name"]
+            line = f"{'*' if name == self.baseline else ' '} {name:<14} {entry['status']:<6}"
+            result = entry["result"]
+            if result is not None:
+                line += f" 戦果 {result.senka:10.2f}"
+                if baseline is not None and name != self.baseline:
+                    line += f" ({result.senka - baseline.senka:+.2f})"
+            elif entry["error"]:
+                line += f" {entry['error']}"
+            self.scenario_list.insert(tk.END, line)
+
+        for index in selection:
+            if index < len(self.scenarios):
+                self.scenario_list.selection_set(index)
+
+    def show_comparison_window(self):
+        """
+        One column per scenario plus its difference to the baseline (*),
+        redrawn in place when the window is already open
+        """
+        results = {entry["scenario"]["name"]: entry["result"] for entry in self.scenarios}
+        if not any(result is not None for result in results.values()):
+            return
+
+        from catalog import load_catalog
+        from scenarios import comparison_table
+
+        catalog = self.model.catalog if self.model is not None else load_catalog()
+        table = comparison_table(
+            results, self.baseline,
+            sortie_names=self.scenario_sortie_names, shop_names=catalog.shop_names
+        )
+
+        win = self.comparison_window
+        if win is not None and win.winfo_exists():
+            for child in win.winfo_children():
+                child.destroy()
+        else:
+            win = tk.Toplevel(self)
+            win.title("シナリオ比較")
+            self.comparison_window = win
+
+        for j, column in enumerate(table.columns):
+            label = f"* {column}" if column == self.baseline else column
+            tk.Label(win, text=label, font=("Consolas", 10, "bold")).grid(
+                row=0, column=j + 1, padx=5, pady=(10, 2), sticky="e"
+            )
 
+        for i, (row_name, values) in enumerate(table.iterrows()):
+            tk.Label(win, text=row_name, anchor="w").grid(row=i + 1, column=0, padx=5, sticky="w")
+            for j, column in enumerate(table.columns):
+                value = values[column]
+                delta = column.startswith("Δ ")
+                if value != value:    # NaN: not solved
+                    text, colour = "", "black"
+                elif delta:
+                    text = f"{value:+.2f}"
+                    colour = "green" if value > 0.005 else "red" if value < -0.005 else "gray"
+                else:
+                    text, colour = f"{value:.2f}", "black"
+                tk.Label(win, text=text, fg=colour, width=12, anchor="e").grid(
+                    row=i + 1, column=j + 1, padx=5, sticky="e"
+                )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,458 @@
+"""
+Scaling benchmark for the senka model (python -m bench from core/).
+
+    python -m bench                          # default sizes, print table
+    python -m bench -o bench.json            # also save the run
+    python -m bench --compare old.json       # flag phase regressions
+    python -m bench --loader                 # sortie sheet readers on wide .xlsx
+    python -m bench --startup --budget 1.5   # GUI time-to-window / first solve
+
+Each case times model construction, the solver call and post-processing
+(simplify, round_result and the resource breakdown) separately and records
+peak traced Python memory per phase. Saved runs are JSON with one entry per
+(n_sorties, backend) case so two runs can be compared directly.
+
+--loader instead writes synthetic .xlsx templates (with rows of notes under
+the sortie block) and times the streaming reader against pandas.
+
+--startup launches fresh interpreters and measures, from process launch,
+the import of app, the first painted window (when a display is available)
+and the first solve after the background preload. It fails when numpy,
+pandas or a solver is imported before the window, or when time-to-window
+exceeds --budget seconds.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from catalog import load_catalog
+from loader import SORTIE_FIELDS, _read_raw, parse_sortie_block, read_sortie_sheet
+from model import PARAM_DEFAULTS, build_model, prepare_sorties, summarize
+from solvers import available_backends, get_backend
+
+
+DEFAULT_SIZES = (10, 30, 100, 300, 1000, 3000, 10000)
+LOADER_SIZES = (100, 1000, 5000)
+LOADER_NOTE_ROWS = 200
+
+# must not be imported before the GUI window exists
+STARTUP_HEAVY_MODULES = ("numpy", "scipy", "pandas", "pulp", "highspy")
+STARTUP_MARKS = ("start", "import", "window", "preload", "first_solve")
+PHASES = ("build", "solve", "post")
+BENCH_FORMAT = 1
+
+
+# -----------------------------
+# Synthetic sortie data
+# -----------------------------
+def synthetic_sorties(n_sorties, seed=0):
+    """
+    Random sortie matrix shaped like real templates: fuel/ammo/steel/bucket
+    consumption, a few kira sorties spending cond, a few sink runs that earn
+    fuel/ammo, 1-7 minute sorties, senka 0-3 and some proportion caps.
+    Returns (sortie_weights[n, 6], senka[n], maxproportion[n]).
+    """
+    rng = np.random.default_rng(seed)
+    n = n_sorties
+
+    weights = np.empty((n, 6))
+    weights[:, 0] = rng.uniform(10, 300, n)          # fuel
+    weights[:, 1] = rng.uniform(10, 250, n)          # ammo
+    weights[:, 2] = rng.uniform(0, 100, n) * (rng.random(n) < 0.6)  # steel
+    weights[:, 3] = rng.uniform(0.05, 1.5, n)        # bucket
+    weights[:, 4] = 0.0                              # cond
+    weights[:, 5] = rng.uniform(60, 420, n)          # seconds
+
+    kira = rng.random(n) < 0.1
+    weights[kira, 4] = -rng.uniform(10, 40, kira.sum())
+
+    sink = rng.random(n) < 0.05
+    weights[sink, 0] = -rng.uniform(40, 120, sink.sum())
+    weights[sink, 1] = -rng.uniform(60, 160, sink.sum())
+
+    senka = rng.uniform(0.5, 3.0, n)
+    senka[sink] = 0.0
+
+    maxproportion = np.ones(n)
+    capped = rng.random(n) < 0.2
+    maxproportion[capped] = rng.uniform(0.05, 0.9, capped.sum())
+
+    return weights, senka, maxproportion
+
+
+def synthetic_template(path, n_sorties, note_rows=LOADER_NOTE_ROWS, seed=0):
+    """
+    Write synthetic_sorties as an .xlsx in the template layout, followed by
+    note_rows rows of free text under the block. Written in normal mode so
+    the sheet carries its dimension like files saved by Excel (write-only
+    files lack it and openpyxl then scans the whole sheet to size it).
+    """
+    import openpyxl
+
+    weights, senka, maxproportion = synthetic_sorties(n_sorties, seed)
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append([SORTIE_FIELDS[0]] + [f"sortie {i}" for i in range(n_sorties)])
+    for r, field in enumerate(SORTIE_FIELDS[1:7]):
+        sheet.append([field] + weights[:, r].tolist())
+    sheet.append([SORTIE_FIELDS[7]] + senka.tolist())
+    sheet.append([SORTIE_FIELDS[8]] + maxproportion.tolist())
+    for k in range(note_rows):
+        sheet.append([None] + [f"memo {k}-{i}" if i % 3 == 0 else None for i in range(n_sorties)])
+    workbook.save(path)
+
+
+# -----------------------------
+# Timing
+# -----------------------------
+def _timed(fn):
+    t0 = time.perf_counter()
+    value = fn()
+    return value, time.perf_counter() - t0
+
+
+def _peak(fn):
+    """
+    Peak traced Python memory of fn; run separately from the timings since
+    tracemalloc slows allocation-heavy code down considerably
+    """
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    value = fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return value, peak
+
+
+def run_case(n_sorties, backend, params=None, repeat=3, seed=0):
+    """
+    Time one problem size; the fastest of `repeat` runs is kept per phase,
+    followed by one traced run for peak memory
+    """
+    params = dict(PARAM_DEFAULTS if params is None else params)
+    weights, senka, maxproportion = synthetic_sorties(n_sorties, seed)
+    sortie_weights, senka, maxproportion = prepare_sorties(weights, senka, maxproportion)
+    catalog = load_catalog()
+    solver = get_backend(backend)
+
+    phases = {
+        "build": lambda: build_model(
+            sortie_weights, senka, maxproportion, True, catalog, **params
+        ),
+        "solve": lambda: solver.solve(lp),
+        "post": lambda: summarize(
+            solution.x, lp, sortie_weights, senka, catalog,
+            days=params["days"], offsets=offsets, special=params["special"]
+        ),
+    }
+
+    best = {phase: float("inf") for phase in PHASES}
+    peak = {phase: 0 for phase in PHASES}
+
+    for i in range(repeat + 1):
+        measure = _timed if i < repeat else _peak
+        (lp, offsets), value_build = measure(phases["build"])
+        solution, value_solve = measure(phases["solve"])
+        if solution.status == "Optimal":
+            _, value_post = measure(phases["post"])
+        else:
+            value_post = float("nan") if i < repeat else 0
+
+        values = {"build": value_build, "solve": value_solve, "post": value_post}
+        for phase in PHASES:
+            if i < repeat:
+                best[phase] = min(best[phase], values[phase])
+            else:
+                peak[phase] = values[phase]
+
+    return {
+        "n_sorties": n_sorties,
+        "backend": solver.name,
+        "status": solution.status,
+        "rows": lp.n_rows,
+        "cols": lp.n_cols,
+        "nnz": int(lp.nnz),
+        **{f"{phase}_s": best[phase] for phase in PHASES},
+        **{f"{phase}_peak_bytes": peak[phase] for phase in PHASES},
+        "total_s": sum(best[phase] for phase in PHASES),
+    }
+
+
+def run_loader_case(n_sorties, repeat=3, seed=0):
+    """
+    Time the streaming and the pandas reader on one synthetic template
+    """
+    readers = {
+        "stream": read_sortie_sheet,
+        "pandas": lambda path: parse_sortie_block(*_read_raw(path)),
+    }
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "template.xlsx")
+        synthetic_template(path, n_sorties, seed=seed)
+        case = {"n_sorties": n_sorties, "file_bytes": os.path.getsize(path)}
+        for name, read in readers.items():
+            case[f"{name}_s"] = min(_timed(lambda: read(path))[1] for _ in range(repeat))
+            case[f"{name}_peak_bytes"] = _peak(lambda: read(path))[1]
+    return case
+
+
+def format_loader_case(case):
+    return (
+        f"{case['n_sorties']:>6} {case['file_bytes'] / 2**20:>8.2f} "
+        f"{case['stream_s'] * 1e3:>10.1f} {case['stream_peak_bytes'] / 2**20:>9.2f} "
+        f"{case['pandas_s'] * 1e3:>10.1f} {case['pandas_peak_bytes'] / 2**20:>9.2f}"
+    )
+
+
+LOADER_HEADER = (
+    f"{'n':>6} {'file MiB':>8} {'stream ms':>10} {'peak MiB':>9} {'pandas ms':>10} {'peak MiB':>9}"
+)
+
+
+# -----------------------------
+# GUI start-up
+# -----------------------------
+STARTUP_SCRIPT = """
+import sys, time
+
+def mark(name):
+    print(f"@mark {{name}} {{time.time():.6f}}", flush=True)
+
+mark("start")
+import app
+mark("import")
+print("@heavy " + " ".join(m for m in {heavy!r} if m in sys.modules), flush=True)
+
+window = None
+try:
+    window = app.App()
+    window.update()
+    mark("window")
+except Exception:
+    pass    # no display
+
+app.preload()
+mark("preload")
+
+from bench import synthetic_sorties
+from model import PARAM_DEFAULTS, solve_senka
+solve_senka(*synthetic_sorties(30), **PARAM_DEFAULTS)
+mark("first_solve")
+
+if window is not None:
+    window.destroy()
+"""
+
+
+def run_startup_case():
+    """
+    One fresh interpreter: seconds from launch to every mark in
+    STARTUP_MARKS (None when not reached) and the heavy modules that
+    were already imported together with app
+    """
+    script = STARTUP_SCRIPT.format(heavy=STARTUP_HEAVY_MODULES)
+    launched = time.time()
+    out = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    if out.returncode != 0:
+        raise RuntimeError(f"start-up run failed:\n{out.stderr}")
+
+    case = {f"{name}_s": None for name in STARTUP_MARKS}
+    case["heavy_modules"] = []
+    for line in out.stdout.splitlines():
+        if line.startswith("@mark "):
+            _, name, stamp = line.split()
+            case[f"{name}_s"] = float(stamp) - launched
+        elif line.startswith("@heavy"):
+            case["heavy_modules"] = line.split()[1:]
+    return case
+
+
+def run_startup(repeat=3):
+    """
+    Fastest of `repeat` runs per mark; heavy_modules is the union
+    """
+    cases = [run_startup_case() for _ in range(repeat)]
+    best = {
+        f"{name}_s": min((c[f"{name}_s"] for c in cases if c[f"{name}_s"] is not None), default=None)
+        for name in STARTUP_MARKS
+    }
+    best["heavy_modules"] = sorted({m for c in cases for m in c["heavy_modules"]})
+    return best
+
+
+def format_startup(case):
+    def ms(name):
+        value = case[f"{name}_s"]
+        return f"{value * 1e3:>10.1f}" if value is not None else f"{'-':>10}"
+
+    return " ".join(ms(name) for name in STARTUP_MARKS) + "  " + (" ".join(case["heavy_modules"]) or "-")
+
+
+STARTUP_HEADER = (
+    " ".join(f"{name + ' ms':>10}" for name in STARTUP_MARKS) + "  heavy before window"
+)
+
+
+def _git_revision():
+    try:
+        out = subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            capture_output=True, text=True, timeout=5
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def run_suite(sizes=DEFAULT_SIZES, backends=None, repeat=3, seed=0, progress=None):
+    if backends is None:
+        backends = [get_backend().name]
+
+    cases = []
+    for backend in backends:
+        for n in sizes:
+            case = run_case(n, backend, repeat=repeat, seed=seed)
+            cases.append(case)
+            if progress is not None:
+                progress(case)
+
+    return {
+        "format": BENCH_FORMAT,
+        "revision": _git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "seed": seed,
+        "repeat": repeat,
+        "cases": cases,
+    }
+
+
+# -----------------------------
+# Reporting
+# -----------------------------
+def format_case(case):
+    return (
+        f"{case['backend']:>6} {case['n_sorties']:>6} "
+        f"{case['rows']:>6} {case['cols']:>6} {case['nnz']:>8} "
+        f"{case['build_s'] * 1e3:>9.2f} {case['solve_s'] * 1e3:>9.2f} {case['post_s'] * 1e3:>9.2f} "
+        f"{max(case[f'{p}_peak_bytes'] for p in PHASES) / 2**20:>8.2f}  {case['status']}"
+    )
+
+
+HEADER = (
+    f"{'solver':>6} {'n':>6} {'rows':>6} {'cols':>6} {'nnz':>8} "
+    f"{'build ms':>9} {'solve ms':>9} {'post ms':>9} {'peak MiB':>8}  status"
+)
+
+
+def compare(current, baseline, threshold=0.2):
+    """
+    Ratios current/baseline per matching case and phase. Returns the list of
+    (backend, n_sorties, phase, ratio) exceeding 1 + threshold.
+    """
+    old = {(c["backend"], c["n_sorties"]): c for c in baseline["cases"]}
+    regressions = []
+
+    print(f"\ncompared with {baseline.get('revision')} ({baseline.get('timestamp')})")
+    for case in current["cases"]:
+        key = (case["backend"], case["n_sorties"])
+        if key not in old:
+            continue
+        ratios = []
+        for phase in PHASES:
+            before = old[key][f"{phase}_s"]
+            ratio = case[f"{phase}_s"] / before if before > 0 else float("nan")
+            ratios.append(f"{phase} x{ratio:.2f}")
+            if ratio > 1 + threshold:
+                regressions.append((case["backend"], case["n_sorties"], phase, ratio))
+        print(f"{case['backend']:>6} {case['n_sorties']:>6}  " + "  ".join(ratios))
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=None)
+    parser.add_argument("--backend", nargs="+", default=None,
+                        help=f"solver backends (available: {', '.join(available_backends())})")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="save the run as JSON")
+    parser.add_argument("--compare", help="earlier run (JSON) to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="relative slowdown reported as a regression (default 0.2)")
+    parser.add_argument("--loader", action="store_true",
+                        help="benchmark the sortie sheet readers instead of the model")
+    parser.add_argument("--startup", action="store_true",
+                        help="measure GUI start-up: time to window and to the first solve")
+    parser.add_argument("--budget", type=float, default=None,
+                        help="--startup: fail when time-to-window (seconds) exceeds this")
+    args = parser.parse_args(argv)
+
+    if args.startup:
+        print(STARTUP_HEADER)
+        case = run_startup(args.repeat)
+        print(format_startup(case))
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump({"format": BENCH_FORMAT, "revision": _git_revision(), "startup": case}, f, indent=2)
+
+        failed = False
+        if case["heavy_modules"]:
+            print(f"REGRESSION imported before the window: {', '.join(case['heavy_modules'])}")
+            failed = True
+        # without a display the import is the closest thing to the window
+        to_window = case["window_s"] if case["window_s"] is not None else case["import_s"]
+        if args.budget is not None and to_window > args.budget:
+            print(f"REGRESSION time-to-window {to_window:.3f}s > budget {args.budget:.3f}s")
+            failed = True
+        return 1 if failed else 0
+
+    if args.loader:
+        print(LOADER_HEADER)
+        cases = []
+        for n in args.sizes or LOADER_SIZES:
+            cases.append(run_loader_case(n, args.repeat, args.seed))
+            print(format_loader_case(cases[-1]), flush=True)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump({"format": BENCH_FORMAT, "revision": _git_revision(), "loader": cases}, f, indent=2)
+        return 0
+
+    print(HEADER)
+    result = run_suite(
+        args.sizes or DEFAULT_SIZES, args.backend, args.repeat, args.seed,
+        progress=lambda case: print(format_case(case), flush=True)
+    )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, args.threshold)
+        for backend, n, phase, ratio in regressions:
+            print(f"REGRESSION {backend} n={n} {phase}: x{ratio:.2f}")
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
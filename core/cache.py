@@ -0,0 +1,244 @@
+import copy
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from loader import cache_dir
+from result import SenkaResult
+
+
+# -----------------------------
+# Solve result cache
+# -----------------------------
+# Results are keyed by a hash of everything that decides the answer: the
+# sortie arrays, the parameters, enable_short_bucket, the catalog (version
+# and matrices), the solver backend and the solve options. Entries live in
+# a small in-memory LRU in front of a size-bounded directory of .npz files;
+# a file's mtime is its last use, and the least recently used files are
+# deleted once the directory grows past max_bytes.
+
+# bump when a change to the model can alter results for the same inputs
+RESULT_CACHE_VERSION = 1
+RESULT_CACHE_MAX_BYTES = 64 * 2**20
+RESULT_CACHE_MEMORY = 32
+
+
+def _feed(h, value):
+    """
+    Hash a JSON-like value with arrays; dict order and int/float spelling
+    do not change the digest
+    """
+    if isinstance(value, dict):
+        h.update(b"{")
+        for key in sorted(value):
+            h.update(str(key).encode("utf-8") + b":")
+            _feed(h, value[key])
+        h.update(b"}")
+    elif isinstance(value, (list, tuple, np.ndarray)):
+        array = np.asarray(value)
+        if array.dtype.kind in "biuf":
+            array = np.ascontiguousarray(array, dtype=float)
+            h.update(f"a{array.shape}".encode("ascii"))
+            h.update(array.tobytes())
+        else:
+            h.update(b"[")
+            for v in value:
+                _feed(h, v)
+            h.update(b"]")
+    elif isinstance(value, bool) or value is None:
+        h.update(repr(value).encode("ascii"))
+    elif isinstance(value, (int, float, np.number)):
+        h.update(repr(float(value)).encode("ascii"))
+    else:
+        h.update(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+    h.update(b";")
+
+
+def result_key(sortie_weights, senka, maxproportion, enable_short_bucket, params, *, catalog, backend, **options):
+    """
+    Stable hex key of one solve. params are the solve_senka parameters,
+    catalog a Catalog, backend a backend name or instance and options the
+    remaining solve options (sensitivity, integer, presolve, schedule, ...).
+    Options left at None are the same as not given.
+    """
+    # the gap only matters in integer mode; the time limit may also stop an LP
+    options = {
+        k: v for k, v in options.items()
+        if v is not None and not (k == "mip_gap" and not options.get("integer"))
+    }
+
+    h = hashlib.blake2b(digest_size=20)
+    _feed(h, {
+        "version": RESULT_CACHE_VERSION,
+        "sortie_weights": np.asarray(sortie_weights, dtype=float),
+        "senka": np.asarray(senka, dtype=float),
+        "maxproportion": np.asarray(maxproportion, dtype=float),
+        "enable_short_bucket": bool(enable_short_bucket),
+        "params": params,
+        "catalog_version": catalog.version,
+        "catalog": catalog.matrices(),
+        "backend": backend if isinstance(backend, str) else backend.name,
+        "options": options,
+    })
+    return h.hexdigest()
+
+
+class ResultCache:
+    """
+    Two-level LRU store of SenkaResult objects.
+
+        cache = ResultCache()
+        result = cache.get(key)
+        if result is None:
+            result = solve()
+            cache.put(key, result)
+
+    get() returns a shallow copy whose stats carry "cache": "memory" or
+    "disk", so callers may set attributes without touching the cached
+    entry. Safe to share between threads.
+    """
+
+    def __init__(self, directory=None, max_bytes=RESULT_CACHE_MAX_BYTES, memory_entries=RESULT_CACHE_MEMORY):
+        self.directory = directory or cache_dir("results")
+        os.makedirs(self.directory, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".npz")
+
+    def _remember(self, key, result):
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    @staticmethod
+    def _hit(result, level):
+        result = copy.copy(result)
+        result.stats = {**(result.stats or {}), "cache": level}
+        return result
+
+    def get(self, key):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits["memory"] += 1
+                return self._hit(self._memory[key], "memory")
+
+        path = self._path(key)
+        try:
+            result = SenkaResult.load(path)
+            os.utime(path)
+        except (OSError, KeyError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self._remember(key, result)
+            self.hits["disk"] += 1
+        return self._hit(result, "disk")
+
+    def put(self, key, result):
+        """
+        Store result under key. A solve stopped by a limit or cancel is not
+        the answer to its inputs (it depends on when it stopped and on the
+        machine's load) and is never stored.
+        """
+        if (result.stats or {}).get("stopped"):
+            return
+        result = copy.copy(result)
+        with self._lock:
+            self._remember(key, result)
+
+        path = self._path(key)
+        tmp = path + ".tmp.npz"
+        try:
+            result.save(tmp)
+            os.replace(tmp, path)
+        except (OSError, TypeError, ValueError):
+            return
+        self._evict()
+
+    def get_or_solve(self, key, solve):
+        """
+        Cached result for key, or solve() stored under key
+        """
+        result = self.get(key)
+        if result is None:
+            result = solve()
+            self.put(key, result)
+        return result
+
+    def _evict(self):
+        try:
+            entries = [
+                (e.stat().st_mtime, e.stat().st_size, e.path)
+                for e in os.scandir(self.directory)
+                if e.name.endswith(".npz") and not e.name.endswith(".tmp.npz")
+            ]
+        except OSError:
+            return
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def invalidate(self, key):
+        """
+        Drop one entry from both levels
+        """
+        with self._lock:
+            self._memory.pop(key, None)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def clear(self):
+        """
+        Drop every entry from both levels
+        """
+        with self._lock:
+            self._memory.clear()
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".npz"):
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+
+    def size(self):
+        """
+        (entries, bytes) on disk
+        """
+        sizes = [e.stat().st_size for e in os.scandir(self.directory) if e.name.endswith(".npz")]
+        return len(sizes), sum(sizes)
+
+
+_default = None
+
+
+def default_cache():
+    """
+    Process-wide ResultCache in the per-user cache directory
+    """
+    global _default
+    if _default is None:
+        _default = ResultCache()
+    return _default
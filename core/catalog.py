@@ -0,0 +1,135 @@
+import json
+import os
+import sys
+
+import numpy as np
+
+
+# -----------------------------
+# Expedition / shop catalog
+# -----------------------------
+# catalog.json lists every expedition (per-hour run gains, per-night sleep
+# gains, duration, fleet group) and every shop item. It is read once per
+# process; everything a solve needs is derived here at load time.
+
+CATALOG_FORMAT = 1
+CATALOG_FILE = "catalog.json"
+N_RESOURCES = 6
+
+_catalogs = {}
+
+
+def _default_path():
+    base = getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base, CATALOG_FILE)
+
+
+def _vector(entry, key, where):
+    values = np.asarray(entry[key], dtype=float)
+    if values.shape != (N_RESOURCES,):
+        raise ValueError(f"{where}: {key} must have {N_RESOURCES} values")
+    return values
+
+
+class Catalog:
+    """
+    Expedition and shop data with the derived matrices used by the LP.
+
+    Matrices are (6 resources, n) and read-only. dupe_exped_constr has one
+    row per fleet group with two or more expeditions; sleep_allowed(t) and
+    short_bucket are boolean masks over the expeditions.
+    """
+
+    def __init__(self, data):
+        if data.get("format", CATALOG_FORMAT) > CATALOG_FORMAT:
+            raise ValueError(f"unsupported catalog format: {data['format']}")
+
+        expeditions = data["expeditions"]
+        shop = data["shop"]
+        if not expeditions or not shop:
+            raise ValueError("catalog needs at least one expedition and one shop item")
+
+        self.version = data["version"]
+        self.expedition_names = [e["name"] for e in expeditions]
+        self.shop_names = [s["name"] for s in shop]
+
+        self.exped_weights_run = np.column_stack([
+            _vector(e, "run", e["name"]) for e in expeditions
+        ])
+        self.exped_weights_sleep = np.column_stack([
+            _vector(e, "sleep", e["name"]) for e in expeditions
+        ])
+
+        # expeditions left running while not playing cost no sortie time
+        self.exped_weights_off = self.exped_weights_run.copy()
+        self.exped_weights_off[N_RESOURCES - 1] = 0
+
+        self.exped_weights_time = np.array([e["minutes"] for e in expeditions], dtype=float) / 60
+        self.short_bucket = np.array([bool(e.get("short_bucket", False)) for e in expeditions])
+
+        # fleet groups in order of first appearance; singletons need no row
+        groups = {}
+        for j, e in enumerate(expeditions):
+            groups.setdefault(e.get("group", e["name"]), []).append(j)
+        self.dupe_groups = [np.array(g) for g in groups.values() if len(g) > 1]
+
+        self.dupe_exped_constr = np.zeros((len(self.dupe_groups), len(expeditions)))
+        for r, g in enumerate(self.dupe_groups):
+            self.dupe_exped_constr[r, g] = 1
+
+        self.shopweights = np.column_stack([
+            _vector(s, "weights", s["name"]) for s in shop
+        ])
+        self.shopcosts = np.array([s["cost"] for s in shop], dtype=float)
+
+        # sleep_allowed(t) = time < t; one mask per distinct duration, and a
+        # last all-True mask for sleep windows longer than every expedition
+        self._durations = np.unique(self.exped_weights_time)
+        self._sleep_masks = np.vstack([
+            self.exped_weights_time < d for d in self._durations
+        ] + [np.ones(len(expeditions), dtype=bool)])
+
+        for array in (
+            self.exped_weights_run, self.exped_weights_off, self.exped_weights_sleep,
+            self.exped_weights_time, self.short_bucket, self.dupe_exped_constr,
+            self.shopweights, self.shopcosts, self._sleep_masks,
+        ):
+            array.setflags(write=False)
+
+    @property
+    def n_expeditions(self):
+        return self.exped_weights_run.shape[1]
+
+    @property
+    def n_shop(self):
+        return self.shopweights.shape[1]
+
+    def sleep_allowed(self, sleeptime):
+        """
+        Expeditions short enough to run during a sleep window of sleeptime hours
+        """
+        return self._sleep_masks[np.searchsorted(self._durations, sleeptime, side="left")]
+
+    def matrices(self):
+        """
+        Keyword arguments of lp.build_senka_lp
+        """
+        return {
+            "exped_weights_run": self.exped_weights_run,
+            "exped_weights_off": self.exped_weights_off,
+            "exped_weights_sleep": self.exped_weights_sleep,
+            "dupe_exped_constr": self.dupe_exped_constr,
+            "shopweights": self.shopweights,
+            "shopcosts": self.shopcosts,
+        }
+
+
+def load_catalog(path=None):
+    """
+    Load and cache a catalog (default: catalog.json next to this module)
+    """
+    path = os.path.abspath(path or _default_path())
+    if path not in _catalogs:
+        with open(path, "r", encoding="utf-8") as f:
+            _catalogs[path] = Catalog(json.load(f))
+    return _catalogs[path]
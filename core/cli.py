@@ -0,0 +1,400 @@
+"""
+Headless command line entry point (no tkinter).
+
+    python -m cli sortiedata.xlsx --max-money 3000 -o result.json
+    python -m cli sortiedata.xlsx --scenario a.json b.json -o results.csv
+    python -m cli --scenario a.json --params base.json --backend cbc
+
+Parameters are merged in this order, later wins:
+    GUI defaults < --params file < flags < scenario file
+A scenario file is a JSON object with any of the parameter keys plus the
+optional keys "name", "sorties", "enable_short_bucket", "backend",
+"presolve", "integer", "time_limit", "mip_gap", "iteration_limit", "daily",
+"schedule", "robust", "noise", "samples", "sample_file" and "seed".
+
+Results are cached on disk (cache.py) keyed by the inputs, so repeated
+runs of the same scenario return at once; --no-cache bypasses the cache
+and --clear-cache empties it.
+
+--daily solves the per-day model (daily.py) and adds the end-of-day
+resource stocks to each record. "schedule" (or --schedule FILE) gives
+per-day hours, e.g. {"activetime": [12, 12, 4, ...]}, and implies --daily.
+
+--robust LEVEL solves the sampled model (robust.py): sortie costs vary by
+--noise (relative standard deviation, one value or six per resource) or
+come from --sample-file (.npy of shape (K, n_sorties, 6)), and every
+resource must hold up in the worst (1 - LEVEL) share of the samples on
+average. The record gains "robust": how often the plan's resources hold
+on fresh samples, next to the ordinary plan.
+"""
+import argparse
+import contextlib
+import csv
+import json
+import os
+import sys
+
+import numpy as np
+
+from cache import default_cache, result_key
+from catalog import load_catalog
+from daily import DailySenkaModel
+from loader import load_sorties
+from model import (
+    DECISION_BLOCKS, MIP_GAP, MIP_TIME_LIMIT, PARAM_DEFAULTS, PARAM_KEYS, SHADOW_KEYS,
+    SenkaModel, parse_params
+)
+from result import BREAKDOWN_FIELDS
+from robust import ROBUST_NOISE, ROBUST_SAMPLES, RobustSenkaModel
+from solvers import BACKENDS, get_backend
+
+
+RESOURCE_KEYS = ("fuel", "ammo", "steel", "bucket", "cond")
+SCENARIO_OPTIONS = (
+    "sorties", "enable_short_bucket", "backend", "presolve",
+    "integer", "time_limit", "mip_gap", "iteration_limit", "daily", "schedule",
+    "robust", "noise", "samples", "sample_file", "seed",
+)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m cli",
+        description="月間戦果最適化 (headless)"
+    )
+    parser.add_argument("sorties", nargs="?", help="出撃データ (xlsx / xls / csv / parquet / json)")
+    parser.add_argument("--params", help="パラメータのJSONファイル")
+    parser.add_argument("--scenario", nargs="+", default=[], metavar="FILE",
+                        help="シナリオJSONファイル (複数可)")
+
+    for key in PARAM_KEYS:
+        parser.add_argument("--" + key.replace("_", "-"), dest=key, default=None,
+                            help=f"(default: {PARAM_DEFAULTS[key]})")
+
+    parser.add_argument("--no-short-bucket", dest="enable_short_bucket", action="store_false",
+                        help="「遠征時間」中の短時間遠征を禁止")
+    parser.add_argument("--backend", choices=["auto"] + list(BACKENDS), default=None)
+    parser.add_argument("--no-presolve", dest="presolve", action="store_false",
+                        help="劣位・重複した出撃と遠征を除外しない")
+    parser.add_argument("--integer", action="store_true",
+                        help="出撃数・購入数・睡眠中遠征を整数にする (MIP)")
+    parser.add_argument("--time-limit", dest="time_limit", type=float, default=None,
+                        help=f"制限時間 [秒]，LP と整数解の合計 (default: 整数解では {MIP_TIME_LIMIT}，LP は無制限)")
+    parser.add_argument("--mip-gap", dest="mip_gap", type=float, default=MIP_GAP,
+                        help=f"整数解の相対ギャップ (default: {MIP_GAP})")
+    parser.add_argument("--iteration-limit", dest="iteration_limit", type=int, default=None,
+                        help="LP のシンプレックス反復回数の上限")
+    parser.add_argument("--daily", action="store_true",
+                        help="日別モデルで計算し，毎日の資源の推移も出力")
+    parser.add_argument("--schedule", metavar="FILE",
+                        help="日別の稼働時間・遠征時間・休息時間のJSONファイル (--daily を含む)")
+    parser.add_argument("--robust", type=float, default=None, metavar="LEVEL",
+                        help="出撃の消費のばらつきを考慮し，資源が足りる確率の目安を LEVEL (0～1) にする")
+    parser.add_argument("--noise", type=float, nargs="+", default=[ROBUST_NOISE],
+                        help=f"--robust: 消費の相対標準偏差 (1つか資源ごとに6つ, default: {ROBUST_NOISE})")
+    parser.add_argument("--samples", type=int, default=ROBUST_SAMPLES,
+                        help=f"--robust: モデルに入れるサンプル数 (default: {ROBUST_SAMPLES})")
+    parser.add_argument("--sample-file", dest="sample_file", metavar="FILE",
+                        help="--robust: 実測した消費のサンプル (.npy, 形状 (K, 出撃数, 6))")
+    parser.add_argument("--seed", type=int, default=0, help="--robust: 乱数シード")
+    parser.add_argument("--sensitivity", action="store_true", help="潜在価格と被約費用も出力")
+    parser.add_argument("--stats", action="store_true", help="処理時間・モデル規模・ソルバー統計も出力")
+    parser.add_argument("-o", "--output", help="出力先 (.json / .csv)，省略時は標準出力")
+    parser.add_argument("--format", choices=["json", "csv"], default=None,
+                        help="出力形式 (省略時は出力先の拡張子から判断)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="ソルバーのログを出さない")
+    parser.add_argument("--no-cache", dest="use_cache", action="store_false",
+                        help="計算結果のキャッシュを使わない")
+    parser.add_argument("--clear-cache", action="store_true",
+                        help="計算結果のキャッシュを削除してから実行")
+    return parser
+
+
+def _load_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError(f"{path}: JSONオブジェクトが必要です")
+    return data
+
+
+def build_scenarios(args):
+    """
+    Expand the command line into a list of scenario dicts
+    """
+    base = {}
+    if args.params:
+        base.update(_load_json(args.params))
+    base.update({k: getattr(args, k) for k in PARAM_KEYS if getattr(args, k) is not None})
+
+    common = {
+        "sorties": args.sorties,
+        "enable_short_bucket": args.enable_short_bucket,
+        "backend": args.backend,
+        "presolve": args.presolve,
+        "integer": args.integer,
+        "time_limit": args.time_limit,
+        "mip_gap": args.mip_gap,
+        "iteration_limit": args.iteration_limit,
+        "daily": args.daily,
+        "schedule": _load_json(args.schedule) if args.schedule else None,
+        "robust": args.robust,
+        "noise": args.noise[0] if len(args.noise) == 1 else args.noise,
+        "samples": args.samples,
+        "sample_file": args.sample_file,
+        "seed": args.seed,
+    }
+
+    if not args.scenario:
+        return [{"name": "default", **common, "params": base}]
+
+    scenarios = []
+    for path in args.scenario:
+        data = _load_json(path)
+        name = data.pop("name", os.path.splitext(os.path.basename(path))[0])
+        options = {k: data.pop(k) for k in SCENARIO_OPTIONS if k in data}
+        scenario = {"name": name, **common, **options, "params": {**base, **data}}
+
+        # sortie and sample paths inside a scenario file are relative to that file
+        for key in ("sorties", "sample_file"):
+            if options.get(key) and not os.path.isabs(options[key]):
+                scenario[key] = os.path.join(os.path.dirname(os.path.abspath(path)), options[key])
+
+        scenarios.append(scenario)
+    return scenarios
+
+
+def _option(scenario, key, convert, default=None):
+    """
+    scenario[key] through convert; default when it is missing or null
+    """
+    value = scenario.get(key)
+    if value is None:
+        return default
+    try:
+        return convert(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{key} の値が正しくありません: {value!r}")
+
+
+def _as_list(values):
+    return np.asarray(values, dtype=float).tolist()
+
+
+def solve_scenario(scenario, sensitivity=False, loaded=None, stats=False, cache=None):
+    """
+    Solve one scenario and return a JSON-ready record. With a ResultCache
+    an identical earlier solve is returned without building the model.
+    """
+    record = {"scenario": scenario["name"], "sorties_file": scenario["sorties"]}
+
+    try:
+        if not scenario["sorties"]:
+            raise ValueError("出撃データが指定されていません")
+
+        if loaded is not None and scenario["sorties"] in loaded:
+            names, weights, senka, maxproportion = loaded[scenario["sorties"]]
+        else:
+            names, weights, senka, maxproportion = load_sorties(scenario["sorties"])
+            if loaded is not None:
+                loaded[scenario["sorties"]] = (names, weights, senka, maxproportion)
+
+        params = parse_params(scenario["params"])
+        record["params"] = params
+        record["enable_short_bucket"] = bool(scenario["enable_short_bucket"])
+
+        backend = get_backend(scenario["backend"])
+        record["backend"] = backend.name
+
+        integer = bool(scenario.get("integer", False))
+        daily = bool(scenario.get("daily", False) or scenario.get("schedule"))
+        if daily and (sensitivity or integer):
+            raise ValueError("日別モデルでは --sensitivity と --integer は使えません")
+
+        robust = None
+        if scenario.get("robust") is not None:
+            if daily or sensitivity:
+                raise ValueError("--robust は --daily と --sensitivity と同時には使えません")
+            robust = {"level": _option(scenario, "robust", float), "seed": _option(scenario, "seed", int, 0)}
+            if scenario.get("sample_file"):
+                robust["samples"] = np.load(scenario["sample_file"], allow_pickle=False)
+            else:
+                robust["noise"] = scenario.get("noise", ROBUST_NOISE)
+                robust["n_samples"] = _option(scenario, "samples", int, ROBUST_SAMPLES)
+
+        solve_options = {
+            "sensitivity": sensitivity,
+            "integer": integer,
+            # null is the default: no limit for an LP, MIP_TIME_LIMIT in integer mode
+            "time_limit": _option(scenario, "time_limit", float),
+            "mip_gap": _option(scenario, "mip_gap", float, MIP_GAP),
+            "iteration_limit": _option(scenario, "iteration_limit", int),
+        }
+        model_options = {
+            "enable_short_bucket": scenario["enable_short_bucket"],
+            "backend": backend,
+            "presolve": scenario.get("presolve", True),
+        }
+
+        def solve():
+            if robust is not None:
+                model = RobustSenkaModel(weights, senka, maxproportion, **robust, **model_options, **params)
+                return model.solve(
+                    integer=integer, time_limit=solve_options["time_limit"], mip_gap=solve_options["mip_gap"],
+                    iteration_limit=solve_options["iteration_limit"]
+                )
+            if daily:
+                model = DailySenkaModel(
+                    weights, senka, maxproportion,
+                    schedule=scenario.get("schedule"), **model_options, **params
+                )
+                return model.solve(
+                    time_limit=solve_options["time_limit"], iteration_limit=solve_options["iteration_limit"]
+                )
+            model = SenkaModel(weights, senka, maxproportion, **model_options, **params)
+            return model.solve(**solve_options)
+
+        if cache is None:
+            result = solve()
+        else:
+            key = result_key(
+                weights, senka, maxproportion, scenario["enable_short_bucket"], params,
+                catalog=load_catalog(), backend=backend,
+                presolve=model_options["presolve"], daily=daily,
+                schedule=scenario.get("schedule") if daily else None, robust=robust, **solve_options
+            )
+            result = cache.get_or_solve(key, solve)
+    except (ValueError, RuntimeError, OSError) as e:
+        record["status"] = "error"
+        record["error"] = str(e)
+        return record
+
+    # "Feasible": stopped at a limit with a solution, "stopped" says which
+    record["status"] = result.stats["status"]
+    if result.stats.get("stopped"):
+        record["stopped"] = result.stats["stopped"]
+    record["senka"] = result.senka
+    if integer:
+        record["lp_bound"] = result.lp_bound
+    record["sortie"] = dict(zip(names, result.sortie.tolist()))
+    for block in DECISION_BLOCKS[1:]:
+        record[block] = getattr(result, block).tolist()
+    for key in BREAKDOWN_FIELDS:
+        record[key] = dict(zip(RESOURCE_KEYS, getattr(result, key).tolist()))
+
+    if result.trajectory is not None:
+        record["daily_senka"] = result.trajectory["senka"].tolist()
+        # stock at the end of each day, the starting stock first
+        record["stock"] = dict(zip(RESOURCE_KEYS, result.trajectory["stock"].T.tolist()))
+
+    if robust is not None:
+        report = result.stats["robust"]
+        evaluation = report["evaluation"]
+        record["robust"] = {
+            "level": report["level"],
+            "samples": report["samples"],
+            "resources": report["resources"],
+            "holds": evaluation["holds"],
+            "holds_by_resource": evaluation["holds_by_resource"],
+            "expected_shortfall": evaluation["expected_shortfall"],
+        }
+        if "nominal" in report:
+            record["robust"]["nominal_senka"] = report["nominal"]["senka"]
+            record["robust"]["nominal_holds"] = report["nominal"]["evaluation"]["holds"]
+
+    if stats:
+        record["stats"] = result.stats
+
+    # a relaxation stopped at a limit has no sensitivity
+    if sensitivity and result.sensitivity is not None:
+        report = result.sensitivity
+        record["shadow_prices"] = dict(zip(SHADOW_KEYS, _as_list(report["shadow_prices"])))
+        record["reduced_costs"] = {
+            block: _as_list(values) for block, values in report["reduced_costs"].items()
+        }
+        record["reduced_costs"]["sortie"] = dict(zip(names, record["reduced_costs"]["sortie"]))
+
+    return record
+
+
+def flatten_record(record):
+    """
+    One CSV row per scenario: nested dicts and lists become prefixed columns
+    """
+    row = {}
+    for key, value in record.items():
+        if isinstance(value, dict):
+            for sub, v in value.items():
+                if isinstance(v, (dict, list)):
+                    for i, x in (v.items() if isinstance(v, dict) else enumerate(v)):
+                        row[f"{key}_{sub}_{i}"] = x
+                else:
+                    row[f"{key}_{sub}"] = v
+        elif isinstance(value, list):
+            for i, v in enumerate(value):
+                row[f"{key}_{i}"] = v
+        else:
+            row[key] = value
+    return row
+
+
+def write_results(records, out, fmt):
+    if fmt == "csv":
+        rows = [flatten_record(r) for r in records]
+        fields = []
+        for row in rows:
+            fields.extend(k for k in row if k not in fields)
+        writer = csv.DictWriter(out, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
+    else:
+        json.dump(records, out, ensure_ascii=False, indent=2)
+        out.write("\n")
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    try:
+        scenarios = build_scenarios(args)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    cache = default_cache() if args.use_cache or args.clear_cache else None
+    if args.clear_cache:
+        cache.clear()
+        if not args.sorties and not args.scenario:
+            return 0
+        if not args.use_cache:
+            cache = None
+
+    fmt = args.format
+    if fmt is None:
+        fmt = "csv" if args.output and args.output.lower().endswith(".csv") else "json"
+
+    # solver logs go to stderr so stdout stays machine-readable
+    log_target = open(os.devnull, "w") if args.quiet else sys.stderr
+    loaded = {}
+    records = []
+    with contextlib.redirect_stdout(log_target):
+        for scenario in scenarios:
+            records.append(solve_scenario(scenario, args.sensitivity, loaded, args.stats, cache))
+    if args.quiet:
+        log_target.close()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8", newline="") as f:
+            write_results(records, f, fmt)
+    else:
+        write_results(records, sys.stdout, fmt)
+
+    for record in records:
+        if record["status"] == "error":
+            print(f"{record['scenario']}: {record['error']}", file=sys.stderr)
+
+    return 0 if all(r["status"] != "error" for r in records) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,271 @@
+import numpy as np
+
+from catalog import load_catalog
+from instrument import collect, phase
+from lp import STOCK_RESOURCES, build_daily_lp
+from model import (
+    DECISION_BLOCKS, OFFSET_KEYS, PARAM_KEYS, PARAM_LABELS,
+    prepare_sorties, presolve_expeditions, presolve_sorties, round_result, simplify
+)
+from params import solve_time_limit
+from result import SenkaResult
+from solvers import SolveStopped, get_backend
+
+
+# -----------------------------
+# Time-indexed (per-day) model
+# -----------------------------
+# SenkaModel treats the month as one period: slot hours are activetime * days
+# and the resource rows only bound the month's totals. Here every day has
+# its own activetime / inactivetime / sleeptime and the stocks of fuel, ammo,
+# steel, bucket and cond carry over from day to day, so a plan that runs dry
+# mid-month is infeasible and uneven schedules are modelled directly.
+
+SCHEDULE_KEYS = ("activetime", "inactivetime", "sleeptime")
+
+
+def parse_schedule(params, schedule=None):
+    """
+    Per-day hours as {key: array of length days} for SCHEDULE_KEYS.
+    schedule maps any of those keys to one value per day; the others
+    repeat the value from params.
+    """
+    schedule = schedule or {}
+    unknown = set(schedule) - set(SCHEDULE_KEYS)
+    if unknown:
+        raise ValueError(f"unknown schedule keys: {', '.join(sorted(unknown))}")
+
+    days = params["days"]
+    if days < 1:
+        raise ValueError("日別計算では日数は1以上でなければなりません．")
+
+    hours = {}
+    for key in SCHEDULE_KEYS:
+        label = PARAM_LABELS[key]
+        if key in schedule:
+            try:
+                values = np.asarray(schedule[key], dtype=float)
+            except (TypeError, ValueError):
+                raise ValueError(f"{label}の日別の値が正しくありません．数値を入力してください．")
+            if values.shape != (days,):
+                raise ValueError(f"{label}の日別の値は{days}日分必要です．")
+        else:
+            values = np.full(days, float(params[key]))
+
+        if (values < 0).any():
+            raise ValueError(f"{label} は0以上でなければなりません．")
+        hours[key] = values
+
+    over = np.flatnonzero(sum(hours.values()) > 24)
+    if over.size:
+        raise ValueError(f"{over[0] + 1}日目の稼働時間・遠征時間・休息時間の合計が24時間を超えています")
+
+    return hours
+
+
+def summarize_daily(x, lp, sortie_weights, senka, catalog, *, days, offsets, special, presolve=None):
+    """
+    SenkaResult of a daily solve. The decision arrays are period totals
+    (exped_sleep is the mean over the nights, as in the aggregate model);
+    trajectory holds "stock" (days + 1, 5) with the starting stock first,
+    per-day "senka" and one (days, n) array per decision block.
+    """
+    x = simplify(x)
+    per_day = {block: x[lp.columns[block]].reshape(days, -1) for block in DECISION_BLOCKS}
+    if presolve is not None:
+        per_day["sortie"] = simplify(presolve.expand(per_day["sortie"]))
+
+    stock = np.vstack([offsets[:STOCK_RESOURCES], x[lp.columns["stock"]].reshape(days, -1)])
+    daily_senka = per_day["sortie"] @ senka
+    final_senka = round_result(float(daily_senka.sum()) + special, 2)
+
+    totals = {block: values.sum(axis=0) for block, values in per_day.items()}
+    totals["exped_sleep"] = per_day["exped_sleep"].mean(axis=0)
+
+    spent_from_sorties = -sortie_weights[:, :5].T @ totals["sortie"]
+    earned_from_expeds = (
+        catalog.exped_weights_run[:5] @ totals["exped_run"] +
+        catalog.exped_weights_off[:5] @ totals["exped_off"] +
+        days * (catalog.exped_weights_sleep[:5] @ totals["exped_sleep"])
+    )
+    bought_from_shop = catalog.shopweights[:5] @ totals["shop"]
+    remaining = offsets[:5] - spent_from_sorties + earned_from_expeds + bought_from_shop
+
+    trajectory = {
+        "stock": round_result(stock, 2),
+        "senka": round_result(daily_senka, 2),
+        **{block: round_result(values, 2) for block, values in per_day.items()},
+    }
+
+    return SenkaResult(
+        final_senka,
+        *(round_result(totals[block], 2) for block in DECISION_BLOCKS),
+        np.round(spent_from_sorties, 2),
+        np.round(earned_from_expeds, 2),
+        np.round(bought_from_shop, 2),
+        np.round(remaining, 2),
+        trajectory=trajectory
+    )
+
+
+class DailySenkaModel:
+    """
+    Time-indexed senka LP: days x (sorties + expeditions + shop) columns
+    plus one stock column per resource and day, built as sparse
+    block-diagonal matrices.
+
+        model = DailySenkaModel(w, s, m, schedule={"activetime": [...]}, **params)
+        result = model.solve()
+        result.trajectory["stock"]    # (days + 1, 5): fuel ammo steel bucket cond
+
+    params are the solve_senka parameters; schedule overrides activetime,
+    inactivetime and sleeptime per day (see parse_schedule). The initial*
+    offsets are the stock before the first day. With uniform days the
+    optimum equals SenkaModel's whenever the offsets are non-negative.
+    """
+
+    def __init__(
+        self,
+        sortie_weights,
+        senka,
+        maxproportion,
+        enable_short_bucket=True,
+        *,
+        backend=None,
+        catalog=None,
+        presolve=True,
+        schedule=None,
+        **params
+    ):
+        missing = set(PARAM_KEYS) - set(params)
+        if missing:
+            raise TypeError(f"missing parameters: {', '.join(sorted(missing))}")
+
+        self.sortie_weights, self.senka, self.maxproportion = prepare_sorties(
+            sortie_weights, senka, maxproportion
+        )
+        self.enable_short_bucket = enable_short_bucket
+        self.catalog = load_catalog() if catalog is None else catalog
+        self.params = {k: params[k] for k in PARAM_KEYS}
+        self.schedule = parse_schedule(self.params, schedule)
+        self.offsets = np.array([self.params[k] for k in OFFSET_KEYS], dtype=float)
+        self.backend = get_backend(backend)
+
+        self._timings = {}
+        self.stats = None
+
+        with collect(self._timings):
+            with phase("presolve"):
+                self.presolve = None
+                sortie_weights, senka, maxproportion = self.sortie_weights, self.senka, self.maxproportion
+                if presolve:
+                    self.presolve = presolve_sorties(sortie_weights, senka, maxproportion)
+                    keep = self.presolve.keep
+                    sortie_weights, senka = sortie_weights[keep], senka[keep]
+                    maxproportion = self.presolve.maxproportion
+                pruned = self._prune_expeditions()
+
+            with phase("build"):
+                self.lp = build_daily_lp(
+                    sortie_weights,
+                    senka,
+                    maxproportion,
+                    self.enable_short_bucket,
+                    runtime=self.schedule["activetime"],
+                    offtime=self.schedule["inactivetime"],
+                    max_money=self.params["max_money"],
+                    offsets=self.offsets,
+                    sleep_allowed=self.catalog.sleep_allowed(self.schedule["sleeptime"]),
+                    short_bucket=self.catalog.short_bucket,
+                    pruned=pruned,
+                    **self.catalog.matrices()
+                )
+
+    @property
+    def days(self):
+        return self.params["days"]
+
+    def _prune_expeditions(self):
+        """
+        presolve_expeditions once per distinct sleeptime; the sleep mask
+        becomes (days, n_exped), run / off masks do not depend on the day
+        """
+        self._pruned_expeditions = []
+        if self.presolve is None:
+            return None
+
+        sleeptime = self.schedule["sleeptime"]
+        sleep_mask = np.zeros((self.days, self.catalog.n_expeditions), dtype=bool)
+        seen = set()
+        pruned = None
+        for t in np.unique(sleeptime):
+            pruned, removed = presolve_expeditions(self.catalog, self.enable_short_bucket, t)
+            sleep_mask[sleeptime == t] = pruned["exped_sleep"]
+            for entry in removed:
+                key = (entry["block"], entry["index"])
+                if key not in seen:
+                    seen.add(key)
+                    self._pruned_expeditions.append(entry)
+
+        pruned["exped_sleep"] = sleep_mask
+        return pruned
+
+    @property
+    def presolve_removed(self):
+        return ([] if self.presolve is None else self.presolve.removed) + self._pruned_expeditions
+
+    def _record_stats(self, solution):
+        self.stats = {
+            "timings": self._timings,
+            "rows": self.lp.n_rows,
+            "cols": self.lp.n_cols,
+            "nnz": int(self.lp.nnz),
+            "presolve": self.presolve_removed,
+            **solution.stats,
+        }
+        self._timings = {}
+
+    def solve(self, time_limit=None, iteration_limit=None, cancel=None):
+        """
+        Solve and return a SenkaResult with trajectory (see summarize_daily).
+        The limits and cancel act as in SenkaModel.solve: a stopped solve
+        returns its feasible point as "Feasible" or raises SolveStopped.
+        """
+        time_limit = solve_time_limit(time_limit, False)
+        with collect(self._timings):
+            with phase("solve"):
+                solution = self.backend.solve(
+                    self.lp, time_limit=time_limit, iteration_limit=iteration_limit, cancel=cancel
+                )
+
+            if solution.status not in ("Optimal", "Feasible"):
+                self._record_stats(solution)
+                if solution.stats.get("stopped"):
+                    raise SolveStopped(solution.stats["stopped"])
+                raise RuntimeError(f"設定された最適化問題に解が存在しません．ソルバーのステータス: {solution.status}")
+
+            if solution.log:
+                print(solution.log)
+
+            with phase("post"):
+                result = self.result(solution)
+
+        self._record_stats(solution)
+        result.stats = self.stats
+        return result
+
+    def result(self, solution):
+        result = summarize_daily(
+            solution.x,
+            self.lp,
+            self.sortie_weights,
+            self.senka,
+            self.catalog,
+            days=self.days,
+            offsets=self.offsets,
+            special=self.params["special"],
+            presolve=self.presolve
+        )
+        result.params = dict(self.params)
+        result.params["schedule"] = {key: values.tolist() for key, values in self.schedule.items()}
+        return result
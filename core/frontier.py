@@ -0,0 +1,220 @@
+import numpy as np
+
+from instrument import collect, phase
+from model import OFFSET_KEYS
+from solvers import SolveStopped
+
+
+# -----------------------------
+# Parametric frontier
+# -----------------------------
+# max_money, the play hours and the offsets only move bounds, and they move
+# them linearly, so the optimal senka is a concave piecewise-linear function
+# of any one of them. The frontier is traced with the sandwich method: the
+# duals of a solve give the slope at that point, the tangents at the two
+# ends of an interval meet at the only place a breakpoint can be, and one
+# solve there either lands on both tangents (a breakpoint, interval done)
+# or splits the interval. Every breakpoint costs about two solves.
+
+FRONTIER_KEYS = ("max_money", "activetime", "inactivetime") + OFFSET_KEYS
+HOUR_KEYS = ("activetime", "inactivetime", "sleeptime")
+
+# open-ended parameters double their upper end until the slope is 0
+FRONTIER_START = {"max_money": 10000}
+FRONTIER_LIMIT = 1e7
+FRONTIER_MAX_SOLVES = 400
+
+# slopes and values closer than this (relative) are treated as equal
+FRONTIER_TOL = 1e-7
+
+
+def parametric_direction(model, key, lo, hi):
+    """
+    Change of every finite bound per unit of key, from the bounds at lo and hi
+    """
+    start = model.bounds(**{key: lo})
+    end = model.bounds(**{key: hi})
+    return tuple(
+        np.subtract(b, a, out=np.zeros_like(a), where=np.isfinite(a) & np.isfinite(b)) / (hi - lo)
+        for a, b in zip(start, end)
+    )
+
+
+def parametric_slope(solution, direction):
+    """
+    d objective / d parameter at an optimal solution: each dual prices the
+    bound it is active at (upper when positive, lower when negative)
+    """
+    d_row_lower, d_row_upper, d_col_lower, d_col_upper = direction
+    y, d = solution.row_dual, solution.col_dual
+    return float(
+        np.where(y > 0, d_row_upper, d_row_lower) @ y +
+        np.where(d > 0, d_col_upper, d_col_lower) @ d
+    )
+
+
+class Frontier:
+    """
+    Optimal senka as a function of one parameter.
+
+    points are the breakpoints (both range ends included) in increasing
+    order, senka the optimal senka there (special senka included) and
+    slopes[k] the senka per unit on the segment points[k]..points[k + 1].
+    results[k] is the SenkaResult at points[k]; on a segment the optimal
+    plan is the linear interpolation of the results at its two ends.
+    solves counts the LP solves used and timings their phase timings.
+    """
+
+    def __init__(self, key, points, senka, results, solves, timings=None):
+        self.key = key
+        self.points = np.asarray(points, dtype=float)
+        self.senka = np.asarray(senka, dtype=float)
+        self.slopes = np.diff(self.senka) / np.diff(self.points)
+        self.results = results
+        self.solves = solves
+        self.timings = timings or {}
+
+    def __repr__(self):
+        return (
+            f"Frontier({self.key}, {self.points.size} breakpoints in "
+            f"[{self.points[0]:g}, {self.points[-1]:g}], {self.solves} solves)"
+        )
+
+    def value(self, theta):
+        """
+        Optimal senka at any point(s) of the range
+        """
+        return np.interp(theta, self.points, self.senka)
+
+    def table(self, sortie_names=None, shop_names=None):
+        """
+        One row per breakpoint: the parameter, senka, the slope of the
+        segment to its right and the decisions at the breakpoint
+        """
+        import pandas as pd
+
+        rows = []
+        for k, result in enumerate(self.results):
+            row = {
+                self.key: self.points[k],
+                "senka": round(float(self.senka[k]), 2),
+                "slope": float(self.slopes[k]) if k < self.slopes.size else np.nan,
+            }
+            labels = {
+                "sortie": sortie_names or range(result.sortie.size),
+                "shop": shop_names or range(result.shop.size),
+            }
+            for block, names in labels.items():
+                for name, v in zip(names, getattr(result, block)):
+                    row[f"{block}_{name}"] = v
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+
+def _default_range(model, key):
+    params = model.params
+    if key in HOUR_KEYS:
+        others = sum(params[k] for k in HOUR_KEYS if k != key)
+        return 0.0, max(24.0 - others, 0.0)
+    return 0.0, None
+
+
+def senka_frontier(model, key, lo=None, hi=None, *, tol=FRONTIER_TOL, max_solves=FRONTIER_MAX_SOLVES,
+                   cancel=None):
+    """
+    Exact breakpoints of the optimal senka over key in [lo, hi] on a
+    SenkaModel; the model's own value of key is restored afterwards.
+
+    key is one of FRONTIER_KEYS. The hour keys default to 0 .. whatever
+    the other hours leave of the day; max_money and the offsets default to
+    0 .. the point where one more unit no longer adds senka.
+
+        frontier = senka_frontier(model, "max_money")
+        frontier.points, frontier.senka, frontier.slopes
+
+    cancel (a threading.Event) raises SolveStopped at the next solve.
+    """
+    if key not in FRONTIER_KEYS:
+        raise ValueError(f"unknown frontier parameter: {key} (choose from {', '.join(FRONTIER_KEYS)})")
+
+    default_lo, default_hi = _default_range(model, key)
+    lo = default_lo if lo is None else float(lo)
+    auto_hi = hi is None and default_hi is None
+    if hi is None:
+        hi = default_hi if default_hi is not None else max(FRONTIER_START.get(key, 1000), 2 * lo)
+    hi = float(hi)
+    if not hi > lo:
+        raise ValueError(f"{key}: 範囲が正しくありません ({lo} - {hi})")
+
+    original = model.params[key]
+    special = model.params["special"]
+    evaluated = {}
+    timings = {}
+
+    def evaluate(theta):
+        if len(evaluated) >= max_solves:
+            raise RuntimeError(f"解の数が上限 ({max_solves}) に達しました")
+        model.update(**{key: theta})
+        with phase("solve"):
+            solution = model.solve_lp(cancel=cancel)
+        if solution.stats.get("stopped"):
+            raise SolveStopped(solution.stats["stopped"])
+        if solution.status != "Optimal":
+            raise RuntimeError(
+                f"{key} = {theta:g} で解が存在しません．ソルバーのステータス: {solution.status}"
+            )
+        point = (theta, solution.objective, parametric_slope(solution, direction), model.result(solution))
+        evaluated[theta] = point
+        return point
+
+    try:
+        with collect(timings), phase("frontier"):
+            direction = parametric_direction(model, key, lo, hi)
+            a = evaluate(lo)
+            b = evaluate(hi)
+            while auto_hi and b[2] > tol * max(1.0, abs(b[1])) and hi < FRONTIER_LIMIT:
+                hi *= 2
+                b = evaluate(hi)
+
+            stack = [(a, b)]
+            while stack:
+                a, b = stack.pop()
+                theta_a, z_a, s_a, _ = a
+                theta_b, z_b, s_b, _ = b
+                scale = tol * max(1.0, abs(z_a), abs(z_b))
+
+                # equal slopes: both ends lie on one supporting line
+                if (s_a - s_b) * (theta_b - theta_a) <= scale:
+                    continue
+
+                theta = (z_b - z_a + s_a * theta_a - s_b * theta_b) / (s_a - s_b)
+                if not theta_a + tol * (theta_b - theta_a) < theta < theta_b - tol * (theta_b - theta_a):
+                    continue
+
+                c = evaluate(theta)
+                if c[1] >= z_a + s_a * (theta - theta_a) - scale:
+                    continue    # the breakpoint sits exactly at theta
+                stack.extend([(a, c), (c, b)])
+    finally:
+        model.update(**{key: original})
+
+    # keep only the points where the slope actually changes
+    thetas = sorted(evaluated)
+    keep = [thetas[0]]
+    for k in range(1, len(thetas) - 1):
+        t0, t1, t2 = keep[-1], thetas[k], thetas[k + 1]
+        z0, z1, z2 = (evaluated[t][1] for t in (t0, t1, t2))
+        left = (z1 - z0) / (t1 - t0)
+        right = (z2 - z1) / (t2 - t1)
+        if abs(left - right) * (t2 - t0) > tol * max(1.0, abs(z1)):
+            keep.append(t1)
+    keep.append(thetas[-1])
+
+    return Frontier(
+        key,
+        keep,
+        [evaluated[t][1] + special for t in keep],
+        [evaluated[t][3] for t in keep],
+        len(evaluated),
+        timings
+    )
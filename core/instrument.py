@@ -0,0 +1,84 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+# -----------------------------
+# Phase timing
+# -----------------------------
+# Code paths wrap their steps in `with phase("name"):`. Nested phases are
+# named "outer.inner". Timings are recorded into whatever dict is active
+# through `collect`, and every start/end is broadcast to phase listeners,
+# so external profilers can subscribe without touching the solve code.
+
+_listeners = []
+_local = threading.local()
+
+
+def add_phase_listener(callback):
+    """
+    Subscribe callback(event) to phase events. event is a dict with
+    "phase", "event" ("start" / "end"), "time" (perf_counter) and, on
+    "end", "elapsed" in seconds.
+    """
+    if callback not in _listeners:
+        _listeners.append(callback)
+
+
+def remove_phase_listener(callback):
+    if callback in _listeners:
+        _listeners.remove(callback)
+
+
+def _emit(event):
+    for callback in list(_listeners):
+        callback(event)
+
+
+def _stack():
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+        _local.records = []
+    return _local.stack
+
+
+@contextmanager
+def phase(name):
+    stack = _stack()
+    full_name = ".".join(stack + [name])
+    stack.append(name)
+
+    t0 = time.perf_counter()
+    if _listeners:
+        _emit({"phase": full_name, "event": "start", "time": t0})
+
+    try:
+        yield
+    finally:
+        t1 = time.perf_counter()
+        elapsed = t1 - t0
+        stack.pop()
+
+        for timings in _local.records:
+            timings[full_name] = timings.get(full_name, 0.0) + elapsed
+
+        if _listeners:
+            _emit({"phase": full_name, "event": "end", "time": t1, "elapsed": elapsed})
+
+
+@contextmanager
+def collect(timings):
+    """
+    Record the wall-clock time of every phase run inside the block into
+    the timings dict (seconds, accumulated per phase name)
+    """
+    _stack()
+    _local.records.append(timings)
+    try:
+        yield timings
+    finally:
+        _local.records.pop()
+
+
+def format_timings(timings):
+    return ", ".join(f"{name} {seconds * 1e3:.2f} ms" for name, seconds in timings.items())
@@ -0,0 +1,297 @@
+import hashlib
+import os
+import sys
+
+import numpy as np
+
+from instrument import phase
+
+
+# -----------------------------
+# Sortie data loading
+# -----------------------------
+# Sheet formats (.xlsx / .xls / .csv) use the template layout: column A holds
+# the row labels, every following column is one sortie with 9 rows
+#   name, fuel, ammo, steel, bucket, cond, seconds, senka, maxproportion
+# Table formats (.parquet / .json) hold one sortie per row with the columns
+# in SORTIE_FIELDS. pandas is only imported by the formats that need it.
+
+SORTIE_FIELDS = (
+    "name", "fuel", "ammo", "steel", "bucket", "cond", "seconds", "senka", "maxproportion"
+)
+
+SHEET_EXTENSIONS = (".xlsx", ".xls", ".csv")
+# read with the streaming reader instead of pandas
+STREAM_EXTENSIONS = (".xlsx",)
+TABLE_EXTENSIONS = (".parquet", ".json")
+SUPPORTED_EXTENSIONS = SHEET_EXTENSIONS + TABLE_EXTENSIONS
+
+# bump when the cached array layout changes
+CACHE_VERSION = 1
+CACHE_ENV = "SENKA_CACHE_DIR"
+# parsed sortie files kept; the least recently loaded go first
+SORTIE_CACHE_FILES = 32
+
+
+def cache_dir(*parts):
+    """
+    Per-user cache directory, overridable with SENKA_CACHE_DIR
+    """
+    root = os.environ.get(CACHE_ENV)
+    if not root:
+        if sys.platform == "win32":
+            base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+        else:
+            base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        root = os.path.join(base, "senka-optimizer")
+
+    path = os.path.join(root, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _read_raw(path):
+    """
+    Read a file into a (9+, n_sorties) block of raw cells plus the labels
+    used in error messages
+    """
+    import pandas as pd
+
+    ext = os.path.splitext(path)[1].lower()
+
+    if ext in (".xlsx", ".xls"):
+        df = pd.read_excel(path, header=None)
+    elif ext == ".csv":
+        df = pd.read_csv(path, header=None)
+    elif ext == ".parquet":
+        try:
+            df = pd.read_parquet(path)
+        except ImportError:
+            raise ValueError("Parquetの読み込みには pyarrow が必要です．")
+    elif ext == ".json":
+        # the default parser may be off in the last digit
+        df = pd.read_json(path, orient="records", precise_float=True)
+    else:
+        raise ValueError(
+            f"対応していないファイル形式です: {ext} ({' / '.join(SUPPORTED_EXTENSIONS)})"
+        )
+
+    if ext in SHEET_EXTENSIONS:
+        if df.shape[0] < 9 or df.shape[1] < 2:
+            raise ValueError("データの形式が正しくありません．少なくとも9行2列以上のデータが必要です．")
+
+        block = df.iloc[0:9, 1:]  # start from column B
+        labels = [f"列 {col + 1}" for col in range(1, df.shape[1])]
+        return block.reset_index(drop=True), labels
+
+    missing = [f for f in SORTIE_FIELDS if f not in df.columns]
+    if missing:
+        raise ValueError(f"データの形式が正しくありません．列 {', '.join(missing)} がありません．")
+    if df.shape[0] < 1:
+        raise ValueError("データの形式が正しくありません．出撃が1つ以上必要です．")
+
+    block = df.loc[:, list(SORTIE_FIELDS)].T.reset_index(drop=True)
+    labels = [f"出撃 {i + 1}" for i in range(df.shape[0])]
+    return block, labels
+
+
+def read_sortie_sheet(path):
+    """
+    Stream the 9-row template block of the first sheet of an .xlsx with
+    openpyxl's read-only mode. Rows below the block are never parsed, the
+    cells go straight into preallocated arrays and trailing columns that
+    are empty within the block (notes further down) are dropped, so peak
+    memory only depends on the block itself.
+
+    Returns the same as parse_sortie_block.
+    """
+    import openpyxl
+
+    with phase("read"):
+        workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        try:
+            sheet = workbook.worksheets[0]
+            # the sheet's own dimension, when present, sizes the arrays up front
+            width = max((sheet.max_column or 1) - 1, 0)
+            names = np.empty(width, dtype=object)
+            numbers = np.full((8, width), np.nan)
+            present = np.zeros((9, width), dtype=bool)
+            non_numeric = np.zeros(width, dtype=bool)
+
+            n_rows = 0
+            for r, row in enumerate(sheet.iter_rows(min_row=1, max_row=9, values_only=True)):
+                n_rows += 1
+                if len(row) - 1 > width:
+                    # no (or a wrong) dimension: grow to the longest row
+                    grow = len(row) - 1 - width
+                    width += grow
+                    names = np.concatenate([names, np.empty(grow, dtype=object)])
+                    numbers = np.pad(numbers, ((0, 0), (0, grow)), constant_values=np.nan)
+                    present = np.pad(present, ((0, 0), (0, grow)))
+                    non_numeric = np.pad(non_numeric, (0, grow))
+
+                for c, value in enumerate(row[1:]):
+                    if value is None:
+                        continue
+                    present[r, c] = True
+                    if r == 0:
+                        names[c] = value
+                    elif isinstance(value, (int, float)):
+                        numbers[r - 1, c] = value
+                    else:
+                        try:
+                            numbers[r - 1, c] = float(value)
+                        except (TypeError, ValueError):
+                            non_numeric[c] = True
+        finally:
+            workbook.close()
+
+    with phase("parse"):
+        used = np.flatnonzero(present.any(axis=0))
+        width = used[-1] + 1 if used.size else 0
+        if n_rows < 9 or width < 1:
+            raise ValueError("データの形式が正しくありません．少なくとも9行2列以上のデータが必要です．")
+
+        incomplete = ~present[:, :width].all(axis=0)
+        labels = [f"列 {col + 1}" for col in range(1, width + 1)]
+        return _check_block(
+            names[:width], numbers[:, :width], incomplete,
+            ~incomplete & (non_numeric[:width] | np.isnan(numbers[:, :width]).any(axis=0)),
+            labels
+        )
+
+
+def parse_sortie_block(block, labels):
+    """
+    Validate a 9-row raw block in one vectorized pass. Every problem is
+    collected and reported together in a single ValueError.
+    """
+    import pandas as pd
+
+    block = block.iloc[0:9]
+
+    incomplete = block.isnull().any(axis=0).to_numpy()
+    names = block.iloc[0].to_numpy(dtype=object)
+
+    raw = block.iloc[1:9]
+    numbers = raw.apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+    non_numeric = ~incomplete & np.isnan(numbers).any(axis=0)
+
+    return _check_block(names, numbers, incomplete, non_numeric, labels)
+
+
+def _check_block(names, numbers, incomplete, non_numeric, labels):
+    """
+    Shared checks of both readers; numbers is the (8, n) float block of
+    rows 2-9 with NaN wherever a cell is missing or not a number
+    """
+    labels = np.asarray(labels, dtype=object)
+    bad_name = ~incomplete & ~np.array([isinstance(n, str) for n in names], dtype=bool)
+
+    maxproportion = numbers[7]
+    bad_proportion = ~incomplete & ~non_numeric & ((maxproportion < 0) | (maxproportion > 1))
+
+    errors = (
+        [f"{label} が完成されていません．最初の9行にすべて値が入っている必要があります．"
+         for label in labels[incomplete]] +
+        [f"{label} の出撃の名前が文字列ではありません．" for label in labels[bad_name]] +
+        [f"{label} に数値以外の値が入っています (行2～9)." for label in labels[non_numeric]] +
+        [f"{label} の最大割合は0～1の間でなければなりません．" for label in labels[bad_proportion]]
+    )
+    if errors:
+        raise ValueError("\n".join(errors))
+
+    sortie_names = [str(n) for n in names]
+    sortie_weights = np.ascontiguousarray(numbers[0:6].T)  # rows 2–7
+    senka = numbers[6].copy()                               # row 8
+    return sortie_names, sortie_weights, senka, maxproportion.copy()
+
+
+def _content_hash(path):
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _cache_file(path):
+    # one entry per source file: a new save overwrites the old parse
+    key = f"{os.path.abspath(path)}|{CACHE_VERSION}"
+    name = hashlib.sha1(key.encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir("sorties"), name + ".npz")
+
+
+def _evict_sortie_cache(max_files=SORTIE_CACHE_FILES):
+    """
+    Delete the least recently used parsed files beyond max_files
+    """
+    try:
+        entries = sorted(
+            (e.stat().st_mtime, e.path) for e in os.scandir(cache_dir("sorties"))
+            if e.name.endswith(".npz") and not e.name.endswith(".tmp.npz")
+        )
+    except OSError:
+        return
+    for _, path in entries[:max(len(entries) - max_files, 0)]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def load_sorties(path, use_cache=True):
+    """
+    Load sortie data from xlsx / xls / csv / parquet / json.
+
+    Returns (sortie_names, sortie_weights[n, 6], senka[n], maxproportion[n]).
+    Parsed arrays are cached on disk, one entry per path, and the entry is
+    only used if the file's content hash still matches.
+    """
+    cache_file = None
+    content_hash = None
+
+    if use_cache:
+        try:
+            cache_file = _cache_file(path)
+            content_hash = _content_hash(path)
+            if os.path.exists(cache_file):
+                with np.load(cache_file, allow_pickle=False) as cached:
+                    if str(cached["content_hash"]) == content_hash:
+                        # the mtime is the last use, for _evict_sortie_cache
+                        os.utime(cache_file)
+                        return (
+                            [str(n) for n in cached["sortie_names"]],
+                            cached["sortie_weights"],
+                            cached["senka"],
+                            cached["maxproportion"],
+                        )
+        except (OSError, KeyError, ValueError):
+            cache_file = None
+
+    if os.path.splitext(path)[1].lower() in STREAM_EXTENSIONS:
+        sortie_names, sortie_weights, senka, maxproportion = read_sortie_sheet(path)
+    else:
+        with phase("read"):
+            block, labels = _read_raw(path)
+        with phase("parse"):
+            sortie_names, sortie_weights, senka, maxproportion = parse_sortie_block(block, labels)
+
+    if cache_file is not None:
+        try:
+            tmp = cache_file + ".tmp.npz"
+            np.savez(
+                tmp,
+                sortie_names=np.array(sortie_names, dtype=str),
+                sortie_weights=sortie_weights,
+                senka=senka,
+                maxproportion=maxproportion,
+                content_hash=np.array(content_hash),
+            )
+            os.replace(tmp, cache_file)
+        except OSError:
+            pass
+        _evict_sortie_cache()
+
+    return sortie_names, sortie_weights, senka, maxproportion
+
@@ -0,0 +1,614 @@
+import numpy as np
+import scipy.sparse as sp
+
+
+# -----------------------------
+# Matrix form of the senka LP
+# -----------------------------
+#
+#   maximize    c @ x
+#   subject to  row_lower <= A @ x <= row_upper
+#               col_lower <=     x <= col_upper
+#
+# Column blocks (in order):
+#   sortie[n_sorties], exped_run[n_exped], exped_off[n_exped],
+#   exped_sleep[n_exped], shop[n_shop], total_sorties[1]
+#
+# Row blocks (in order):
+#   money, run_slots, off_slots, sleep_slots,
+#   dupe_sleep[g], dupe_run[g], dupe_off[g],
+#   resource[6], total_sorties, proportion[k]
+#
+# n_exped, n_shop and the g fleet groups come from the catalog (catalog.py).
+#
+# The daily model (build_daily_lp) repeats every block once per day and adds
+# stock[days, 5] columns: the first five resources carry over from one day
+# to the next, sortie time (the last resource) does not.
+#
+# The robust model (build_robust_lp) appends cvar_threshold[q] and
+# shortfall[q * K] columns and scenario[q * K] and cvar[q] rows for q
+# sampled resources and K samples.
+
+COLUMN_BLOCKS = ("sortie", "exped_run", "exped_off", "exped_sleep", "shop", "total_sorties")
+ROW_BLOCKS = (
+    "money", "run_slots", "off_slots", "sleep_slots",
+    "dupe_sleep", "dupe_run", "dupe_off",
+    "resource", "total_sorties", "proportion",
+)
+_SINGLE_ROWS = ("money", "run_slots", "off_slots", "sleep_slots", "total_sorties")
+
+# integer mode: whole sorties, whole shop purchases, one expedition per sleep slot
+INTEGER_BLOCKS = ("sortie", "shop", "exped_sleep")
+
+DAILY_COLUMN_BLOCKS = COLUMN_BLOCKS + ("stock",)
+DAILY_ROW_BLOCKS = (
+    "money", "run_slots", "off_slots", "sleep_slots",
+    "dupe_sleep", "dupe_run", "dupe_off",
+    "balance", "time", "total_sorties", "proportion",
+)
+STOCK_RESOURCES = 5
+
+
+class SenkaLP:
+    """
+    Sparse matrix form of the senka LP, shared by every solver backend
+    """
+
+    def __init__(self, c, A, row_lower, row_upper, col_lower, col_upper,
+                 columns, rows, col_names, row_names, proportion_index):
+        self.c = c
+        self.A = A
+        self.row_lower = row_lower
+        self.row_upper = row_upper
+        self.col_lower = col_lower
+        self.col_upper = col_upper
+        self.columns = columns
+        self.rows = rows
+        self.col_names = col_names
+        self.row_names = row_names
+        self.proportion_index = proportion_index
+
+    @property
+    def n_cols(self):
+        return self.A.shape[1]
+
+    @property
+    def n_rows(self):
+        return self.A.shape[0]
+
+    @property
+    def nnz(self):
+        return self.A.nnz
+
+
+def _block_slices(sizes, names):
+    slices = {}
+    start = 0
+    for name, size in zip(names, sizes):
+        slices[name] = slice(start, start + size)
+        start += size
+    return slices
+
+
+def senka_bounds(
+    rows,
+    columns,
+    shape,
+    enable_short_bucket,
+    *,
+    runtime,
+    offtime,
+    max_money,
+    offsets,
+    sleep_allowed,
+    short_bucket,
+    pruned=None
+):
+    """
+    Row and column bounds of the senka LP. Everything that depends on the
+    play-time, money and offset parameters lives here, so a compiled model
+    can be re-parameterized without touching the matrix.
+
+    sleep_allowed and short_bucket are boolean masks over the expeditions
+    (see Catalog.sleep_allowed / Catalog.short_bucket). pruned maps column
+    blocks to boolean masks of columns fixed at 0 by presolve.
+    """
+    inf = np.inf
+    n_rows, n_cols = shape
+
+    row_lower = np.full(n_rows, -inf)
+    row_upper = np.full(n_rows, inf)
+
+    row_upper[rows["money"]] = max_money
+    row_lower[rows["run_slots"]] = row_upper[rows["run_slots"]] = runtime * 3
+    row_lower[rows["off_slots"]] = row_upper[rows["off_slots"]] = offtime * 3
+    row_lower[rows["sleep_slots"]] = row_upper[rows["sleep_slots"]] = 3
+    row_upper[rows["dupe_sleep"]] = 1
+    row_upper[rows["dupe_run"]] = runtime
+    row_upper[rows["dupe_off"]] = offtime
+    row_lower[rows["resource"]] = -np.asarray(offsets, dtype=float)
+    row_lower[rows["total_sorties"]] = row_upper[rows["total_sorties"]] = 0
+    row_upper[rows["proportion"]] = 0
+
+    col_lower = np.zeros(n_cols)
+    col_upper = np.full(n_cols, inf)
+    col_upper[columns["exped_run"]] = runtime
+    col_upper[columns["exped_off"]] = offtime
+    col_upper[columns["exped_sleep"]] = 1
+
+    # expeditions that do not fit into the sleep window
+    sleep_upper = col_upper[columns["exped_sleep"]]
+    sleep_upper[~np.asarray(sleep_allowed, dtype=bool)] = 0
+
+    if not enable_short_bucket:
+        off_upper = col_upper[columns["exped_off"]]
+        off_upper[np.asarray(short_bucket, dtype=bool)] = 0
+
+    for block, mask in (pruned or {}).items():
+        upper = col_upper[columns[block]]
+        upper[mask] = 0
+
+    return row_lower, row_upper, col_lower, col_upper
+
+
+def sleep_coefficients(lp, exped_weights_sleep, days):
+    """
+    (rows, cols, values) of the sleep-expedition entries in the resource
+    rows, which are the only matrix entries scaled by the number of days
+    """
+    w = np.asarray(exped_weights_sleep, dtype=float)
+    r, j = np.nonzero(w)
+    rows = np.arange(lp.rows["resource"].start, lp.rows["resource"].stop)[r]
+    cols = np.arange(lp.columns["exped_sleep"].start, lp.columns["exped_sleep"].stop)[j]
+    return rows, cols, days * w[r, j]
+
+
+def build_senka_lp(
+    sortie_weights,
+    senka,
+    maxproportion,
+    enable_short_bucket,
+    *,
+    runtime,
+    offtime,
+    days,
+    max_money,
+    offsets,
+    sleep_allowed,
+    short_bucket,
+    pruned=None,
+    exped_weights_run,
+    exped_weights_off,
+    exped_weights_sleep,
+    dupe_exped_constr,
+    shopweights,
+    shopcosts
+):
+    """
+    Assemble the senka LP as sparse blocks.
+
+    sortie_weights is the (n_sorties, 6) matrix with the sign convention used in
+    solve_senka (consumption negative). The proportion cap
+    (1 - m_i) * s_i <= m_i * sum_{j != i} s_j is rewritten as s_i <= m_i * T with
+    an auxiliary total-sorties column T, so it costs two nonzeros per sortie.
+    """
+    sortie_weights = np.asarray(sortie_weights, dtype=float)
+    senka = np.asarray(senka, dtype=float)
+    maxproportion = np.asarray(maxproportion, dtype=float)
+
+    n_sorties = sortie_weights.shape[0]
+    n_exped = exped_weights_run.shape[1]
+    n_shop = shopweights.shape[1]
+    n_dupe = dupe_exped_constr.shape[0]
+    n_res = exped_weights_run.shape[0]
+
+    # caps of 1 or more can never bind (s_i <= T always holds)
+    proportion_index = np.flatnonzero(maxproportion < 1)
+    n_prop = proportion_index.shape[0]
+
+    # -----------------------------
+    # Constraint blocks
+    # -----------------------------
+    dupe = sp.csr_matrix(dupe_exped_constr, dtype=float)
+    slot_row = sp.csr_matrix(np.ones((1, n_exped)))
+
+    total_sortie = sp.csr_matrix(-np.ones((1, n_sorties)))
+    total_self = sp.csr_matrix(np.ones((1, 1)))
+
+    prop_sortie = sp.csr_matrix(
+        (np.ones(n_prop), (np.arange(n_prop), proportion_index)),
+        shape=(n_prop, n_sorties)
+    )
+    prop_total = sp.csr_matrix(-maxproportion[proportion_index].reshape(-1, 1))
+
+    # keep the sleep pattern even when days == 0 so it can be rescaled in place
+    sleep_weights = np.asarray(exped_weights_sleep, dtype=float)
+    sleep_r, sleep_j = np.nonzero(sleep_weights)
+    sleep_block = sp.csr_matrix(
+        (days * sleep_weights[sleep_r, sleep_j], (sleep_r, sleep_j)),
+        shape=sleep_weights.shape
+    )
+
+    z = None
+    blocks = [
+        # sortie, run, off, sleep, shop, total
+        [z, z, z, z, sp.csr_matrix(np.reshape(shopcosts, (1, -1)), dtype=float), z],
+        [z, slot_row, z, z, z, z],
+        [z, z, slot_row, z, z, z],
+        [z, z, z, slot_row, z, z],
+        [z, z, z, dupe, z, z],
+        [z, dupe, z, z, z, z],
+        [z, z, dupe, z, z, z],
+        [
+            sp.csr_matrix(sortie_weights.T),
+            sp.csr_matrix(exped_weights_run, dtype=float),
+            sp.csr_matrix(exped_weights_off, dtype=float),
+            sleep_block,
+            sp.csr_matrix(shopweights, dtype=float),
+            z,
+        ],
+        [total_sortie, z, z, z, z, total_self],
+        [prop_sortie, z, z, z, z, prop_total],
+    ]
+    A = sp.bmat(blocks, format="csr")
+
+    row_sizes = (1, 1, 1, 1, n_dupe, n_dupe, n_dupe, n_res, 1, n_prop)
+    rows = _block_slices(row_sizes, ROW_BLOCKS)
+
+    col_sizes = (n_sorties, n_exped, n_exped, n_exped, n_shop, 1)
+    columns = _block_slices(col_sizes, COLUMN_BLOCKS)
+
+    row_lower, row_upper, col_lower, col_upper = senka_bounds(
+        rows,
+        columns,
+        A.shape,
+        enable_short_bucket,
+        runtime=runtime,
+        offtime=offtime,
+        max_money=max_money,
+        offsets=offsets,
+        sleep_allowed=sleep_allowed,
+        short_bucket=short_bucket,
+        pruned=pruned
+    )
+
+    # -----------------------------
+    # Objective
+    # -----------------------------
+    c = np.zeros(A.shape[1])
+    c[columns["sortie"]] = senka
+
+    col_names = [
+        f"{block}_{i}"
+        for block, size in zip(COLUMN_BLOCKS, col_sizes)
+        for i in range(size)
+    ]
+    col_names[-1] = "total_sorties"
+
+    row_names = [
+        block if block in _SINGLE_ROWS else f"{block}_{i}"
+        for block, size in zip(ROW_BLOCKS, row_sizes)
+        for i in range(size)
+    ]
+    row_names[rows["proportion"]] = [f"proportion_{i}" for i in proportion_index]
+
+    return SenkaLP(
+        c, A, row_lower, row_upper, col_lower, col_upper,
+        columns, rows, col_names, row_names, proportion_index
+    )
+
+
+def integer_columns(lp, blocks=INTEGER_BLOCKS):
+    """
+    Boolean mask of the columns that are integral in integer mode
+    """
+    mask = np.zeros(lp.n_cols, dtype=bool)
+    for block in blocks:
+        mask[lp.columns[block]] = True
+    return mask
+
+
+def to_pulp(lp, name="Senka_Optimization", integrality=None):
+    """
+    Translate a SenkaLP into a pulp.LpProblem, one pass over the CSR rows.
+    integrality optionally marks integer columns (see integer_columns).
+    """
+    import pulp
+
+    prob = pulp.LpProblem(name, pulp.LpMaximize)
+
+    if integrality is None:
+        integrality = np.zeros(lp.n_cols, dtype=bool)
+
+    variables = [
+        pulp.LpVariable(
+            col_name,
+            lowBound=None if np.isinf(lo) else lo,
+            upBound=None if np.isinf(hi) else hi,
+            cat=pulp.LpInteger if integer else pulp.LpContinuous
+        )
+        for col_name, lo, hi, integer in zip(lp.col_names, lp.col_lower, lp.col_upper, integrality)
+    ]
+
+    nz = np.flatnonzero(lp.c)
+    prob += pulp.LpAffineExpression([(variables[j], lp.c[j]) for j in nz])
+
+    A = lp.A
+    for r in range(lp.n_rows):
+        start, end = A.indptr[r], A.indptr[r + 1]
+        expr = pulp.LpAffineExpression(
+            [(variables[j], v) for j, v in zip(A.indices[start:end], A.data[start:end])]
+        )
+        lo, hi = lp.row_lower[r], lp.row_upper[r]
+        if lo == hi:
+            sense, rhs = pulp.LpConstraintEQ, hi
+        elif np.isinf(lo):
+            sense, rhs = pulp.LpConstraintLE, hi
+        else:
+            sense, rhs = pulp.LpConstraintGE, lo
+        prob.addConstraint(
+            pulp.LpConstraint(expr, sense=sense, rhs=rhs),
+            lp.row_names[r]
+        )
+
+    return prob, variables
+
+
+def build_daily_lp(
+    sortie_weights,
+    senka,
+    maxproportion,
+    enable_short_bucket,
+    *,
+    runtime,
+    offtime,
+    max_money,
+    offsets,
+    sleep_allowed,
+    short_bucket,
+    pruned=None,
+    exped_weights_run,
+    exped_weights_off,
+    exped_weights_sleep,
+    dupe_exped_constr,
+    shopweights,
+    shopcosts
+):
+    """
+    Assemble the time-indexed senka LP: one copy of every block per day.
+
+    runtime / offtime are per-day hours (length days) and sleep_allowed is a
+    (days, n_exped) mask. Every column block is day-major, so
+    x[columns[block]].reshape(days, -1) gives one row per day. stock[d] is
+    the fuel/ammo/steel/bucket/cond left at the end of day d; offsets[:5]
+    is the stock before day 0 and offsets is otherwise unused (the sortie
+    time of day d is runtime[d] hours). The money cap covers the whole
+    period and proportion caps hold on every day.
+    """
+    sortie_weights = np.asarray(sortie_weights, dtype=float)
+    senka = np.asarray(senka, dtype=float)
+    maxproportion = np.asarray(maxproportion, dtype=float)
+    runtime = np.asarray(runtime, dtype=float)
+    offtime = np.asarray(offtime, dtype=float)
+    offsets = np.asarray(offsets, dtype=float)
+
+    days = runtime.shape[0]
+    n_sorties = sortie_weights.shape[0]
+    n_exped = exped_weights_run.shape[1]
+    n_shop = shopweights.shape[1]
+    n_dupe = dupe_exped_constr.shape[0]
+    n_stock = STOCK_RESOURCES
+
+    proportion_index = np.flatnonzero(maxproportion < 1)
+    n_prop = proportion_index.shape[0]
+
+    # -----------------------------
+    # Constraint blocks
+    # -----------------------------
+    # each per-day block B becomes kron(I_days, B), the block diagonal
+    eye = sp.identity(days, format="csr")
+
+    def daily(block):
+        return sp.kron(eye, sp.csr_matrix(block, dtype=float), format="csr")
+
+    split = {
+        "balance": slice(0, n_stock),
+        "time": slice(n_stock, n_stock + 1),
+    }
+
+    dupe = daily(dupe_exped_constr)
+    slot_row = daily(np.ones((1, n_exped)))
+
+    prop_sortie = sp.csr_matrix(
+        (np.ones(n_prop), (np.arange(n_prop), proportion_index)),
+        shape=(n_prop, n_sorties)
+    )
+
+    # stock[d] = stock[d - 1] + net gains of day d
+    carry = sp.kron(sp.eye(days, k=-1), sp.identity(n_stock), format="csr")
+    stock = carry - sp.identity(days * n_stock, format="csr")
+
+    z = None
+    weights = (sortie_weights.T, exped_weights_run, exped_weights_off, exped_weights_sleep, shopweights)
+    blocks = [
+        # sortie, run, off, sleep, shop, total, stock
+        [z, z, z, z, sp.csr_matrix(np.tile(shopcosts, days).reshape(1, -1)), z, z],
+        [z, slot_row, z, z, z, z, z],
+        [z, z, slot_row, z, z, z, z],
+        [z, z, z, slot_row, z, z, z],
+        [z, z, z, dupe, z, z, z],
+        [z, dupe, z, z, z, z, z],
+        [z, z, dupe, z, z, z, z],
+        [daily(w[split["balance"]]) for w in weights] + [z, stock],
+        [daily(w[split["time"]]) for w in weights] + [z, z],
+        [daily(-np.ones((1, n_sorties))), z, z, z, z, eye, z],
+        [daily(prop_sortie), z, z, z, z, daily(-maxproportion[proportion_index].reshape(-1, 1)), z],
+    ]
+    A = sp.bmat(blocks, format="csr")
+
+    # one money row for the whole period, everything else per day
+    row_sizes = (1,) + tuple(days * size for size in (1, 1, 1, n_dupe, n_dupe, n_dupe, n_stock, 1, 1, n_prop))
+    rows = _block_slices(row_sizes, DAILY_ROW_BLOCKS)
+
+    col_sizes = tuple(days * size for size in (n_sorties, n_exped, n_exped, n_exped, n_shop, 1, n_stock))
+    columns = _block_slices(col_sizes, DAILY_COLUMN_BLOCKS)
+
+    # -----------------------------
+    # Bounds
+    # -----------------------------
+    inf = np.inf
+    n_rows, n_cols = A.shape
+
+    row_lower = np.full(n_rows, -inf)
+    row_upper = np.full(n_rows, inf)
+
+    row_upper[rows["money"]] = max_money
+    row_lower[rows["run_slots"]] = row_upper[rows["run_slots"]] = runtime * 3
+    row_lower[rows["off_slots"]] = row_upper[rows["off_slots"]] = offtime * 3
+    row_lower[rows["sleep_slots"]] = row_upper[rows["sleep_slots"]] = 3
+    row_upper[rows["dupe_sleep"]] = 1
+    row_upper[rows["dupe_run"]] = np.repeat(runtime, n_dupe)
+    row_upper[rows["dupe_off"]] = np.repeat(offtime, n_dupe)
+
+    balance = np.zeros((days, n_stock))
+    balance[0] = -offsets[:n_stock]
+    row_lower[rows["balance"]] = row_upper[rows["balance"]] = balance.ravel()
+
+    row_lower[rows["time"]] = -runtime * 60 * 60
+    row_lower[rows["total_sorties"]] = row_upper[rows["total_sorties"]] = 0
+    row_upper[rows["proportion"]] = 0
+
+    col_lower = np.zeros(n_cols)
+    col_upper = np.full(n_cols, inf)
+    col_upper[columns["exped_run"]] = np.repeat(runtime, n_exped)
+    col_upper[columns["exped_off"]] = np.repeat(offtime, n_exped)
+
+    sleep_upper = np.ones((days, n_exped))
+    sleep_upper[~np.asarray(sleep_allowed, dtype=bool)] = 0
+    col_upper[columns["exped_sleep"]] = sleep_upper.ravel()
+
+    if not enable_short_bucket:
+        off_upper = col_upper[columns["exped_off"]].reshape(days, n_exped)
+        off_upper[:, np.asarray(short_bucket, dtype=bool)] = 0
+
+    # pruned masks are (n,) for every day or (days, n)
+    for block, mask in (pruned or {}).items():
+        upper = col_upper[columns[block]].reshape(days, -1)
+        upper[np.broadcast_to(mask, upper.shape)] = 0
+
+    # -----------------------------
+    # Objective
+    # -----------------------------
+    c = np.zeros(n_cols)
+    c[columns["sortie"]] = np.tile(senka, days)
+
+    col_names = [
+        f"{block}_{d}_{i}"
+        for block, size in zip(DAILY_COLUMN_BLOCKS, col_sizes)
+        for d in range(days)
+        for i in range(size // days)
+    ]
+
+    row_names = [
+        "money" if block == "money" else f"{block}_{d}_{i}"
+        for block, size in zip(DAILY_ROW_BLOCKS, row_sizes)
+        for d in range(1 if block == "money" else days)
+        for i in range(1 if block == "money" else size // days)
+    ]
+
+    return SenkaLP(
+        c, A, row_lower, row_upper, col_lower, col_upper,
+        columns, rows, col_names, row_names, proportion_index
+    )
+
+
+def build_robust_lp(lp, samples, offsets, level, resources):
+    """
+    Extend a senka LP with a CVaR constraint per sampled resource.
+
+    samples is (K, n_sorties, 6) in the sign convention of the LP (costs
+    negative) and resources the indices of the resource rows that vary.
+    Per resource r and sample k the balance
+        b_kr = samples[k, :, r] @ sortie + (expedition / shop part of row r) + offsets[r]
+    gets a shortfall column u_kr >= -b_kr - t_r, and
+        t_r + sum_k u_kr / ((1 - level) K) <= 0
+    bounds the mean shortfall of the worst (1 - level) share of the samples
+    by 0, a convex stand-in for "b_kr >= 0 in a level share of the
+    samples". The sample block costs K * n_sorties nonzeros per resource;
+    everything else is a few nonzeros per sample.
+    """
+    samples = np.asarray(samples, dtype=float)
+    resources = np.asarray(resources, dtype=int)
+    n_samples, n_sorties = samples.shape[:2]
+    q = resources.size
+
+    sortie = lp.columns["sortie"]
+    resource_rows = np.arange(lp.rows["resource"].start, lp.rows["resource"].stop)[resources]
+
+    # expedition and shop part of the resource rows, the same in every sample
+    keep = np.ones(lp.n_cols)
+    keep[sortie] = 0
+    rest = (lp.A[resource_rows] @ sp.diags(keep)).tocsr()
+    rest.eliminate_zeros()
+
+    # -----------------------------
+    # Scenario rows, ordered (resource, sample)
+    # -----------------------------
+    sample_values = samples[:, :, resources].transpose(2, 0, 1).ravel()
+    sample_block = sp.csr_matrix(
+        (
+            sample_values,
+            (
+                np.repeat(np.arange(q * n_samples), n_sorties),
+                np.tile(np.arange(sortie.start, sortie.stop), q * n_samples),
+            )
+        ),
+        shape=(q * n_samples, lp.n_cols)
+    )
+    scenario = sample_block + sp.kron(rest, np.ones((n_samples, 1)), format="csr")
+    scenario.eliminate_zeros()
+
+    threshold = sp.kron(sp.eye(q), np.ones((n_samples, 1)), format="csr")
+    shortfall = sp.eye(q * n_samples, format="csr")
+    cvar = sp.kron(sp.eye(q), np.full((1, n_samples), 1 / ((1 - level) * n_samples)), format="csr")
+
+    A = sp.bmat([
+        [lp.A, None, None],
+        [scenario, threshold, shortfall],
+        [None, sp.eye(q, format="csr"), cvar],
+    ], format="csr")
+
+    n_rows, n_cols = lp.n_rows, lp.n_cols
+    rows = dict(lp.rows)
+    rows["scenario"] = slice(n_rows, n_rows + q * n_samples)
+    rows["cvar"] = slice(rows["scenario"].stop, rows["scenario"].stop + q)
+    columns = dict(lp.columns)
+    columns["cvar_threshold"] = slice(n_cols, n_cols + q)
+    columns["shortfall"] = slice(n_cols + q, n_cols + q + q * n_samples)
+
+    offsets = np.asarray(offsets, dtype=float)
+    row_lower = np.concatenate([
+        lp.row_lower, np.repeat(-offsets[resources], n_samples), np.full(q, -np.inf)
+    ])
+    row_upper = np.concatenate([lp.row_upper, np.full(q * n_samples, np.inf), np.zeros(q)])
+    # the threshold is the level-quantile of the shortfall, negative when
+    # the plan has room to spare
+    col_lower = np.concatenate([lp.col_lower, np.full(q, -np.inf), np.zeros(q * n_samples)])
+    col_upper = np.concatenate([lp.col_upper, np.full(q + q * n_samples, np.inf)])
+    c = np.concatenate([lp.c, np.zeros(q + q * n_samples)])
+
+    col_names = (
+        lp.col_names +
+        [f"cvar_threshold_{r}" for r in resources] +
+        [f"shortfall_{r}_{k}" for r in resources for k in range(n_samples)]
+    )
+    row_names = (
+        lp.row_names +
+        [f"scenario_{r}_{k}" for r in resources for k in range(n_samples)] +
+        [f"cvar_{r}" for r in resources]
+    )
+
+    return SenkaLP(
+        c, A, row_lower, row_upper, col_lower, col_upper,
+        columns, rows, col_names, row_names, lp.proportion_index
+    )
@@ -1,7 +1,16 @@
-import pulp
 import numpy as np
 import os
 import sys
+import time
+from catalog import load_catalog
+from instrument import collect, format_timings, phase
+from lp import SenkaLP, build_senka_lp, integer_columns, senka_bounds, sleep_coefficients
+from params import (
+    MIP_GAP, MIP_TIME_LIMIT, OFFSET_KEYS, PARAM_DEFAULTS, PARAM_KEYS, PARAM_LABELS, parse_params,
+    solve_time_limit
+)
+from result import SenkaResult
+from solvers import STOP_REASONS, LPSolution, SolveStopped, get_backend
 
 # -----------------------------
 # Utility
@@ -43,27 +52,19 @@ def simplify(x, tol=1e-3):
         return x
 
 
-def solve_senka(
-    sortie_weights,
-    senka,
-    maxproportion,
-    enable_short_bucket=True,
-    *,
-    activetime,
-    inactivetime,
-    sleeptime,
-    days,
-    max_money,
-    special,
-    initialfuel,
-    initialammo,
-    initialsteel,
-    initialbucket,
-    initialcond
-):
+DECISION_BLOCKS = ("sortie", "exped_run", "exped_off", "exped_sleep", "shop")
+
+# shadow prices reported by sensitivity_report, in this order
+SHADOW_KEYS = ("fuel", "ammo", "steel", "bucket", "cond", "time", "money")
+
+
+def prepare_sorties(sortie_weights, senka, maxproportion):
+    """
+    Validate the sortie arrays and negate the weights (consumption negative)
+    """
     sortie_weights = -np.asarray(sortie_weights, dtype=float)
-    senka = np.asarray(senka, dtype=float)
-    maxproportion = np.asarray(maxproportion, dtype=float)
+    senka = np.array(senka, dtype=float)
+    maxproportion = np.array(maxproportion, dtype=float)
 
     n_sorties = sortie_weights.shape[0]
 
@@ -75,9 +76,243 @@ def solve_senka(
     
     if sortie_weights.ndim != 2 or sortie_weights.shape[1] != 6:
         raise ValueError("sortie_weights must have shape (n_sorties, 6)")
-    
-    # existing model construction
-    # REMOVE any internal definition of sortie_weights
+
+    if not all(np.isfinite(a).all() for a in (sortie_weights, senka, maxproportion)):
+        raise ValueError("sortie_weights, senka and maxproportion must be finite numbers")
+
+    return sortie_weights, senka, maxproportion
+
+
+def changed_sorties(old, new):
+    """
+    Indices of the sorties whose weights, senka or cap differ between two
+    (sortie_weights, senka, maxproportion) tuples, or None when the number
+    of sorties changed
+    """
+    if old[0].shape != new[0].shape:
+        return None
+    changed = (old[0] != new[0]).any(axis=1) | (old[1] != new[1]) | (old[2] != new[2])
+    return np.flatnonzero(changed)
+
+
+# -----------------------------
+# Presolve
+# -----------------------------
+# Sorties: identical columns are merged (their caps add up) and a sortie is
+# dropped when an uncapped sortie uses no more of any resource or time for
+# at least the same senka. Moving its runs onto the dominating sortie keeps
+# the total sortie count, so no other proportion cap moves.
+# Expeditions: within one fleet group at most one expedition runs per slot,
+# so an expedition whose gains are all matched by an allowed member of the
+# same group is fixed at 0 for the current time window.
+
+PRESOLVE_CHUNK = 256
+
+
+class SortiePresolve:
+    """
+    Sortie columns kept by presolve_sorties and the map back to the input.
+
+    keep indexes the kept columns in the input order; maxproportion holds
+    their (merged) caps. Input column k takes share[k] of the value of kept
+    column rep[k] (rep[k] == -1 for dropped columns). removed lists one dict
+    per dropped or merged column: {"block", "index", "reason", "by"}.
+    """
+
+    def __init__(self, sortie_weights, senka, keep, maxproportion, rep, share, removed):
+        self.sortie_weights = sortie_weights
+        self.senka = senka
+        self.keep = keep
+        self.maxproportion = maxproportion
+        self.rep = rep
+        self.share = share
+        self.removed = removed
+
+    @property
+    def n_removed(self):
+        return self.rep.size - self.keep.size
+
+    def expand(self, values):
+        """
+        Sortie counts of the kept columns -> counts in the input order
+        (along the last axis, so per-day rows expand in one call)
+        """
+        values = np.asarray(values, dtype=float)
+        return np.where(self.rep >= 0, values[..., np.maximum(self.rep, 0)] * self.share, 0.0)
+
+    def expand_reduced_costs(self, col_dual, row_dual, lp):
+        """
+        Reduced costs in the input order; dropped sorties are priced from
+        the row duals (their own proportion row would be slack at 0)
+        """
+        res = lp.rows["resource"]
+        total = lp.rows["total_sorties"].start
+        priced = self.senka - self.sortie_weights @ row_dual[res] + row_dual[total]
+        return np.where(self.rep >= 0, np.asarray(col_dual)[np.maximum(self.rep, 0)], priced)
+
+
+def _dominance(columns, dominators):
+    """
+    [j, i]: dominators[i] is at least as good as columns[j] in every entry
+    """
+    # one 2-D comparison per entry; reducing over a short last axis is slow
+    geq = np.ones((columns.shape[0], dominators.shape[0]), dtype=bool)
+    for k in range(columns.shape[1]):
+        geq &= dominators[None, :, k] >= columns[:, None, k]
+    return geq
+
+
+def presolve_sorties(sortie_weights, senka, maxproportion):
+    """
+    Merge duplicate sorties and drop dominated ones. sortie_weights must be
+    prepared (negated, see prepare_sorties). Returns a SortiePresolve.
+    """
+    n = senka.shape[0]
+    removed = []
+
+    # --- duplicates: identical weights and senka ---
+    columns = np.column_stack([sortie_weights, senka])
+    _, first, group = np.unique(columns, axis=0, return_index=True, return_inverse=True)
+    group = group.ravel()
+
+    # keep the first member in input order as the group's representative
+    order = np.argsort(first)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(order.size)
+    group = rank[group]
+    first = first[order]
+
+    uncapped = maxproportion >= 1
+    cap = np.minimum(np.bincount(group, weights=maxproportion, minlength=first.size), 1.0)
+    has_uncapped = np.bincount(group, weights=uncapped, minlength=first.size) > 0
+    cap[has_uncapped] = 1.0
+
+    # an uncapped member takes everything; otherwise split by cap, which
+    # keeps every member within its own cap
+    first_uncapped = np.full(first.size, -1)
+    for k in np.flatnonzero(uncapped)[::-1]:
+        first_uncapped[group[k]] = k
+    share = np.where(
+        has_uncapped[group],
+        (np.arange(n) == first_uncapped[group]).astype(float),
+        maxproportion / np.maximum(np.bincount(group, weights=maxproportion)[group], 1e-300)
+    )
+
+    # --- domination among the group representatives ---
+    # Only the undominated uncapped representatives (the frontier) need to
+    # be compared against; anything dominated by an uncapped sortie is also
+    # dominated by a frontier member. A dominating column has a strictly
+    # larger coordinate sum, so scanning by descending sum only ever checks
+    # against columns already seen.
+    W = columns[first]
+    candidates = np.flatnonzero(cap >= 1)
+    candidates = candidates[np.argsort(-W[candidates].sum(axis=1), kind="stable")]
+
+    frontier = np.empty(0, dtype=int)
+    for start in range(0, candidates.size, PRESOLVE_CHUNK):
+        chunk = candidates[start:start + PRESOLVE_CHUNK]
+        if frontier.size:
+            chunk = chunk[~_dominance(W[chunk], W[frontier]).any(axis=1)]
+        inside = _dominance(W[chunk], W[chunk])
+        np.fill_diagonal(inside, False)
+        frontier = np.concatenate([frontier, chunk[~inside.any(axis=1)]])
+
+    dominated_by = np.full(first.size, -1)
+    # with every sortie capped there is nothing to dominate by
+    for start in range(0, first.size if frontier.size else 0, PRESOLVE_CHUNK):
+        stop = min(start + PRESOLVE_CHUNK, first.size)
+        geq = _dominance(W[start:stop], W[frontier])
+        geq[frontier[None, :] == np.arange(start, stop)[:, None]] = False
+        hit = geq.any(axis=1)
+        dominated_by[start:stop][hit] = frontier[geq[hit].argmax(axis=1)]
+
+    # a zero cap forbids the sortie outright
+    zero_cap = cap <= 0
+
+    dropped = (dominated_by >= 0) | zero_cap
+    for k in range(n):
+        g = group[k]
+        if zero_cap[g]:
+            reason, by = "zero_cap", None
+        elif dropped[g]:
+            reason, by = "dominated", int(first[dominated_by[g]])
+        elif first[g] != k:
+            reason, by = "duplicate", int(first[g])
+        else:
+            continue
+        removed.append({"block": "sortie", "index": k, "reason": reason, "by": by})
+
+    kept_groups = np.flatnonzero(~dropped)
+    position = np.full(first.size, -1)
+    position[kept_groups] = np.arange(kept_groups.size)
+
+    rep = position[group]
+    share[rep < 0] = 0.0
+
+    return SortiePresolve(
+        sortie_weights, senka, first[kept_groups], cap[kept_groups], rep, share, removed
+    )
+
+
+def presolve_expeditions(catalog, enable_short_bucket, sleeptime):
+    """
+    Expedition columns dominated within their fleet group for this time
+    window. Returns ({block: bool mask of columns to fix at 0}, removed).
+    """
+    allowed = {
+        "exped_run": np.ones(catalog.n_expeditions, dtype=bool),
+        "exped_off": (
+            np.ones(catalog.n_expeditions, dtype=bool) if enable_short_bucket
+            else ~catalog.short_bucket
+        ),
+        "exped_sleep": catalog.sleep_allowed(sleeptime),
+    }
+    weights = {
+        "exped_run": catalog.exped_weights_run,
+        "exped_off": catalog.exped_weights_off,
+        "exped_sleep": catalog.exped_weights_sleep,
+    }
+
+    pruned = {}
+    removed = []
+    for block, ok in allowed.items():
+        mask = np.zeros(catalog.n_expeditions, dtype=bool)
+        W = weights[block]
+        for members in catalog.dupe_groups:
+            for j in members[ok[members]]:
+                for i in members[ok[members]]:
+                    if i == j or mask[i]:
+                        continue
+                    identical = np.array_equal(W[:, i], W[:, j])
+                    if (W[:, i] >= W[:, j]).all() and (not identical or i < j):
+                        mask[j] = True
+                        removed.append({
+                            "block": block, "index": int(j),
+                            "reason": "duplicate" if identical else "dominated", "by": int(i)
+                        })
+                        break
+        pruned[block] = mask
+
+    return pruned, removed
+
+
+def derive_parameters(
+    *,
+    activetime,
+    inactivetime,
+    sleeptime,
+    days,
+    initialfuel,
+    initialammo,
+    initialsteel,
+    initialbucket,
+    initialcond,
+    **_
+):
+    """
+    Slot totals and the offsets vector from the GUI parameters.
+    Returns (runtime, offtime, offsets).
+    """
     # -----------------------------
     # Parameters (from GUI)
     # -----------------------------
@@ -96,206 +331,745 @@ def solve_senka(
         runtime * 60 * 60
     ], dtype=float)
 
-    offsets = initial
+    return runtime, offtime, initial
 
-    # -----------------------------
-    # Data matrices
-    # -----------------------------
-    # sortie_weights = -np.array([
-    #     [23.6, 23.6, 26.7, 51.3, 60.5, 114, 263., -72.7, 23.6, 163],
-    #     [39.2, 39.2, 41.3, 56.2, 64.7, 82.1, 183., -115.9, 23.6, 110],
-    #     [0,    0,    0,    9,    9,    63.4, 100., 0,     0,    0],
-    #     [.102, .117, .182, .245, .26,  1.1,  1.1,  0,     .102, 0.293],
-    #     [0.00, 0.00, -31., 0.00, 0.00, 0.00, 0.00, 0,     0.00, 0.00],
-    #     [230., 240., 245., 145., 178., 225., 255., 60.,   250., 288.]
-    # ])
-
-    exped_weights_run = np.array([
-        [-50.0, -50.0, 115.6, 157.0, 133.0, 220.0, 97 , 149.5 , 49.50, 79.50, 171.2, 222.9, -29.1, -29.1, 183.5, 234.5],
-        [240.0, 360.0, 63.27, -34.0, 160.0, 244.0, 0 , 0 ,  63.50, 101.0, 138.3, 180.0, 164.9, 213.8, -30.2, -30.2],
-        [72, 108, 0, 0, 18, 24, 0 , 0 , 0 , 0, 0, 0, 120, 177, 80, 123],
-        [1.000, 1.000, 1.091, 1.000, 0.000, 0.000, 0 , 0.375 ,  0.000, 0.000, 0.000, 0.000, 0.000, 0.000, 0.000, 0.000],
-        [0.000, -30.0, -13.1, -12.0, 0.000, -10.0, 0 , -3.75 ,  0.000, -4.50, 0.000, -5.15, 0.000, -4.37, 0.000, -4.12],
-        [-20.0, -30.0, -16.4, -15.0, -6.67, -10.0, -3.75 , -3.75 ,  -2.50, -3.75, -4.29, -6.43, -3.64, -5.45, -3.43, -5.14]
-    ])
-
-    exped_weights_off = np.zeros((6, 16))
-    exped_weights_off[:5, :] = exped_weights_run[:5, :]
-
-    exped_weights_sleep = np.array([
-        [-25, -25, 106, 157, 200, 330, 388 , 598 , 198, 318, 400, 520, -80, -80, 535, 684],
-        [120, 180, 58, -34, 240, 366, 0 , 0 , 254, 404, 323, 420, 453, 588, -84, -84],
-        [36, 54, 0, 0, 24, 36, 0 , 0 ,0, 0, 0, 0, 324, 486, 240, 360],
-        [0.5, 0.5, 1, 1, 0, 0, 0 , 1.5 ,1, 1, 0, 0, 0, 0, 0, 0],
-        [0, -15, -12, -12, 0, -15, 0 , 0 , 0, -18, 0, -12, 0, -12, 0, -12],
-        [0, 0, 0, 0, 0, 0, 0 , 0 ,0, 0, 0, 0, 0, 0, 0, 0]
-    ])
-
-    exped_weights_time = np.array([0.5, 0.5, 55/60, 1, 1.5, 1.5, 4, 4, 4, 4, 7/3, 7/3, 11/4, 11/4, 175/60, 175/60])
-
-    # senka = np.array([1.47, 1.47, 1.47, 1.30, 1.30, 2.40, 2.48, 0, 1.47, 2.31])
-
-    dupe_exped_constr = np.array([
-        [1,1,0,0,0,0,0,0,0,0,0,0,0,0,0,0],
-        [0,0,0,0,1,1,0,0,0,0,0,0,0,0,0,0],
-        [0,0,0,0,0,0,1,1,0,0,0,0,0,0,0,0],
-        [0,0,0,0,0,0,0,0,1,1,0,0,0,0,0,0],
-        [0,0,0,0,0,0,0,0,0,0,1,1,0,0,0,0],
-        [0,0,0,0,0,0,0,0,0,0,0,0,1,1,0,0],
-        [0,0,0,0,0,0,0,0,0,0,0,0,0,0,1,1]
-    ])
-
-    shopweights = np.array([
-        [1200, 0, 0, 500, 0, 200],
-        [0, 250, 0, 500, 0, 200],
-        [0, 0, 0, 200, 0, 1500],
-        [0, 0, 6, 3, 0, 0],
-        [0, 0, 0, 0, 180, 0],
-        [0, 0, 0, 0, 0, 0]
-    ])
-
-    shopcosts = np.array([300, 100, 300, 300, 300, 700])
+
+def build_model(
+    sortie_weights,
+    senka,
+    maxproportion,
+    enable_short_bucket,
+    catalog,
+    *,
+    activetime,
+    inactivetime,
+    sleeptime,
+    days,
+    max_money,
+    initialfuel,
+    initialammo,
+    initialsteel,
+    initialbucket,
+    initialcond,
+    pruned=None,
+    **_
+):
+    """
+    Build the SenkaLP for one parameter set. sortie_weights must already be
+    negated (see prepare_sorties); pruned optionally fixes expedition
+    columns at 0 (see presolve_expeditions). Returns (lp, offsets).
+    """
+    runtime, offtime, offsets = derive_parameters(
+        activetime=activetime,
+        inactivetime=inactivetime,
+        sleeptime=sleeptime,
+        days=days,
+        initialfuel=initialfuel,
+        initialammo=initialammo,
+        initialsteel=initialsteel,
+        initialbucket=initialbucket,
+        initialcond=initialcond
+    )
 
     # -----------------------------
     # Model
     # -----------------------------
-    prob = pulp.LpProblem("Senka_Optimization", pulp.LpMaximize)
+    lp = build_senka_lp(
+        sortie_weights,
+        senka,
+        maxproportion,
+        enable_short_bucket,
+        runtime=runtime,
+        offtime=offtime,
+        days=days,
+        max_money=max_money,
+        offsets=offsets,
+        sleep_allowed=catalog.sleep_allowed(sleeptime),
+        short_bucket=catalog.short_bucket,
+        pruned=pruned,
+        **catalog.matrices()
+    )
+    return lp, offsets
+
+
+def summarize(x, lp, sortie_weights, senka, catalog, *, days, offsets, special, presolve=None):
+    """
+    Turn a raw solution vector into the rounded SenkaResult shown in the GUI.
+    With a SortiePresolve the sortie block is mapped back to the input
+    order of sortie_weights / senka.
+    """
+    # one pass over the whole vector, then every block is a view into it
+    x = simplify(x)
+    sortie = x[lp.columns["sortie"]]
+    if presolve is not None:
+        sortie = simplify(presolve.expand(sortie))
+    final_senka = round_result(float(senka @ sortie) + special, 2)
 
-    sortie = pulp.LpVariable.dicts(
-        "sortie",
-        range(n_sorties),
-        lowBound=0
+    x = round_result(x, 2)
+    sortie = round_result(sortie, 2)
+    run, off, sleep, shop = (x[lp.columns[block]] for block in DECISION_BLOCKS[1:])
+
+    # --- Resource breakdown (first 5 resources only) ---
+
+    # Sorties consume resources (weights were negated earlier)
+    spent_from_sorties = -sortie_weights[:, :5].T @ sortie
+
+    # Expeditions earn resources
+    earned_from_expeds = (
+        catalog.exped_weights_run[:5] @ run +
+        catalog.exped_weights_off[:5] @ off +
+        days * (catalog.exped_weights_sleep[:5] @ sleep)
     )
-    exped_run = pulp.LpVariable.dicts("exped_run", range(16), lowBound=0, upBound=runtime)
-    exped_off = pulp.LpVariable.dicts("exped_off", range(16), lowBound=0, upBound=offtime)
-    exped_sleep = pulp.LpVariable.dicts("exped_sleep", range(16), lowBound=0, upBound=1)
-    shop = pulp.LpVariable.dicts("shop", range(6), lowBound=0)
-
-    prob += pulp.lpSum(senka[i] * sortie[i] for i in range(n_sorties))
-    prob += pulp.lpSum(shopcosts[i] * shop[i] for i in range(6)) <= max_money
-    prob += pulp.lpSum(exped_run[i] for i in range(16)) == runtime * 3
-    prob += pulp.lpSum(exped_off[i] for i in range(16)) == offtime * 3
-    prob += pulp.lpSum(exped_sleep[i] for i in range(16)) == 3
-
-    for i in range(16):
-        if exped_weights_time[i] >= sleeptime:
-            prob += exped_sleep[i] == 0
-
-    for k in range(7):
-        prob += pulp.lpSum(dupe_exped_constr[k, i] * exped_sleep[i] for i in range(16)) <= 1
-        prob += pulp.lpSum(dupe_exped_constr[k, i] * exped_run[i] for i in range(16)) <= runtime
-        prob += pulp.lpSum(dupe_exped_constr[k, i] * exped_off[i] for i in range(16)) <= offtime
-
-    if not enable_short_bucket:
-        for i in range(4):
-            prob += exped_off[i] == 0
-
-    for r in range(6):
-        prob += (
-            pulp.lpSum(sortie_weights[i, r] * sortie[i] for i in range(n_sorties)) +
-            pulp.lpSum(exped_weights_run[r, i] * exped_run[i] for i in range(16)) +
-            pulp.lpSum(exped_weights_off[r, i] * exped_off[i] for i in range(16)) +
-            days * pulp.lpSum(exped_weights_sleep[r, i] * exped_sleep[i] for i in range(16)) +
-            pulp.lpSum(shopweights[r, i] * shop[i] for i in range(6)) +
-            offsets[r]
-            >= 0
+
+    # Shop purchases
+    bought_from_shop = catalog.shopweights[:5] @ shop
+
+    # Offsets (initial resources)
+    remaining = offsets[:5] - spent_from_sorties + earned_from_expeds + bought_from_shop
+
+    # Round for display
+    return SenkaResult(
+        final_senka,
+        sortie,
+        run,
+        off,
+        sleep,
+        shop,
+        np.round(spent_from_sorties, 2),
+        np.round(earned_from_expeds, 2),
+        np.round(bought_from_shop, 2),
+        np.round(remaining, 2)
+    )
+
+
+def sensitivity_report(solution, lp, presolve=None):
+    """
+    Shadow prices, reduced costs and (when the backend provides them)
+    allowable ranges from one optimal solve.
+
+    shadow_prices follows SHADOW_KEYS: senka gained per extra unit of each
+    offset (time in seconds of sortie time) and per extra yen of max_money.
+    shadow_ranges gives, per entry, the offset / max_money range over which
+    that price holds. reduced_costs holds c_j - y @ A_j for every decision
+    block, and cost_ranges the senka-per-sortie range keeping the basis.
+    Sortie entries follow the input order when a SortiePresolve is given;
+    dropped sorties have no cost range (nan).
+    """
+    res = np.arange(lp.rows["resource"].start, lp.rows["resource"].stop)
+    money = lp.rows["money"].start
+
+    # resource rows read  W x >= -offset: one more unit of offset lowers the bound
+    report = {
+        "shadow_prices": np.append(-solution.row_dual[res], solution.row_dual[money]),
+        "shadow_ranges": None,
+        "reduced_costs": {
+            block: solution.col_dual[lp.columns[block]] for block in DECISION_BLOCKS
+        },
+        "cost_ranges": None,
+    }
+
+    if presolve is not None:
+        report["reduced_costs"]["sortie"] = presolve.expand_reduced_costs(
+            report["reduced_costs"]["sortie"], solution.row_dual, lp
+        )
+
+    if solution.ranging is not None:
+        r = solution.ranging
+        report["shadow_ranges"] = np.column_stack([
+            np.append(-r["row_upper"][res], r["row_lower"][money]),
+            np.append(-r["row_lower"][res], r["row_upper"][money]),
+        ])
+        sortie = lp.columns["sortie"]
+        report["cost_ranges"] = np.column_stack([
+            r["cost_lower"][sortie], r["cost_upper"][sortie]
+        ])
+        if presolve is not None:
+            report["cost_ranges"] = np.where(
+                (presolve.rep >= 0)[:, None],
+                report["cost_ranges"][np.maximum(presolve.rep, 0)],
+                np.nan
+            )
+
+    return report
+
+
+def format_stats(stats):
+    """
+    Console lines for SenkaModel.stats
+    """
+    def optional(value, fmt="{}"):
+        return "-" if value is None else fmt.format(value)
+
+    solver_time = stats.get("solver_time")
+
+    lines = [
+        f"モデル: {stats['rows']} 行, {stats['cols']} 列, 非ゼロ {stats['nnz']}",
+        f"ソルバー: {stats['backend']}, {stats['status']}, "
+        f"反復 {optional(stats.get('iterations'))}, "
+        f"時間 {optional(None if solver_time is None else solver_time * 1e3, '{:.2f} ms')}",
+        f"処理時間: {format_timings(stats['timings'])}",
+    ]
+
+    if "lp_objective" in stats:
+        lines.append(
+            f"整数解: {stats['status']}, LP緩和 {stats['lp_objective']:.2f}, "
+            f"ギャップ {optional(stats.get('mip_gap'), '{:.3%}')}, "
+            f"ノード {optional(stats.get('nodes'))}"
+        )
+
+    if stats.get("stopped"):
+        lines.append(f"途中終了: {STOP_REASONS[stats['stopped']]}．それまでの最良の解を出力します")
+
+    removed = stats.get("presolve")
+    if removed:
+        n_sorties = sum(r["block"] == "sortie" for r in removed)
+        lines.append(f"プレソルブ: 出撃 {n_sorties} 列, 遠征 {len(removed) - n_sorties} 列を除外")
+
+    if "cache" in stats:
+        # model size and timings above are those of the original solve
+        lines.append(f"キャッシュ: {stats['cache']} から読み込み")
+
+    return "\n".join(lines)
+
+
+def format_presolve(removed, sortie_names, catalog):
+    """
+    One console line per column removed by presolve
+    """
+    reasons = {"duplicate": "重複", "dominated": "劣位", "zero_cap": "最大割合0"}
+    blocks = {"exped_run": "稼働", "exped_off": "遠征時間", "exped_sleep": "休息"}
+
+    lines = []
+    for r in removed:
+        names = sortie_names if r["block"] == "sortie" else catalog.expedition_names
+        label = names[r["index"]] if r["block"] == "sortie" else f"{names[r['index']]} ({blocks[r['block']]})"
+        by = "" if r["by"] is None else f": {names[r['by']]}"
+        lines.append(f"  {label} — {reasons[r['reason']]}{by}")
+    return "\n".join(lines)
+
+
+# -----------------------------
+# Integer mode
+# -----------------------------
+def rounding_heuristic(lp, x, backend, catalog):
+    """
+    Integer start from an LP relaxation solution: sleep slots go greedily to
+    the largest values (one per fleet group), shop purchases and sorties
+    are rounded down with proportion caps repaired, and the expeditions are
+    re-optimized with those fixed. Returns x or None if that LP fails.
+    """
+    col_lower = lp.col_lower.copy()
+    col_upper = lp.col_upper.copy()
+
+    # sleep: three expeditions from different fleet groups
+    sleep = lp.columns["exped_sleep"]
+    group = np.arange(catalog.n_expeditions)
+    for g, members in enumerate(catalog.dupe_groups):
+        group[members] = catalog.n_expeditions + g
+    chosen = np.zeros(catalog.n_expeditions)
+    used = set()
+    for j in np.argsort(-x[sleep], kind="stable"):
+        if chosen.sum() >= 3:
+            break
+        if lp.col_upper[sleep][j] >= 1 and group[j] not in used:
+            chosen[j] = 1
+            used.add(group[j])
+    if chosen.sum() < 3:
+        return None
+
+    shop = lp.columns["shop"]
+    shop_count = np.floor(x[shop] + 1e-6)
+
+    sortie = lp.columns["sortie"]
+    count = np.floor(x[sortie] + 1e-6)
+    caps = -lp.A[lp.rows["proportion"], lp.columns["total_sorties"].start].toarray().ravel()
+    for _ in range(100):
+        limit = np.floor(caps * count.sum() + 1e-6)
+        over = count[lp.proportion_index] > limit
+        if not over.any():
+            break
+        count[lp.proportion_index[over]] = limit[over]
+
+    for block, values in ((sleep, chosen), (shop, shop_count), (sortie, count)):
+        col_lower[block] = col_upper[block] = values
+
+    fixed = SenkaLP(
+        lp.c, lp.A, lp.row_lower, lp.row_upper, col_lower, col_upper,
+        lp.columns, lp.rows, lp.col_names, lp.row_names, lp.proportion_index
+    )
+    solution = backend.solve(fixed)
+    return solution.x if solution.status == "Optimal" else None
+
+
+class SenkaModel:
+    """
+    Senka LP compiled once from the sortie data.
+
+    Parameter changes (money cap, play times, days, sleeptime, offsets) only
+    patch bounds, RHS and the day-scaled sleep coefficients. With a backend
+    that supports in-place updates (highs) the loaded solver instance is
+    patched and re-solved from its previous basis; other backends re-solve
+    the patched matrices.
+
+        model = SenkaModel(w, s, m, **params)
+        model.solve()
+        model.set_max_money(3000)
+        model.solve()
+
+    Every build / update / solve step runs inside an instrument.phase, and
+    after each solve `stats` holds the phase timings since the previous
+    solve, the model dimensions and the solver's own statistics.
+
+    With presolve=True (default) duplicate and dominated sorties are left
+    out of the LP and dominated expeditions are fixed at 0; results are
+    reported in the input sortie order and stats["presolve"] lists what
+    was removed.
+    """
+
+    def __init__(
+        self,
+        sortie_weights,
+        senka,
+        maxproportion,
+        enable_short_bucket=True,
+        *,
+        backend=None,
+        catalog=None,
+        presolve=True,
+        **params
+    ):
+        missing = set(PARAM_KEYS) - set(params)
+        if missing:
+            raise TypeError(f"missing parameters: {', '.join(sorted(missing))}")
+
+        self.sortie_weights, self.senka, self.maxproportion = prepare_sorties(
+            sortie_weights, senka, maxproportion
         )
+        self.enable_short_bucket = enable_short_bucket
+        self.catalog = load_catalog() if catalog is None else catalog
+        self.params = {k: params[k] for k in PARAM_KEYS}
+        self.backend = get_backend(backend)
 
-    for i in range(n_sorties):
-        lhs = (1 - maxproportion[i]) * sortie[i]
-        rhs = pulp.lpSum(maxproportion[i] * sortie[j] for j in range(n_sorties) if j != i)
-        prob += lhs <= rhs
+        self._timings = {}
+        self.stats = None
+        self._use_presolve = presolve
 
+        with collect(self._timings):
+            self._compile()
+
+        self._handle = None
+        self._basis = None
+
+    def _compile(self):
+        """
+        Presolve and build the LP of the current sortie arrays and params
+        """
+        with phase("presolve"):
+            self.presolve = None
+            sortie_weights, senka, maxproportion = self.sortie_weights, self.senka, self.maxproportion
+            if self._use_presolve:
+                self.presolve = presolve_sorties(sortie_weights, senka, maxproportion)
+                keep = self.presolve.keep
+                sortie_weights, senka = sortie_weights[keep], senka[keep]
+                maxproportion = self.presolve.maxproportion
+            pruned, self._pruned_expeditions = self._prune_expeditions(self.params)
+
+        with phase("build"):
+            self.lp, self.offsets = build_model(
+                sortie_weights,
+                senka,
+                maxproportion,
+                self.enable_short_bucket,
+                self.catalog,
+                pruned=pruned,
+                **self.params
+            )
 
     # -----------------------------
-    # CBC solver (PyInstaller-safe, file-logged)
+    # Sortie updates
     # -----------------------------
-    cbc_path = resource_path(
-        os.path.join("solverdir", "cbc", "win", "i64", "cbc.exe")
-    )
+    def update_sorties(self, sortie_weights, senka, maxproportion):
+        """
+        Replace the sortie arrays (e.g. after the sortie sheet was edited)
+        and return what changed:
 
-    # IMPORTANT:
-    # logPath must be writable at runtime.
-    # Do NOT use sys._MEIPASS for logs.
-    log_file = "cbc.log"
+            {"sorties": changed sortie indices (None if the count changed),
+             "mode": "unchanged" | "patched" | "rebuilt",
+             "coefficients": matrix entries pushed, "costs": costs pushed}
 
-    solver = pulp.COIN_CMD(
-        path=cbc_path,
-        options=["printingOptions", "all"],
-        logPath=log_file
-    )
+        The LP is rebuilt, which is cheap; when its shape is unchanged only
+        the entries that differ are pushed into the loaded solver instance,
+        which keeps its basis and hot starts. Otherwise the next solve
+        starts cold.
+        """
+        new = prepare_sorties(sortie_weights, senka, maxproportion)
+        changed = changed_sorties((self.sortie_weights, self.senka, self.maxproportion), new)
+        summary = {"sorties": changed, "mode": "unchanged", "coefficients": 0, "costs": 0}
+        if changed is not None and not changed.size:
+            return summary
 
-    prob.solve(solver)
+        with collect(self._timings), phase("update"):
+            old = self.lp
+            self.sortie_weights, self.senka, self.maxproportion = new
+            self._compile()
+            lp = self.lp
 
-    status = pulp.LpStatus[prob.status]
+            same_shape = (
+                lp.A.shape == old.A.shape and
+                lp.columns == old.columns and
+                lp.rows == old.rows
+            )
+            if not same_shape:
+                self._handle = None
+                self._basis = None
+                summary["mode"] = "rebuilt"
+                return summary
 
-    if status != "Optimal":
-        raise RuntimeError(f"設定された最適化問題に解が存在しません．ソルバーのステータス: {status}")
+            diff = (lp.A - old.A).tocoo()
+            nonzero = diff.data != 0
+            r, j = diff.row[nonzero], diff.col[nonzero]
+            coeffs = (r, j, np.asarray(lp.A[r, j]).ravel())
+            costs = np.flatnonzero(lp.c != old.c)
+            rows = np.flatnonzero((lp.row_lower != old.row_lower) | (lp.row_upper != old.row_upper))
+            cols = np.flatnonzero((lp.col_lower != old.col_lower) | (lp.col_upper != old.col_upper))
 
-    # --- forward CBC log to Python stdout (GUI) ---
-    if os.path.exists(log_file):
-        with open(log_file, "r", encoding="utf-8", errors="ignore") as f:
-            print(f.read())
+            if self._handle is not None:
+                self.backend.update(self._handle, lp, rows, cols, coeffs, costs)
 
-    sortie = simplify(sortie)
-    exped_run_vals = simplify(exped_run)
-    exped_off_vals = simplify(exped_off)
-    exped_sleep_vals = simplify(exped_sleep)
-    shop_vals = simplify(shop)
+            summary["mode"] = "patched"
+            summary["coefficients"] = int(r.size)
+            summary["costs"] = int(costs.size)
+        return summary
 
-    final_senka = sum(senka[i] * sortie[i] for i in range(n_sorties)) + special
+    # -----------------------------
+    # Parameter setters
+    # -----------------------------
+    def set_max_money(self, max_money):
+        self.update(max_money=max_money)
 
-    final_senka = round_result(final_senka, 2)
-    sortie = round_result(sortie, 2)
-    exped_run_vals = round_result(exped_run_vals, 2)
-    exped_off_vals = round_result(exped_off_vals, 2)
-    exped_sleep_vals = round_result(exped_sleep_vals, 2)
-    shop_vals = round_result(shop_vals, 2)
+    def set_slot_totals(self, *, activetime=None, inactivetime=None, days=None):
+        self.update(**{
+            k: v for k, v in
+            (("activetime", activetime), ("inactivetime", inactivetime), ("days", days))
+            if v is not None
+        })
 
-    # --- Resource breakdown (first 5 resources only) ---
+    def set_sleeptime(self, sleeptime):
+        self.update(sleeptime=sleeptime)
 
-    sortie_array = np.array([sortie[i] for i in range(n_sorties)])
-    run_array = np.array([exped_run_vals[i] for i in range(16)])
-    off_array = np.array([exped_off_vals[i] for i in range(16)])
-    sleep_array = np.array([exped_sleep_vals[i] for i in range(16)])
-    shop_array = np.array([shop_vals[i] for i in range(6)])
+    def set_offsets(self, **offsets):
+        unknown = set(offsets) - set(OFFSET_KEYS)
+        if unknown:
+            raise ValueError(f"unknown offsets: {', '.join(sorted(unknown))}")
+        self.update(**offsets)
 
-    # Sorties consume resources (weights were negated earlier)
-    spent_from_sorties = np.dot((-sortie_weights)[:, :5].T, sortie_array)
+    def update(self, **params):
+        """
+        Change any of the solve_senka parameters and patch the model
+        """
+        unknown = set(params) - set(PARAM_KEYS)
+        if unknown:
+            raise ValueError(f"unknown parameters: {', '.join(sorted(unknown))}")
 
-    # Expeditions earn resources
-    earned_from_expeds = (
-        np.dot(exped_weights_run[:5, :], run_array) +
-        np.dot(exped_weights_off[:5, :], off_array) +
-        days * np.dot(exped_weights_sleep[:5, :], sleep_array)
-    )
+        with collect(self._timings), phase("update"):
+            self._update(params)
 
-    # Shop purchases
-    bought_from_shop = np.dot(shopweights[:5, :], shop_array)
+    def _prune_expeditions(self, params):
+        """
+        (pruned masks, removed entries) for params; (None, []) without presolve
+        """
+        if self.presolve is None:
+            return None, []
+        return presolve_expeditions(self.catalog, self.enable_short_bucket, params["sleeptime"])
 
-    # Offsets (initial resources)
-    offset = offsets[:5]
+    @property
+    def presolve_removed(self):
+        """
+        Columns removed by presolve for the current parameters
+        """
+        return ([] if self.presolve is None else self.presolve.removed) + self._pruned_expeditions
 
-    remaining = offset - spent_from_sorties + earned_from_expeds + bought_from_shop
+    def bounds(self, **params):
+        """
+        (row_lower, row_upper, col_lower, col_upper) of the model with params
+        changed, without applying them
+        """
+        return self._bounds({**self.params, **params})[0]
 
-    # Round for display
-    spent_from_sorties = np.round(spent_from_sorties, 2)
-    earned_from_expeds = np.round(earned_from_expeds, 2)
-    bought_from_shop = np.round(bought_from_shop, 2)
-    remaining = np.round(remaining, 2)
+    def _bounds(self, params):
+        runtime, offtime, offsets = derive_parameters(**params)
+        pruned, removed = self._prune_expeditions(params)
 
+        lp = self.lp
+        bounds = senka_bounds(
+            lp.rows,
+            lp.columns,
+            lp.A.shape,
+            self.enable_short_bucket,
+            runtime=runtime,
+            offtime=offtime,
+            max_money=params["max_money"],
+            offsets=offsets,
+            sleep_allowed=self.catalog.sleep_allowed(params["sleeptime"]),
+            short_bucket=self.catalog.short_bucket,
+            pruned=pruned
+        )
+        return bounds, offsets, removed
 
-    return (
-        final_senka,
-        sortie,
-        exped_run_vals,
-        exped_off_vals,
-        exped_sleep_vals,
-        shop_vals,
-        spent_from_sorties,
-        earned_from_expeds,
-        bought_from_shop,
-        remaining
-    )
+    def _update(self, params):
+        new_params = {**self.params, **params}
+        (row_lower, row_upper, col_lower, col_upper), offsets, removed = self._bounds(new_params)
+        self._pruned_expeditions = removed
+
+        lp = self.lp
+
+        rows = np.flatnonzero((row_lower != lp.row_lower) | (row_upper != lp.row_upper))
+        cols = np.flatnonzero((col_lower != lp.col_lower) | (col_upper != lp.col_upper))
+
+        lp.row_lower, lp.row_upper = row_lower, row_upper
+        lp.col_lower, lp.col_upper = col_lower, col_upper
+
+        coeffs = None
+        if new_params["days"] != self.params["days"]:
+            coeffs = sleep_coefficients(lp, self.catalog.exped_weights_sleep, new_params["days"])
+            lp.A[coeffs[0], coeffs[1]] = coeffs[2]
+
+        if self._handle is not None:
+            self.backend.update(self._handle, lp, rows, cols, coeffs)
+
+        self.params = new_params
+        self.offsets = offsets
+
+    # -----------------------------
+    # Solve
+    # -----------------------------
+    def solve_lp(self, sensitivity=False, *, time_limit=None, iteration_limit=None, cancel=None):
+        """
+        Solve the current model and return the backend's LPSolution
+        """
+        limits = {"time_limit": time_limit, "iteration_limit": iteration_limit, "cancel": cancel}
+        if self.backend.supports_updates:
+            if self._handle is None:
+                self._handle = self.backend.create(self.lp)
+            return self.backend.run(self._handle, sensitivity=sensitivity, **limits)
+
+        warm_start = self._basis if self.backend.supports_warm_start else None
+        solution = self.backend.solve(self.lp, warm_start=warm_start, sensitivity=sensitivity, **limits)
+        if solution.status == "Optimal":
+            self._basis = solution.basis
+        return solution
+
+    def _record_stats(self, solution):
+        self.stats = {
+            "timings": self._timings,
+            "rows": self.lp.n_rows,
+            "cols": self.lp.n_cols,
+            "nnz": int(self.lp.nnz),
+            "presolve": self.presolve_removed,
+            **solution.stats,
+        }
+        self._timings = {}
+
+    def solve(self, sensitivity=False, integer=False, time_limit=None, mip_gap=MIP_GAP,
+              iteration_limit=None, cancel=None, log=True):
+        """
+        Solve and return a SenkaResult (see solve_senka).
+
+        integer=True makes sorties, shop purchases and sleep expeditions
+        integral: the LP relaxation is solved first, rounded into a start
+        solution and handed to branch and bound, which stops at a relative
+        gap of mip_gap. The result then carries the relaxation's objective
+        as lp_bound; sensitivity always comes from the relaxation.
+
+        time_limit (seconds) bounds the whole solve, relaxation and branch
+        and bound together; None leaves an LP unlimited and gives integer
+        mode MIP_TIME_LIMIT, inf lifts it (see params.solve_time_limit).
+        iteration_limit bounds the simplex iterations of the relaxation.
+        cancel is a threading.Event (anything with is_set()) that another
+        thread sets to stop the solve. A solve ended early by either returns its best feasible
+        point with stats["status"] "Feasible" and stats["stopped"] naming
+        the reason (see solvers.STOP_REASONS), or raises SolveStopped when
+        it has none. Without a proven relaxation there is no lp_bound and
+        no sensitivity.
+
+        The solver logs are printed for the GUI console; log=False keeps
+        them off sys.stdout, which is shared by every thread.
+        """
+        time_limit = solve_time_limit(time_limit, integer)
+        deadline = None if time_limit is None else time.perf_counter() + time_limit
+
+        with collect(self._timings):
+            with phase("solve"):
+                solution = self.solve_lp(
+                    sensitivity=sensitivity, time_limit=time_limit,
+                    iteration_limit=iteration_limit, cancel=cancel
+                )
+
+            status = solution.status
+
+            if status not in ("Optimal", "Feasible"):
+                self._record_stats(solution)
+                if solution.stats.get("stopped"):
+                    raise SolveStopped(solution.stats["stopped"])
+                raise RuntimeError(f"設定された最適化問題に解が存在しません．ソルバーのステータス: {status}")
+
+            # --- forward solver log to Python stdout (GUI) ---
+            if log and solution.log:
+                print(solution.log)
+
+            relaxation = solution
+            proven = relaxation.status == "Optimal"
+            if integer:
+                remaining = None if deadline is None else deadline - time.perf_counter()
+                solution = self._solve_mip(relaxation, remaining, mip_gap, cancel)
+                if log and solution.log:
+                    print(solution.log)
+
+            with phase("post"):
+                result = self.result(solution)
+                if sensitivity and proven:
+                    result.sensitivity = sensitivity_report(relaxation, self.lp, self.presolve)
+                if integer and proven:
+                    result.lp_bound = round_result(relaxation.objective + self.params["special"], 2)
+
+        self._record_stats(solution)
+        if integer and proven:
+            self.stats["lp_objective"] = float(relaxation.objective)
+        result.stats = self.stats
+        return result
 
+    def _solve_mip(self, relaxation, time_limit, mip_gap, cancel=None):
+        with phase("heuristic"):
+            start = rounding_heuristic(self.lp, relaxation.x, self.backend, self.catalog)
 
+        if cancel is not None and cancel.is_set():
+            stopped = "cancelled"
+        elif time_limit is not None and time_limit <= 0:
+            stopped = "time_limit"
+        else:
+            stopped = None
+        if stopped is not None:
+            # no branch and bound left: the rounded start is the best there is
+            if start is None:
+                raise SolveStopped(stopped)
+            objective = float(self.lp.c @ start)
+            return LPSolution(
+                "Feasible", x=start, objective=objective, log="(rounding heuristic)",
+                stats={"backend": self.backend.name, "status": "Feasible",
+                       "objective": objective, "stopped": stopped}
+            )
+
+        with phase("mip"):
+            solution = self.backend.solve_mip(
+                self.lp, integer_columns(self.lp),
+                time_limit=time_limit, mip_gap=mip_gap, start=start, cancel=cancel
+            )
+
+        found = solution.status in ("Optimal", "Feasible")
+        if start is not None and (not found or self.lp.c @ start > solution.objective + 1e-9):
+            # the rounded start beats whatever branch and bound returned
+            objective = float(self.lp.c @ start)
+            return LPSolution(
+                "Feasible", x=start, objective=objective,
+                log=solution.log + "\n(rounding heuristic)",
+                stats={**solution.stats, "status": "Feasible", "objective": objective}
+            )
+        if not found:
+            if solution.stats.get("stopped"):
+                raise SolveStopped(solution.stats["stopped"])
+            raise RuntimeError(f"整数解が見つかりませんでした．ソルバーのステータス: {solution.status}")
+        return solution
+
+    def result(self, solution, sensitivity=False):
+        """
+        SenkaResult of an LPSolution from solve_lp (or a MIP solve)
+        """
+        result = summarize(
+            solution.x, self.lp, self.sortie_weights, self.senka, self.catalog,
+            days=self.params["days"], offsets=self.offsets, special=self.params["special"],
+            presolve=self.presolve
+        )
+        result.params = dict(self.params)
+        if sensitivity:
+            result.sensitivity = sensitivity_report(solution, self.lp, self.presolve)
+        return result
+
+
+def solve_senka(
+    sortie_weights,
+    senka,
+    maxproportion,
+    enable_short_bucket=True,
+    *,
+    activetime,
+    inactivetime,
+    sleeptime,
+    days,
+    max_money,
+    special,
+    initialfuel,
+    initialammo,
+    initialsteel,
+    initialbucket,
+    initialcond,
+    backend=None,
+    sensitivity=False,
+    presolve=True,
+    integer=False,
+    time_limit=None,
+    mip_gap=MIP_GAP,
+    iteration_limit=None,
+    cancel=None,
+    cache=None
+):
+    """
+    One-shot solve. Returns a SenkaResult; its sensitivity attribute holds
+    a sensitivity_report dict when sensitivity=True. integer and mip_gap
+    select integer mode; time_limit, iteration_limit and cancel stop the
+    solve early with its best feasible point (see SenkaModel.solve).
+
+    With a cache.ResultCache (or cache=True for the default one) an
+    identical earlier solve is returned from the cache.
+    """
+    params = {
+        "activetime": activetime,
+        "inactivetime": inactivetime,
+        "sleeptime": sleeptime,
+        "days": days,
+        "max_money": max_money,
+        "special": special,
+        "initialfuel": initialfuel,
+        "initialammo": initialammo,
+        "initialsteel": initialsteel,
+        "initialbucket": initialbucket,
+        "initialcond": initialcond,
+    }
+    options = {
+        "sensitivity": sensitivity, "integer": integer, "time_limit": time_limit,
+        "mip_gap": mip_gap, "iteration_limit": iteration_limit,
+    }
+
+    def solve():
+        model = SenkaModel(
+            sortie_weights,
+            senka,
+            maxproportion,
+            enable_short_bucket,
+            backend=backend,
+            presolve=presolve,
+            **params
+        )
+        return model.solve(**options, cancel=cancel)
+
+    if not cache:
+        return solve()
+
+    from cache import default_cache, result_key
+    if cache is True:
+        cache = default_cache()
+    backend = get_backend(backend)
+    key = result_key(
+        sortie_weights, senka, maxproportion, enable_short_bucket, params,
+        catalog=load_catalog(), backend=backend, presolve=presolve, **options
+    )
+    return cache.get_or_solve(key, solve)
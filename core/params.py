@@ -0,0 +1,103 @@
+# -----------------------------
+# Solve parameters
+# -----------------------------
+# Kept free of numpy / pandas so the GUI can build its form before the
+# solver side is imported.
+
+PARAM_KEYS = (
+    "activetime",
+    "inactivetime",
+    "sleeptime",
+    "days",
+    "max_money",
+    "special",
+    "initialfuel",
+    "initialammo",
+    "initialsteel",
+    "initialbucket",
+    "initialcond",
+)
+
+# defaults of the GUI parameter form
+PARAM_DEFAULTS = {
+    "activetime": 12,
+    "inactivetime": 6,
+    "sleeptime": 6,
+    "days": 31,
+    "max_money": 0,
+    "special": 3000,
+    "initialfuel": 200000,
+    "initialammo": 200000,
+    "initialsteel": 150000,
+    "initialbucket": 1900,
+    "initialcond": 0,
+}
+
+PARAM_LABELS = {
+    "activetime": "稼働時間",
+    "inactivetime": "遠征時間",
+    "sleeptime": "休息時間",
+    "days": "日数",
+    "max_money": "最大課金額",
+}
+
+OFFSET_KEYS = (
+    "initialfuel",
+    "initialammo",
+    "initialsteel",
+    "initialbucket",
+    "initialcond",
+)
+
+
+def parse_params(raw):
+    """
+    Convert raw parameter values (form strings, JSON or command-line values)
+    and apply the GUI's checks. Missing keys fall back to PARAM_DEFAULTS.
+    """
+    unknown = set(raw) - set(PARAM_KEYS)
+    if unknown:
+        raise ValueError(f"unknown parameters: {', '.join(sorted(unknown))}")
+
+    values = {**PARAM_DEFAULTS, **raw}
+
+    try:
+        # --- strict integer check for days ---
+        days = values["days"]
+        if isinstance(days, str):
+            if not days.isdigit():
+                raise ValueError("日数は整数で入力してください．")
+            days = int(days)
+        elif isinstance(days, float) and days.is_integer():
+            days = int(days)
+        elif isinstance(days, bool) or not isinstance(days, int):
+            raise ValueError("日数は整数で入力してください．")
+
+        params = {k: float(values[k]) for k in PARAM_KEYS if k != "days"}
+        params["days"] = days
+    except (TypeError, ValueError) as e:
+        raise ValueError(str(e) if str(e) else "パラメータの値が正しくありません．数値を入力してください．")
+
+    # ---- negativity check for first five parameters ----
+    for key, label in PARAM_LABELS.items():
+        if params[key] < 0:
+            raise ValueError(f"{label} は0以上でなければなりません．")
+
+    return {k: params[k] for k in PARAM_KEYS}
+
+
+# integer mode defaults (see SenkaModel.solve)
+MIP_TIME_LIMIT = 10.0   # seconds
+MIP_GAP = 1e-4          # relative
+
+
+def solve_time_limit(time_limit, integer):
+    """
+    Seconds a solve may run, None for no limit. time_limit=None is the
+    default of the mode (no limit for an LP, MIP_TIME_LIMIT in integer
+    mode) and inf lifts the limit in either mode.
+    """
+    if time_limit is None:
+        return MIP_TIME_LIMIT if integer else None
+    time_limit = float(time_limit)
+    return None if time_limit == float("inf") else time_limit
@@ -0,0 +1,220 @@
+import json
+import os
+
+import numpy as np
+
+
+# -----------------------------
+# Solve result
+# -----------------------------
+# One contiguous float array per decision block and per resource breakdown.
+# Breakdowns cover the first five resources (fuel, ammo, steel, bucket, cond).
+
+RESULT_FORMAT = 1
+
+DECISION_FIELDS = ("sortie", "exped_run", "exped_off", "exped_sleep", "shop")
+BREAKDOWN_FIELDS = ("spent_from_sorties", "earned_from_expeds", "bought_from_shop", "remaining")
+ARRAY_FIELDS = DECISION_FIELDS + BREAKDOWN_FIELDS
+
+
+class SenkaResult:
+    """
+    Result of one solve.
+
+    senka is the rounded total (special senka included); every name in
+    ARRAY_FIELDS is a float array rounded to 2 digits. sensitivity holds the
+    sensitivity_report dict when it was requested, stats the SenkaModel.stats
+    dict, params the solve parameters and sortie_names the sortie labels
+    when the caller knows them. lp_bound is set by integer solves: the LP
+    relaxation's senka, an upper bound on the integer senka. trajectory is
+    set by the daily model: a dict of per-day arrays (see daily.py).
+
+    save() / load() write .npz (arrays stored as-is) or .json.
+    """
+
+    def __init__(self, senka, sortie, exped_run, exped_off, exped_sleep, shop,
+                 spent_from_sorties, earned_from_expeds, bought_from_shop, remaining,
+                 *, sortie_names=None, params=None, sensitivity=None, stats=None, lp_bound=None,
+                 trajectory=None):
+        self.senka = float(senka)
+        self.sortie = np.asarray(sortie, dtype=float)
+        self.exped_run = np.asarray(exped_run, dtype=float)
+        self.exped_off = np.asarray(exped_off, dtype=float)
+        self.exped_sleep = np.asarray(exped_sleep, dtype=float)
+        self.shop = np.asarray(shop, dtype=float)
+        self.spent_from_sorties = np.asarray(spent_from_sorties, dtype=float)
+        self.earned_from_expeds = np.asarray(earned_from_expeds, dtype=float)
+        self.bought_from_shop = np.asarray(bought_from_shop, dtype=float)
+        self.remaining = np.asarray(remaining, dtype=float)
+        self.sortie_names = None if sortie_names is None else [str(n) for n in sortie_names]
+        self.params = params
+        self.sensitivity = sensitivity
+        self.stats = stats
+        self.lp_bound = None if lp_bound is None else float(lp_bound)
+        self.trajectory = None if trajectory is None else {
+            key: np.asarray(value, dtype=float) for key, value in trajectory.items()
+        }
+
+    @property
+    def exped_active(self):
+        """
+        Expedition hours while playing: run + off
+        """
+        return self.exped_run + self.exped_off
+
+    def __repr__(self):
+        return f"SenkaResult(senka={self.senka:.2f}, sorties={self.sortie.size})"
+
+    # -----------------------------
+    # JSON
+    # -----------------------------
+    def to_dict(self):
+        """
+        JSON-ready dict; arrays become lists
+        """
+        data = {
+            "format": RESULT_FORMAT,
+            "senka": self.senka,
+            "lp_bound": self.lp_bound,
+            **{field: getattr(self, field).tolist() for field in ARRAY_FIELDS},
+            "sortie_names": self.sortie_names,
+            "params": self.params,
+            "sensitivity": None,
+            "stats": self.stats,
+            "trajectory": None if self.trajectory is None else {
+                key: value.tolist() for key, value in self.trajectory.items()
+            },
+        }
+
+        if self.sensitivity is not None:
+            data["sensitivity"] = {
+                key: (
+                    {block: np.asarray(v).tolist() for block, v in value.items()}
+                    if isinstance(value, dict)
+                    else None if value is None else np.asarray(value).tolist()
+                )
+                for key, value in self.sensitivity.items()
+            }
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("format", RESULT_FORMAT) > RESULT_FORMAT:
+            raise ValueError(f"unsupported result format: {data['format']}")
+
+        sensitivity = data.get("sensitivity")
+        if sensitivity is not None:
+            sensitivity = {
+                key: (
+                    {block: np.asarray(v, dtype=float) for block, v in value.items()}
+                    if isinstance(value, dict)
+                    else None if value is None else np.asarray(value, dtype=float)
+                )
+                for key, value in sensitivity.items()
+            }
+
+        return cls(
+            data["senka"],
+            *(data[field] for field in ARRAY_FIELDS),
+            sortie_names=data.get("sortie_names"),
+            params=data.get("params"),
+            sensitivity=sensitivity,
+            stats=data.get("stats"),
+            lp_bound=data.get("lp_bound"),
+            trajectory=data.get("trajectory"),
+        )
+
+    # -----------------------------
+    # npz
+    # -----------------------------
+    def _npz_arrays(self):
+        arrays = {field: getattr(self, field) for field in ARRAY_FIELDS}
+        arrays["senka"] = np.array(self.senka)
+        if self.sortie_names is not None:
+            arrays["sortie_names"] = np.array(self.sortie_names, dtype=str)
+
+        if self.sensitivity is not None:
+            for key, value in self.sensitivity.items():
+                if isinstance(value, dict):
+                    for block, v in value.items():
+                        arrays[f"sensitivity.{key}.{block}"] = np.asarray(v)
+                elif value is not None:
+                    arrays[f"sensitivity.{key}"] = np.asarray(value)
+
+        for key, value in (self.trajectory or {}).items():
+            arrays[f"trajectory.{key}"] = value
+
+        # small non-array parts go along as one JSON string
+        meta = {
+            "format": RESULT_FORMAT,
+            "params": self.params,
+            "stats": self.stats,
+            "lp_bound": self.lp_bound,
+            "sensitivity_keys": None if self.sensitivity is None else list(self.sensitivity),
+            "trajectory_keys": None if self.trajectory is None else list(self.trajectory),
+        }
+        arrays["meta"] = np.array(json.dumps(meta, ensure_ascii=False))
+        return arrays
+
+    @classmethod
+    def _from_npz(cls, npz):
+        meta = json.loads(str(npz["meta"]))
+        if meta["format"] > RESULT_FORMAT:
+            raise ValueError(f"unsupported result format: {meta['format']}")
+
+        sensitivity = None
+        if meta["sensitivity_keys"] is not None:
+            sensitivity = {key: None for key in meta["sensitivity_keys"]}
+            for name in npz.files:
+                if not name.startswith("sensitivity."):
+                    continue
+                _, key, *block = name.split(".")
+                if block:
+                    if sensitivity[key] is None:
+                        sensitivity[key] = {}
+                    sensitivity[key][block[0]] = npz[name]
+                else:
+                    sensitivity[key] = npz[name]
+
+        trajectory = None
+        if meta.get("trajectory_keys") is not None:
+            trajectory = {key: npz[f"trajectory.{key}"] for key in meta["trajectory_keys"]}
+
+        return cls(
+            npz["senka"],
+            *(npz[field] for field in ARRAY_FIELDS),
+            sortie_names=list(npz["sortie_names"]) if "sortie_names" in npz.files else None,
+            params=meta["params"],
+            sensitivity=sensitivity,
+            stats=meta["stats"],
+            lp_bound=meta.get("lp_bound"),
+            trajectory=trajectory,
+        )
+
+    # -----------------------------
+    # Files
+    # -----------------------------
+    def save(self, path):
+        """
+        Write to .npz or .json, chosen by the extension
+        """
+        ext = os.path.splitext(path)[1].lower()
+        if ext == ".npz":
+            with open(path, "wb") as f:
+                np.savez(f, **self._npz_arrays())
+        elif ext == ".json":
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        else:
+            raise ValueError(f"unsupported result file: {ext} (.npz / .json)")
+
+    @classmethod
+    def load(cls, path):
+        ext = os.path.splitext(path)[1].lower()
+        if ext == ".npz":
+            with np.load(path, allow_pickle=False) as npz:
+                return cls._from_npz(npz)
+        if ext == ".json":
+            with open(path, "r", encoding="utf-8") as f:
+                return cls.from_dict(json.load(f))
+        raise ValueError(f"unsupported result file: {ext} (.npz / .json)")
@@ -0,0 +1,128 @@
+import csv
+
+
+# -----------------------------
+# Results as one flat table
+# -----------------------------
+# The results window and its CSV export show every number of a SenkaResult
+# as rows of
+#     (section, name, value, contribution, note)
+# contribution is the senka a row adds (sorties only, None elsewhere) and
+# note the allowable range of a shadow price. Filtering and sorting work on
+# these tuples, so only the rows that pass are ever handed to the widget.
+
+TABLE_COLUMNS = ("区分", "名前", "値", "戦果寄与", "範囲")
+
+RESOURCE_NAMES = ("燃料", "弾薬", "鋼材", "バケツ", "cond")
+
+# time is priced per second in the model; show it per hour
+SHADOW_ROWS = (
+    ("燃料", 1), ("弾薬", 1), ("鋼材", 1), ("バケツ", 1),
+    ("cond", 1), ("出撃時間(1h)", 3600), ("課金額", 1),
+)
+
+SENSITIVITY_SECTIONS = ("潜在価格（1単位あたりの戦果）", "出撃の被約費用", "課金アイテムの被約費用")
+
+# values are rounded to 2 digits; sensitivity values are not
+ZERO_TOL = 1e-9
+
+# sortable columns -> row index
+SORT_FIELDS = {"名前": 1, "値": 2, "戦果寄与": 3}
+
+
+def result_rows(result, expedition_names, shop_names, sortie_senka=None):
+    """
+    Every row of a SenkaResult in display order. sortie_senka (senka per
+    sortie, in result order) fills the contribution column of the sorties.
+    """
+    sortie_names = result.sortie_names or [f"sortie_{i}" for i in range(result.sortie.size)]
+    if sortie_senka is not None and len(sortie_senka) != result.sortie.size:
+        sortie_senka = None
+
+    rows = [
+        ("出撃数", name, float(value), None if sortie_senka is None else float(value * per_sortie), "")
+        for name, value, per_sortie in zip(
+            sortie_names, result.sortie,
+            result.sortie if sortie_senka is None else sortie_senka
+        )
+    ]
+
+    sections = [
+        ("稼働する遠征の時間数", expedition_names, result.exped_active),
+        ("休息時間の遠征選択", expedition_names, result.exped_sleep),
+        ("アイテム屋からの購入数", shop_names, result.shop),
+        ("出撃による消費資源", RESOURCE_NAMES, result.spent_from_sorties),
+        ("遠征による獲得資源", RESOURCE_NAMES, result.earned_from_expeds),
+        ("課金による獲得資源", RESOURCE_NAMES, result.bought_from_shop),
+        ("最終残量", RESOURCE_NAMES, result.remaining),
+    ]
+    for section, names, values in sections:
+        rows.extend((section, name, float(value), None, "") for name, value in zip(names, values))
+
+    sensitivity = result.sensitivity
+    if sensitivity is not None:
+        prices = sensitivity["shadow_prices"]
+        ranges = sensitivity["shadow_ranges"]
+        for i, (name, scale) in enumerate(SHADOW_ROWS):
+            note = "" if ranges is None else f"{ranges[i, 0] / scale:.4g} ～ {ranges[i, 1] / scale:.4g}"
+            rows.append((SENSITIVITY_SECTIONS[0], name, float(prices[i] * scale), None, note))
+
+        reduced_costs = sensitivity["reduced_costs"]
+        for section, names, values in (
+            (SENSITIVITY_SECTIONS[1], sortie_names, reduced_costs["sortie"]),
+            (SENSITIVITY_SECTIONS[2], shop_names, reduced_costs["shop"]),
+        ):
+            rows.extend((section, name, float(value), None, "") for name, value in zip(names, values))
+
+    return rows
+
+
+def visible_rows(rows, *, hide_zero=False, query="", sort=None, descending=True):
+    """
+    Rows left after hiding zeros and filtering by name (case-insensitive
+    substring), sorted by the SORT_FIELDS column sort within each section.
+    Sections keep their order; rows without a value for the sort column go
+    last.
+    """
+    query = query.strip().lower()
+    picked = [
+        row for row in rows
+        if not (hide_zero and abs(row[2]) < ZERO_TOL)
+        and (not query or query in str(row[1]).lower())
+    ]
+    if sort is None:
+        return picked
+
+    field = SORT_FIELDS[sort]
+    section_order = {}
+    for row in rows:
+        section_order.setdefault(row[0], len(section_order))
+
+    def value_key(row):
+        return str(row[field]).lower() if field == 1 else row[field]
+
+    present = sorted((row for row in picked if row[field] is not None), key=value_key, reverse=descending)
+    missing = [row for row in picked if row[field] is None]
+    # stable: keeps the value order inside each section
+    return sorted(present + missing, key=lambda row: section_order[row[0]])
+
+
+def format_row(row):
+    """
+    Display strings for one row, in TABLE_COLUMNS order
+    """
+    section, name, value, contribution, note = row
+    text = f"{value:.4g}" if section in SENSITIVITY_SECTIONS else f"{value:.2f}"
+    return (section, name, text, "" if contribution is None else f"{contribution:.2f}", note)
+
+
+def write_csv(path, rows):
+    """
+    Write rows with unrounded values; utf-8 with BOM so Excel reads the
+    Japanese headers
+    """
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(TABLE_COLUMNS)
+        for section, name, value, contribution, note in rows:
+            writer.writerow((section, name, value, "" if contribution is None else contribution, note))
@@ -0,0 +1,354 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from catalog import load_catalog
+from instrument import collect, phase
+from lp import build_robust_lp, integer_columns
+from model import (
+    PARAM_KEYS, SHADOW_KEYS, build_model, prepare_sorties, presolve_expeditions, round_result, summarize
+)
+from params import MIP_GAP, solve_time_limit
+from solvers import SolveStopped, get_backend
+
+
+# -----------------------------
+# Robust (sampled) model
+# -----------------------------
+# The sortie columns are simulator averages and real runs vary, so a plan
+# that exactly balances the means runs dry in about half of all months.
+# Here every sortie's costs (fuel, ammo, steel, bucket, cond, seconds) are
+# drawn K times, from a normal distribution around the sheet values with a
+# relative standard deviation (noise) or from samples measured by the
+# caller. The LP still maximizes expected senka, but the balance of every
+# resource that varies must hold up in the worst (1 - level) share of the
+# samples on average (CVaR, see lp.build_robust_lp). The plan is then
+# checked on a fresh, larger set of samples spread over worker threads,
+# next to the ordinary (nominal) plan.
+
+ROBUST_LEVEL = 0.9
+ROBUST_NOISE = 0.1
+ROBUST_SAMPLES = 200
+EVAL_SAMPLES = 20000
+ROBUST_WORKERS = min(4, os.cpu_count() or 1)
+
+# evaluation chunks hold at most this many sampled costs (~64 MB)
+EVAL_CHUNK_VALUES = 8_000_000
+# LP solutions are feasible up to the solver's tolerance
+BALANCE_TOL = 1e-6
+
+RESOURCE_KEYS = SHADOW_KEYS[:6]     # fuel ammo steel bucket cond time
+
+
+def parse_noise(noise, n_sorties):
+    """
+    Relative standard deviations as an array broadcastable to (n_sorties, 6)
+    """
+    try:
+        noise = np.asarray(noise, dtype=float)
+        np.broadcast_to(noise, (n_sorties, 6))
+    except (TypeError, ValueError):
+        raise ValueError("noise must be a number, 6 values (one per resource) or an (n_sorties, 6) array")
+    if not np.isfinite(noise).all() or (noise < 0).any():
+        raise ValueError("noise must be finite and non-negative")
+    return noise
+
+
+def sample_sorties(sortie_weights, noise, n_samples, seed=None):
+    """
+    (n_samples, n_sorties, 6) normal draws around sortie_weights (sheet
+    convention, costs positive) with standard deviation |w| * noise, in one
+    vectorized pass. A cost never turns into an income and vice versa.
+    """
+    w = np.asarray(sortie_weights, dtype=float)
+    rng = np.random.default_rng(seed)
+
+    draws = rng.standard_normal((n_samples,) + w.shape)
+    draws *= np.abs(w) * noise
+    draws += w
+
+    positive = np.broadcast_to(w >= 0, draws.shape)
+    np.maximum(draws, 0, out=draws, where=positive)
+    np.minimum(draws, 0, out=draws, where=~positive)
+    return draws
+
+
+def balance_summary(balance, level):
+    """
+    Statistics of a (K, 6) array of end-of-month resource balances
+    """
+    holds = balance >= -BALANCE_TOL
+    worst = max(1, int(np.ceil((1 - level) * len(balance))))
+    tail = np.partition(balance, worst - 1, axis=0)[:worst]
+    return {
+        "samples": len(balance),
+        "holds": float(holds.all(axis=1).mean()),
+        "holds_by_resource": dict(zip(RESOURCE_KEYS, holds.mean(axis=0).tolist())),
+        "expected_shortfall": dict(zip(RESOURCE_KEYS, np.maximum(-balance, 0).mean(axis=0).tolist())),
+        "cvar": dict(zip(RESOURCE_KEYS, (-tail.mean(axis=0)).tolist())),
+    }
+
+
+def _chunk_balances(plans, sortie_weights, noise, samples, n_samples, seed):
+    if samples is None:
+        samples = sample_sorties(sortie_weights, noise, n_samples, seed)
+    # sheet convention: sorties subtract their costs
+    return [base - np.tensordot(samples, sortie, axes=([1], [0])) for sortie, base in plans]
+
+
+def evaluate_plans(plans, sortie_weights, *, noise=None, samples=None, n_samples=EVAL_SAMPLES,
+                   level=ROBUST_LEVEL, seed=None, workers=ROBUST_WORKERS):
+    """
+    How each plan's resource balances fare over sampled sortie costs.
+
+    plans is a list of (sortie, base): sortie counts in input order and the
+    six balances without the sorties (offsets plus expedition and shop
+    income). The samples are either given (sheet convention) or drawn with
+    noise around sortie_weights. Either way they are split into chunks of
+    bounded size that run on a thread pool, numpy releasing the GIL, and
+    every drawn chunk gets its own child seed. All plans see the same
+    samples. Returns one balance_summary dict per plan.
+    """
+    n_sorties = len(sortie_weights)
+    total = len(samples) if samples is not None else n_samples
+    n_chunks = max(workers, int(np.ceil(total * n_sorties * 6 / EVAL_CHUNK_VALUES)))
+
+    if samples is not None:
+        chunks = [(None, part, None, None) for part in np.array_split(samples, n_chunks) if len(part)]
+    else:
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        sizes = [len(part) for part in np.array_split(np.empty(total), n_chunks)]
+        chunks = [
+            (noise, None, size, child)
+            for size, child in zip(sizes, seed.spawn(n_chunks)) if size
+        ]
+
+    with ThreadPoolExecutor(workers, thread_name_prefix="robust") as pool:
+        parts = list(pool.map(lambda chunk: _chunk_balances(plans, sortie_weights, *chunk), chunks))
+
+    return [
+        balance_summary(np.concatenate([part[i] for part in parts]), level)
+        for i in range(len(plans))
+    ]
+
+
+class RobustSenkaModel:
+    """
+    Senka LP over sampled sortie costs with a CVaR constraint for every
+    resource that varies.
+
+        model = RobustSenkaModel(w, s, m, noise=0.1, level=0.9, **params)
+        result = model.solve()
+        result.stats["robust"]["evaluation"]["holds"]   # share of fresh samples that hold up
+
+    noise is the relative standard deviation of the costs: a number, six
+    values (fuel, ammo, steel, bucket, cond, seconds) or one row per
+    sortie. samples, when given, replaces the normal draws: (K, n_sorties,
+    6) costs in the sheet's convention, e.g. logged from real runs; the
+    evaluation then reuses them. Duplicate and dominated sorties are not
+    presolved away, since dominance on the means says nothing about the
+    samples; dominated expeditions still are.
+    """
+
+    def __init__(
+        self,
+        sortie_weights,
+        senka,
+        maxproportion,
+        enable_short_bucket=True,
+        *,
+        backend=None,
+        catalog=None,
+        presolve=True,
+        level=ROBUST_LEVEL,
+        noise=ROBUST_NOISE,
+        samples=None,
+        n_samples=ROBUST_SAMPLES,
+        eval_samples=EVAL_SAMPLES,
+        seed=0,
+        workers=ROBUST_WORKERS,
+        **params
+    ):
+        missing = set(PARAM_KEYS) - set(params)
+        if missing:
+            raise TypeError(f"missing parameters: {', '.join(sorted(missing))}")
+        if not 0 < level < 1:
+            raise ValueError("level must be between 0 and 1")
+
+        self.sortie_weights, self.senka, self.maxproportion = prepare_sorties(
+            sortie_weights, senka, maxproportion
+        )
+        n_sorties = len(self.senka)
+        self.enable_short_bucket = enable_short_bucket
+        self.catalog = load_catalog() if catalog is None else catalog
+        self.params = {k: params[k] for k in PARAM_KEYS}
+        self.backend = get_backend(backend)
+        self.level = float(level)
+        self.eval_samples = int(eval_samples)
+        self.workers = int(workers)
+        # one stream for the LP samples, one for the evaluation
+        self._seeds = np.random.SeedSequence(seed).spawn(2)
+
+        self._timings = {}
+        self.stats = None
+
+        with collect(self._timings):
+            with phase("sample"):
+                if samples is None:
+                    self.noise = parse_noise(noise, n_sorties)
+                    samples = sample_sorties(-self.sortie_weights, self.noise, int(n_samples), self._seeds[0])
+                else:
+                    self.noise = None
+                    samples = np.asarray(samples, dtype=float)
+                    if samples.ndim != 3 or samples.shape[1:] != (n_sorties, 6) or len(samples) < 1:
+                        raise ValueError("samples must have shape (n_samples, n_sorties, 6)")
+                self.samples = samples
+                # resources whose costs actually vary get scenario rows
+                self.resources = np.flatnonzero(np.ptp(samples, axis=0).any(axis=0))
+
+            with phase("presolve"):
+                pruned, self._pruned_expeditions = None, []
+                if presolve:
+                    pruned, self._pruned_expeditions = presolve_expeditions(
+                        self.catalog, enable_short_bucket, self.params["sleeptime"]
+                    )
+
+            with phase("build"):
+                self.nominal, self.offsets = build_model(
+                    self.sortie_weights,
+                    self.senka,
+                    self.maxproportion,
+                    enable_short_bucket,
+                    self.catalog,
+                    pruned=pruned,
+                    **self.params
+                )
+                self.lp = build_robust_lp(self.nominal, -samples, self.offsets, self.level, self.resources)
+
+    @property
+    def presolve_removed(self):
+        return self._pruned_expeditions
+
+    def _record_stats(self, solution):
+        self.stats = {
+            "timings": self._timings,
+            "rows": self.lp.n_rows,
+            "cols": self.lp.n_cols,
+            "nnz": int(self.lp.nnz),
+            "presolve": self.presolve_removed,
+            **solution.stats,
+        }
+        self._timings = {}
+
+    def evaluate(self, xs):
+        """
+        evaluate_plans for solution vectors of self.lp or self.nominal
+        """
+        lp = self.nominal
+        resource_rows = lp.A[lp.rows["resource"]]
+        plans = []
+        for x in xs:
+            x = np.asarray(x, dtype=float)[:lp.n_cols]
+            sortie = x[lp.columns["sortie"]]
+            base = resource_rows @ x + self.offsets - self.sortie_weights.T @ sortie
+            plans.append((sortie, base))
+
+        return evaluate_plans(
+            plans, -self.sortie_weights,
+            noise=self.noise,
+            samples=self.samples if self.noise is None else None,
+            n_samples=self.eval_samples,
+            level=self.level,
+            seed=self._seeds[1],
+            workers=self.workers
+        )
+
+    def solve(self, integer=False, time_limit=None, mip_gap=MIP_GAP, compare=True,
+              iteration_limit=None, cancel=None):
+        """
+        Solve and return a SenkaResult whose stats["robust"] holds the
+        level, the sampled resources and the evaluation of the plan; with
+        compare=True also the senka and evaluation of the nominal LP plan.
+        integer=True runs branch and bound on the robust LP (no rounding
+        start) and sets lp_bound as in SenkaModel.solve.
+
+        The limits and cancel act as in SenkaModel.solve, except that the
+        robust relaxation must be solved to optimality: stopping it raises
+        SolveStopped. The nominal comparison gets what is left of the limits
+        and is left out of stats["robust"] when it does not finish.
+        """
+        time_limit = solve_time_limit(time_limit, integer)
+        deadline = None if time_limit is None else time.perf_counter() + time_limit
+        limits = {"time_limit": time_limit, "iteration_limit": iteration_limit, "cancel": cancel}
+
+        with collect(self._timings):
+            with phase("solve"):
+                solution = self.backend.solve(self.lp, **limits)
+
+            if solution.status != "Optimal":
+                self._record_stats(solution)
+                if solution.stats.get("stopped"):
+                    raise SolveStopped(solution.stats["stopped"])
+                raise RuntimeError(f"設定された最適化問題に解が存在しません．ソルバーのステータス: {solution.status}")
+
+            if solution.log:
+                print(solution.log)
+
+            relaxation = solution
+            if integer:
+                remaining = None if deadline is None else max(deadline - time.perf_counter(), 0.0)
+                with phase("mip"):
+                    solution = self.backend.solve_mip(
+                        self.lp, integer_columns(self.lp), time_limit=remaining, mip_gap=mip_gap, cancel=cancel
+                    )
+                if solution.status not in ("Optimal", "Feasible"):
+                    if solution.stats.get("stopped"):
+                        raise SolveStopped(solution.stats["stopped"])
+                    raise RuntimeError(f"整数解が見つかりませんでした．ソルバーのステータス: {solution.status}")
+                if solution.log:
+                    print(solution.log)
+
+            xs = [solution.x]
+            nominal = None
+            # the comparison shares the limits; with no time left it is skipped
+            remaining = None if deadline is None else deadline - time.perf_counter()
+            if compare and (remaining is None or remaining > 0):
+                with phase("nominal"):
+                    nominal = self.backend.solve(
+                        self.nominal, time_limit=remaining, iteration_limit=iteration_limit, cancel=cancel
+                    )
+                if nominal.status == "Optimal":
+                    xs.append(nominal.x)
+
+            with phase("evaluate"):
+                evaluations = self.evaluate(xs)
+
+            with phase("post"):
+                special = self.params["special"]
+                result = summarize(
+                    solution.x, self.lp, self.sortie_weights, self.senka, self.catalog,
+                    days=self.params["days"], offsets=self.offsets, special=special
+                )
+                result.params = dict(self.params)
+                if integer:
+                    result.lp_bound = round_result(relaxation.objective + special, 2)
+
+        self._record_stats(solution)
+        if integer:
+            self.stats["lp_objective"] = float(relaxation.objective)
+        self.stats["robust"] = {
+            "level": self.level,
+            "samples": len(self.samples),
+            "resources": [RESOURCE_KEYS[r] for r in self.resources],
+            "evaluation": {**evaluations[0], "out_of_sample": self.noise is not None},
+        }
+        if len(evaluations) > 1:
+            self.stats["robust"]["nominal"] = {
+                "senka": round_result(nominal.objective + special, 2),
+                "evaluation": evaluations[1],
+            }
+        result.stats = self.stats
+        return result
@@ -0,0 +1,123 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from cache import result_key
+from catalog import load_catalog
+from model import MIP_GAP, SenkaModel
+from solvers import get_backend
+
+
+# -----------------------------
+# Concurrent what-if scenarios
+# -----------------------------
+# A scenario is one parameter set solved against the loaded sortie data,
+# in the same dict form the CLI uses:
+#     {"name": ..., "params": {...}, "enable_short_bucket": bool,
+#      "integer": bool, "time_limit": s, "mip_gap": gap, "iteration_limit": n}
+# Every scenario builds its own SenkaModel (models are not thread-safe) and
+# HiGHS releases the GIL while it runs, so a thread pool overlaps solves.
+# Scenario solves print no solver logs: sys.stdout is shared with the main
+# solve, whose log the GUI console shows.
+
+SCENARIO_WORKERS = min(4, os.cpu_count() or 1)
+
+RESOURCE_LABELS = ("燃料", "弾薬", "鋼材", "バケツ", "cond")
+
+
+def run_scenario(sorties, scenario, *, catalog=None, backend=None, cache=None, cancel=None):
+    """
+    SenkaResult of one scenario; sorties is (sortie_weights, senka,
+    maxproportion). With a ResultCache an identical earlier solve is reused.
+    cancel (a threading.Event) stops the solve once set; see SenkaModel.solve.
+    """
+    sortie_weights, senka, maxproportion = sorties
+    catalog = load_catalog() if catalog is None else catalog
+    backend = get_backend(backend)
+    params = scenario["params"]
+    enable_short_bucket = scenario.get("enable_short_bucket", True)
+    solve_options = {
+        "integer": bool(scenario.get("integer", False)),
+        "time_limit": scenario.get("time_limit"),
+        "mip_gap": float(scenario.get("mip_gap", MIP_GAP)),
+        "iteration_limit": scenario.get("iteration_limit"),
+    }
+
+    def solve():
+        model = SenkaModel(
+            sortie_weights, senka, maxproportion,
+            enable_short_bucket=enable_short_bucket, backend=backend, catalog=catalog, **params
+        )
+        return model.solve(**solve_options, cancel=cancel, log=False)
+
+    if cache is None:
+        return solve()
+    key = result_key(
+        sortie_weights, senka, maxproportion, enable_short_bucket, params,
+        catalog=catalog, backend=backend, presolve=True, sensitivity=False, **solve_options
+    )
+    return cache.get_or_solve(key, solve)
+
+
+class ScenarioPool:
+    """
+    Thread pool for scenarios.
+
+        pool = ScenarioPool()
+        cancel = threading.Event()
+        future = pool.submit((w, s, m), scenario, cache=default_cache(), cancel=cancel)
+        future.cancel()     # only succeeds while the scenario is queued
+        cancel.set()        # stops a running one
+        future.result()     # SenkaResult, or SolveStopped
+
+    A running solve stops at the solver's next check of cancel and returns
+    its best point so far (stats["stopped"] == "cancelled"); callers that
+    cancel it usually drop that result.
+    """
+
+    def __init__(self, max_workers=SCENARIO_WORKERS):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="scenario")
+
+    def submit(self, sorties, scenario, *, catalog=None, backend=None, cache=None, cancel=None):
+        return self._executor.submit(
+            run_scenario, sorties, scenario, catalog=catalog, backend=backend, cache=cache, cancel=cancel
+        )
+
+    def shutdown(self, wait=False):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+def comparison_table(results, baseline=None, *, sortie_names=None, shop_names=None):
+    """
+    Side-by-side table of solved scenarios.
+
+    results maps scenario name -> SenkaResult (None for unsolved ones,
+    which get an empty column). Rows are senka, sorties, shop purchases
+    and the remaining resources. With baseline (a name in results) every
+    other scenario also gets a "Δ name" column of its difference to it.
+    """
+    import pandas as pd
+
+    columns = {}
+    for name, result in results.items():
+        if result is None:
+            columns[name] = pd.Series(dtype=float)
+            continue
+        sorties = sortie_names or result.sortie_names or [f"sortie_{i}" for i in range(result.sortie.size)]
+        shops = shop_names or [f"shop_{i}" for i in range(result.shop.size)]
+        values = {"戦果": result.senka}
+        values.update({f"出撃: {n}": v for n, v in zip(sorties, result.sortie)})
+        values.update({f"購入: {n}": v for n, v in zip(shops, result.shop)})
+        values.update({f"残量: {n}": v for n, v in zip(RESOURCE_LABELS, result.remaining)})
+        columns[name] = pd.Series(values, dtype=float)
+
+    table = pd.DataFrame(columns)
+    if baseline is None or baseline not in table or table[baseline].isna().all():
+        return table
+
+    ordered = {}
+    for name in table.columns:
+        ordered[name] = table[name]
+        if name != baseline:
+            ordered[f"Δ {name}"] = table[name] - table[baseline]
+    return pd.DataFrame(ordered)
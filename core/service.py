@@ -0,0 +1,507 @@
+"""
+Local optimization service (python -m service from core/).
+
+    python -m service                          # http://127.0.0.1:8765
+    python -m service --port 9000 --workers 4 --queue 128
+
+Keeps a pool of solver processes warm (numpy, the solver and the catalog
+already loaded and one small model solved) so requests skip the start-up
+cost of the GUI / CLI.
+
+POST /solve takes a JSON object with the sortie data and the solve_senka
+arguments; missing parameters fall back to the GUI defaults:
+
+    {"sortie_weights": [[fuel, ammo, steel, bucket, cond, seconds], ...],
+     "senka": [...], "maxproportion": [...], "sortie_names": [...],
+     "enable_short_bucket": true, "activetime": 12, "max_money": 3000, ...,
+     "backend": "highs", "sensitivity": false, "presolve": true,
+     "integer": false, "time_limit": 60, "mip_gap": 0.001, "iteration_limit": null}
+
+and answers SenkaResult.to_dict() as JSON. Errors are {"error": message}
+with 400 (bad request), 422 (no solution), 503 (queue full, retry later)
+or 500. Identical requests that arrive while one is queued or solving
+share its answer; finished ones come from the result cache.
+
+GET /metrics reports request counters, queue depth, latency percentiles
+and throughput; GET /health answers {"status": "ok"}.
+
+    from service import post_solve
+    post_solve("http://127.0.0.1:8765", {"sortie_weights": ..., ...})
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from cache import default_cache, result_key
+from catalog import load_catalog
+from model import (
+    MIP_GAP, PARAM_DEFAULTS, PARAM_KEYS, derive_parameters, parse_params, prepare_sorties, solve_senka
+)
+from solvers import get_backend
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+DEFAULT_QUEUE = 64
+
+MAX_HEADER_BYTES = 64 * 2**10
+MAX_BODY_BYTES = 32 * 2**20
+
+# latency percentiles and throughput cover the most recent requests
+METRICS_WINDOW = 1000
+
+SORTIE_FIELDS = ("sortie_weights", "senka", "maxproportion")
+SOLVE_OPTIONS = {
+    "enable_short_bucket": True,
+    "backend": None,
+    "sensitivity": False,
+    "presolve": True,
+    "integer": False,
+    "time_limit": None,
+    "mip_gap": MIP_GAP,
+    "iteration_limit": None,
+}
+
+# solved once by every worker as it starts: (sortie_weights, senka, maxproportion)
+# with a kira sortie (cond) and a capped one, so every block of the model is used
+WARMUP_SORTIES = (
+    [[120, 150, 40, 0.5, 0, 180], [200, 180, 0, 1.2, -20, 300], [60, 80, 30, 0.2, 0, 120]],
+    [1.5, 2.5, 0.8],
+    [1.0, 1.0, 0.3],
+)
+
+# options that must be JSON true / false; "no" or 0 would silently pass bool()
+BOOL_OPTIONS = ("enable_short_bucket", "sensitivity", "presolve", "integer")
+
+HTTP_REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    413: "Payload Too Large", 422: "Unprocessable Entity", 500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class RequestError(ValueError):
+    """
+    A request the service answers with an error status
+    """
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+# -----------------------------
+# Requests
+# -----------------------------
+def _check_options(options):
+    """
+    Type and range checks of the solve options, in place
+    """
+    wrong = [k for k in BOOL_OPTIONS if not isinstance(options[k], bool)]
+    if wrong:
+        raise ValueError(f"must be true or false: {', '.join(wrong)}")
+
+    def number(key, positive):
+        value = options[key]
+        if (isinstance(value, bool) or not isinstance(value, (int, float)) or not np.isfinite(value)
+                or value < 0 or (positive and value == 0)):
+            raise ValueError(f"{key} must be a finite number {'above' if positive else 'of at least'} 0")
+        return float(value)
+
+    # time_limit null is the default of the mode (see params.solve_time_limit)
+    if options["time_limit"] is not None:
+        options["time_limit"] = number("time_limit", positive=True)
+    options["mip_gap"] = number("mip_gap", positive=False)
+
+    limit = options["iteration_limit"]
+    if limit is not None and (isinstance(limit, bool) or not isinstance(limit, int) or limit < 1):
+        raise ValueError("iteration_limit must be a positive integer")
+
+
+def parse_request(data):
+    """
+    Validate a /solve payload; returns the job dict handed to a worker,
+    including its result cache key
+    """
+    if not isinstance(data, dict):
+        raise RequestError("request body must be a JSON object")
+
+    missing = [k for k in SORTIE_FIELDS if k not in data]
+    if missing:
+        raise RequestError(f"missing fields: {', '.join(missing)}")
+
+    unknown = set(data) - set(SORTIE_FIELDS) - set(PARAM_KEYS) - set(SOLVE_OPTIONS) - {"sortie_names"}
+    if unknown:
+        raise RequestError(f"unknown fields: {', '.join(sorted(unknown))}")
+
+    try:
+        sorties = [np.asarray(data[k], dtype=float) for k in SORTIE_FIELDS]
+        prepare_sorties(*sorties)
+        params = parse_params({k: data[k] for k in PARAM_KEYS if k in data})
+        # the checks solve_senka would otherwise fail in the worker with
+        derive_parameters(**params)
+        options = {k: data.get(k, default) for k, default in SOLVE_OPTIONS.items()}
+        _check_options(options)
+        backend = get_backend(options["backend"])
+    except (TypeError, ValueError, RuntimeError) as e:
+        raise RequestError(str(e))
+
+    options["backend"] = backend.name
+    key = result_key(
+        *sorties, options["enable_short_bucket"], params,
+        catalog=load_catalog(), backend=backend, presolve=options["presolve"],
+        sensitivity=options["sensitivity"], integer=options["integer"],
+        time_limit=options["time_limit"], mip_gap=options["mip_gap"],
+        iteration_limit=options["iteration_limit"]
+    )
+
+    return {
+        "key": key,
+        "sorties": sorties,
+        "sortie_names": data.get("sortie_names"),
+        "params": params,
+        "options": options,
+    }
+
+
+# -----------------------------
+# Worker processes
+# -----------------------------
+def _init_worker(quiet):
+    """
+    Runs once in every worker process: load everything a solve needs and
+    solve one small model so the first request is as fast as the rest
+    """
+    if quiet:
+        sys.stdout = open(os.devnull, "w")
+
+    solve_senka(*WARMUP_SORTIES, **PARAM_DEFAULTS)
+
+
+def _ping():
+    # held briefly so that concurrent pings land on different processes
+    time.sleep(0.1)
+    return os.getpid()
+
+
+def solve_job(job, use_cache=True):
+    """
+    Worker side of one request: (status, JSON-ready body)
+    """
+    options = dict(job["options"])
+    enable_short_bucket = options.pop("enable_short_bucket")
+
+    def solve():
+        return solve_senka(*job["sorties"], enable_short_bucket, **options, **job["params"])
+
+    try:
+        result = default_cache().get_or_solve(job["key"], solve) if use_cache else solve()
+    except ValueError as e:
+        return 400, {"error": str(e)}
+    except RuntimeError as e:
+        return 422, {"error": str(e)}
+
+    result.sortie_names = job["sortie_names"]
+    return 200, result.to_dict()
+
+
+# -----------------------------
+# Metrics
+# -----------------------------
+class ServiceMetrics:
+    """
+    Request counters and the latency (queue wait + solve) of the last
+    METRICS_WINDOW answered requests
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.counters = {
+            "requests": 0, "completed": 0, "failed": 0, "rejected": 0,
+            "deduplicated": 0, "cache_hits": 0,
+        }
+        self.latency = deque(maxlen=METRICS_WINDOW)
+        self.solve_time = deque(maxlen=METRICS_WINDOW)
+        self.finished = deque(maxlen=METRICS_WINDOW)
+
+    def record(self, status, latency, solve_time, cached):
+        self.counters["completed" if status == 200 else "failed"] += 1
+        self.counters["cache_hits"] += bool(cached)
+        self.latency.append(latency)
+        self.solve_time.append(solve_time)
+        self.finished.append(time.monotonic())
+
+    @staticmethod
+    def _percentiles(values):
+        if not values:
+            return None
+        values = np.asarray(values) * 1000
+        return {
+            "mean": round(float(values.mean()), 2),
+            "p50": round(float(np.percentile(values, 50)), 2),
+            "p95": round(float(np.percentile(values, 95)), 2),
+            "max": round(float(values.max()), 2),
+        }
+
+    def snapshot(self, **gauges):
+        now = time.monotonic()
+        uptime = now - self.started
+        recent = [t for t in self.finished if now - t <= 60]
+        return {
+            "uptime_s": round(uptime, 1),
+            **self.counters,
+            **gauges,
+            "throughput_per_s": round(self.counters["completed"] / uptime, 3) if uptime else 0.0,
+            "throughput_last_minute_per_s": round(len(recent) / min(60.0, uptime), 3) if uptime else 0.0,
+            "latency_ms": self._percentiles(self.latency),
+            "solve_ms": self._percentiles(self.solve_time),
+        }
+
+
+# -----------------------------
+# Server
+# -----------------------------
+class SolveService:
+    """
+    asyncio HTTP front end, bounded request queue and solver process pool.
+
+        service = SolveService(workers=2)
+        asyncio.run(service.serve())
+
+    Each of the workers dispatcher tasks takes one request off the queue at
+    a time and runs it in the process pool, so at most `workers` solves run
+    and at most queue_size requests wait; beyond that /solve answers 503.
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, *, workers=DEFAULT_WORKERS,
+                 queue_size=DEFAULT_QUEUE, use_cache=True, quiet=True):
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.queue_size = queue_size
+        self.use_cache = use_cache
+        self.quiet = quiet
+        self.metrics = ServiceMetrics()
+        self._queue = None
+        self._pending = {}
+        self._busy = 0
+        self._executor = None
+        self._server = None
+
+    async def start(self):
+        """
+        Start the warm worker pool and listen; returns the bound port
+        """
+        loop = asyncio.get_running_loop()
+        # parse_request hashes the catalog and resolves the backend
+        load_catalog()
+        get_backend()
+        self._queue = asyncio.Queue(self.queue_size)
+        self._executor = ProcessPoolExecutor(
+            self.workers, initializer=_init_worker, initargs=(self.quiet,)
+        )
+        # one ping per worker at once: every process starts (and warms up) now
+        pids = await asyncio.gather(*(
+            loop.run_in_executor(self._executor, _ping) for _ in range(self.workers)
+        ))
+        self._dispatchers = [asyncio.create_task(self._dispatch()) for _ in range(self.workers)]
+
+        self._server = await asyncio.start_server(
+            self._handle, self.host, self.port, limit=MAX_HEADER_BYTES
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        print(
+            f"serving on http://{self.host}:{self.port} "
+            f"({len(set(pids))} warm workers, queue {self.queue_size})",
+            file=sys.stderr
+        )
+        return self.port
+
+    async def serve(self):
+        await self.start()
+        try:
+            async with self._server:
+                await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+        for task in getattr(self, "_dispatchers", []):
+            task.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job, future, queued_at = await self._queue.get()
+            self._busy += 1
+            started = time.monotonic()
+            try:
+                status, body = await loop.run_in_executor(
+                    self._executor, solve_job, job, self.use_cache
+                )
+            except Exception as e:
+                status, body = 500, {"error": f"{type(e).__name__}: {e}"}
+            finally:
+                self._busy -= 1
+                self._pending.pop(job["key"], None)
+                self._queue.task_done()
+
+            finished = time.monotonic()
+            cached = status == 200 and (body.get("stats") or {}).get("cache")
+            self.metrics.record(status, finished - queued_at, finished - started, cached)
+            if not future.done():
+                future.set_result((status, body))
+
+    async def submit(self, job):
+        """
+        (status, body) of a parsed job; joins an identical pending request
+        """
+        future = self._pending.get(job["key"])
+        if future is not None:
+            self.metrics.counters["deduplicated"] += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((job, future, time.monotonic()))
+        except asyncio.QueueFull:
+            self.metrics.counters["rejected"] += 1
+            raise RequestError("queue is full, retry later", 503)
+        self._pending[job["key"]] = future
+        return await asyncio.shield(future)
+
+    def snapshot(self):
+        return self.metrics.snapshot(
+            queue_depth=self._queue.qsize() if self._queue else 0,
+            queue_size=self.queue_size,
+            in_flight=self._busy,
+            workers=self.workers,
+        )
+
+    async def _route(self, method, path, body):
+        if path == "/health":
+            return 200, {"status": "ok"}
+        if path == "/metrics":
+            return 200, self.snapshot()
+        if path != "/solve":
+            return 404, {"error": f"no such endpoint: {path}"}
+        if method != "POST":
+            return 405, {"error": "use POST"}
+
+        self.metrics.counters["requests"] += 1
+        try:
+            data = json.loads(body.decode("utf-8"))
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise RequestError(f"invalid JSON: {e}")
+        return await self.submit(parse_request(data))
+
+    async def _handle(self, reader, writer):
+        status, body = 500, {"error": "internal error"}
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+            request_line, *header_lines = head.decode("latin-1").split("\r\n")
+            method, path, _ = request_line.split(" ", 2)
+            headers = {}
+            for line in header_lines:
+                if ":" in line:
+                    name, value = line.split(":", 1)
+                    headers[name.strip().lower()] = value.strip()
+
+            length = int(headers.get("content-length", 0))
+            if length > MAX_BODY_BYTES:
+                raise RequestError("request body too large", 413)
+            payload = await reader.readexactly(length) if length else b""
+
+            status, body = await self._route(method.upper(), path.split("?", 1)[0], payload)
+        except RequestError as e:
+            status, body = e.status, {"error": str(e)}
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError) as e:
+            status, body = 400, {"error": f"malformed request: {e}"}
+        except Exception as e:
+            status, body = 500, {"error": f"{type(e).__name__}: {e}"}
+
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        headers = [
+            f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}",
+            "Content-Type: application/json; charset=utf-8",
+            f"Content-Length: {len(data)}",
+            "Connection: close",
+        ]
+        if status == 503:
+            headers.append("Retry-After: 1")
+        try:
+            writer.write(("\r\n".join(headers) + "\r\n\r\n").encode("latin-1") + data)
+            await writer.drain()
+            writer.close()
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+# -----------------------------
+# Client
+# -----------------------------
+def post_solve(url, payload, timeout=None):
+    """
+    POST payload to url/solve and return (status, decoded JSON body)
+    """
+    import urllib.error
+    import urllib.request
+
+    request = urllib.request.Request(
+        url.rstrip("/") + "/solve",
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, json.loads(response.read().decode("utf-8"))
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read().decode("utf-8"))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m service", description="月間戦果最適化の計算サービス")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"待ち受けるアドレス (既定: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"ポート番号 (既定: {DEFAULT_PORT})")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="ソルバーのプロセス数")
+    parser.add_argument("--queue", type=int, default=DEFAULT_QUEUE, help="待機できるリクエスト数の上限")
+    parser.add_argument("--no-cache", dest="use_cache", action="store_false", help="計算結果のキャッシュを使わない")
+    parser.add_argument("--verbose", action="store_true", help="ソルバーのログを表示する")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.workers < 1 or args.queue < 1:
+        print("--workers と --queue は1以上にしてください", file=sys.stderr)
+        return 2
+
+    service = SolveService(
+        args.host, args.port, workers=args.workers, queue_size=args.queue,
+        use_cache=args.use_cache, quiet=not args.verbose
+    )
+    try:
+        asyncio.run(service.serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,710 @@
+import contextlib
+import importlib.util
+import os
+import re
+import sys
+import tempfile
+import time
+import numpy as np
+
+from instrument import phase
+
+
+# -----------------------------
+# Solver backends
+# -----------------------------
+# Every backend takes a SenkaLP (see lp.py) and returns an LPSolution.
+# solve_mip() solves the same LP with some columns integral.
+# Backend choice: explicit name > SENKA_SOLVER environment variable > auto.
+#
+#   highs : in-process HiGHS through highspy (no files, no subprocess)
+#   scipy : in-process HiGHS through scipy.optimize.linprog
+#   cbc   : PuLP + CBC subprocess (bundled cbc.exe on Windows builds)
+#
+# solve() / run() / solve_mip() take time_limit (seconds), iteration_limit
+# (simplex iterations, LP only) and cancel, an object with is_set() such as
+# a threading.Event set from another thread. highs polls cancel from its
+# interrupt callbacks and stops at the next check (every few iterations,
+# though the MIP root may take seconds); scipy and cbc cannot be
+# interrupted once started and only check it before they start.
+
+SOLVER_ENV = "SENKA_SOLVER"
+
+STOP_REASONS = {
+    "time_limit": "制限時間に達しました",
+    "iteration_limit": "反復回数の上限に達しました",
+    "cancelled": "計算がキャンセルされました",
+}
+
+
+class LPSolution:
+    """
+    Backend-neutral LP result. status uses PuLP's status names
+    ("Optimal", "Infeasible", "Unbounded", "Not Solved", "Undefined"), plus
+    "Feasible" for a solve stopped by a limit or cancel with a feasible
+    point (the MIP incumbent, or a primal feasible LP iterate).
+
+    Duals follow the maximization convention:
+      row_dual[i] = d objective / d (active bound of row i)
+      col_dual[j] = c_j - row_dual @ A[:, j]   (reduced cost)
+    ranging, when the backend provides it, holds the allowable ranges
+    "row_lower"/"row_upper" of each row's active bound and
+    "cost_lower"/"cost_upper" of each objective coefficient.
+    stats holds the solver's own counters: "backend", "status",
+    "iterations", "objective" and "solver_time" (seconds inside the solver);
+    MIP solves add "bound" (best bound on the objective), "mip_gap" and
+    "nodes" where the backend reports them. "stopped" is None, or the
+    STOP_REASONS key of the limit or cancel that ended the solve early.
+    """
+
+    def __init__(self, status, x=None, objective=None, basis=None, log="",
+                 row_dual=None, col_dual=None, ranging=None, stats=None):
+        self.status = status
+        self.x = x
+        self.objective = objective
+        self.basis = basis
+        self.log = log
+        self.row_dual = row_dual
+        self.col_dual = col_dual
+        self.ranging = ranging
+        self.stats = stats or {"backend": None, "status": status}
+
+
+class SolveStopped(RuntimeError):
+    """
+    A limit or cancel ended the solve before it had a feasible point
+    """
+
+    def __init__(self, reason):
+        self.reason = reason
+        super().__init__(f"{STOP_REASONS[reason]}．それまでに実行可能解は見つかりませんでした．")
+
+
+def _cancelled(cancel):
+    return cancel is not None and cancel.is_set()
+
+
+def _cancelled_solution(backend):
+    return LPSolution(
+        "Not Solved", log="cancelled before the solve started",
+        stats={"backend": backend, "status": "Not Solved", "stopped": "cancelled"}
+    )
+
+
+def _primal_feasible(lp, x, tol=1e-6):
+    """
+    Whether x satisfies the rows and bounds of lp, for backends that do
+    not say so about a point they stopped at
+    """
+    if x is None or not np.isfinite(x).all():
+        return False
+    activity = lp.A @ x
+    scale = tol * (1 + np.abs(activity))
+    return bool(
+        (activity >= lp.row_lower - scale).all() and (activity <= lp.row_upper + scale).all() and
+        (x >= lp.col_lower - tol).all() and (x <= lp.col_upper + tol).all()
+    )
+
+
+def _module_available(name):
+    """
+    Whether name is installed, without importing it (pulp and scipy take
+    a noticeable part of the start-up time)
+    """
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+class HighsBackend:
+    name = "highs"
+    supports_warm_start = True
+    supports_updates = True
+
+    _STATUS = {
+        "Optimal": "Optimal",
+        "Infeasible": "Infeasible",
+        "Unbounded": "Unbounded",
+        "Primal infeasible or unbounded": "Infeasible",
+    }
+    _STOPS = {
+        "Time limit reached": "time_limit",
+        "Iteration limit reached": "iteration_limit",
+        "Interrupted by user": "cancelled",
+    }
+    # HiGHS' own default, i.e. no limit
+    _NO_ITERATION_LIMIT = 2**31 - 1
+
+    def _highs_lp(self, lp):
+        import highspy
+
+        A = lp.A.tocsc()
+        model = highspy.HighsLp()
+        model.num_col_ = lp.n_cols
+        model.num_row_ = lp.n_rows
+        model.sense_ = highspy.ObjSense.kMaximize
+        model.col_cost_ = lp.c
+        model.col_lower_ = lp.col_lower
+        model.col_upper_ = lp.col_upper
+        model.row_lower_ = lp.row_lower
+        model.row_upper_ = lp.row_upper
+        model.a_matrix_.format_ = highspy.MatrixFormat.kColwise
+        model.a_matrix_.start_ = A.indptr
+        model.a_matrix_.index_ = A.indices
+        model.a_matrix_.value_ = A.data
+        return model
+
+    def create(self, lp):
+        import highspy
+
+        with phase("load"):
+            h = highspy.Highs()
+            h.setOptionValue("output_flag", False)
+            h.passModel(self._highs_lp(lp))
+        return h
+
+    @contextlib.contextmanager
+    def _interruptible(self, h, cancel):
+        """
+        Stop h's simplex / IPM / MIP loop once cancel is set
+        """
+        if cancel is None:
+            yield
+            return
+
+        # the flag lives on the instance and outlasts the run, so it is
+        # written every time, not only once cancel is set
+        def interrupt(event):
+            event.interrupt(cancel.is_set())
+
+        callbacks = (h.cbSimplexInterrupt, h.cbIpmInterrupt, h.cbMipInterrupt)
+        for callback in callbacks:
+            callback.subscribe(interrupt)
+        try:
+            yield
+        finally:
+            for callback in callbacks:
+                callback.unsubscribe(interrupt)
+
+    def _stop(self, h):
+        """
+        (status, stopped, has_solution) after a run
+        """
+        model_status = h.modelStatusToString(h.getModelStatus())
+        status = self._STATUS.get(model_status, "Not Solved")
+        stopped = self._STOPS.get(model_status)
+        has_solution = h.getInfo().primal_solution_status == 2
+        if status == "Not Solved" and has_solution:
+            status = "Feasible"
+        return status, stopped, has_solution
+
+    def run(self, h, warm_start=None, sensitivity=False, *, time_limit=None, iteration_limit=None, cancel=None):
+        """
+        Solve an already loaded highspy.Highs instance. Limits are set on
+        every run since the instance keeps its options.
+        """
+        import highspy
+
+        if warm_start is not None:
+            h.setBasis(warm_start)
+
+        h.setOptionValue("time_limit", float("inf") if time_limit is None else float(time_limit))
+        h.setOptionValue(
+            "simplex_iteration_limit",
+            self._NO_ITERATION_LIMIT if iteration_limit is None else int(iteration_limit)
+        )
+
+        # getRunTime accumulates over every run of this instance
+        run_time = h.getRunTime()
+        with phase("run"), self._interruptible(h, cancel):
+            h.run()
+        run_time = h.getRunTime() - run_time
+
+        status, stopped, has_solution = self._stop(h)
+        info = h.getInfo()
+        stats = {
+            "backend": self.name,
+            "status": status,
+            "iterations": int(info.simplex_iteration_count),
+            "objective": float(info.objective_function_value) if has_solution else None,
+            "solver_time": float(run_time),
+            "stopped": stopped,
+        }
+
+        log = (
+            f"HiGHS {h.version()}: {h.modelStatusToString(h.getModelStatus())}, "
+            f"iterations {info.simplex_iteration_count}, "
+            f"objective {info.objective_function_value:.6g}, "
+            f"time {run_time:.3f}s"
+        )
+
+        if status == "Feasible":
+            # stopped early on a primal feasible point: no duals, no basis
+            return LPSolution(
+                status, x=np.asarray(h.getSolution().col_value, dtype=float),
+                objective=info.objective_function_value, log=log, stats=stats
+            )
+
+        if status != "Optimal":
+            return LPSolution(status, log=log, stats=stats)
+
+        solution = h.getSolution()
+
+        ranging = None
+        if sensitivity:
+            ranging_status, r = h.getRanging()
+            if ranging_status == highspy.HighsStatus.kOk:
+                ranging = {
+                    "row_lower": np.asarray(r.row_bound_dn.value_, dtype=float),
+                    "row_upper": np.asarray(r.row_bound_up.value_, dtype=float),
+                    "cost_lower": np.asarray(r.col_cost_dn.value_, dtype=float),
+                    "cost_upper": np.asarray(r.col_cost_up.value_, dtype=float),
+                }
+
+        return LPSolution(
+            status,
+            x=np.asarray(solution.col_value, dtype=float),
+            objective=info.objective_function_value,
+            basis=h.getBasis(),
+            log=log,
+            row_dual=np.asarray(solution.row_dual, dtype=float),
+            col_dual=np.asarray(solution.col_dual, dtype=float),
+            ranging=ranging,
+            stats=stats
+        )
+
+    def solve_mip(self, lp, integrality, *, time_limit=None, mip_gap=None, start=None, cancel=None):
+        """
+        Branch and bound on a fresh instance; start is a feasible x used as
+        the first incumbent
+        """
+        import highspy
+
+        h = self.create(lp)
+        cols = np.flatnonzero(integrality).astype(np.int32)
+        h.changeColsIntegrality(
+            cols.size, cols, np.full(cols.size, highspy.HighsVarType.kInteger)
+        )
+        if time_limit is not None:
+            h.setOptionValue("time_limit", float(time_limit))
+        if mip_gap is not None:
+            h.setOptionValue("mip_rel_gap", float(mip_gap))
+        if start is not None:
+            incumbent = highspy.HighsSolution()
+            incumbent.col_value = np.asarray(start, dtype=float)
+            h.setSolution(incumbent)
+
+        with phase("run"), self._interruptible(h, cancel):
+            h.run()
+
+        info = h.getInfo()
+        model_status = h.modelStatusToString(h.getModelStatus())
+        status, stopped, has_solution = self._stop(h)
+
+        stats = {
+            "backend": self.name,
+            "status": status,
+            "iterations": int(info.simplex_iteration_count),
+            "objective": float(info.objective_function_value) if has_solution else None,
+            "solver_time": float(h.getRunTime()),
+            "bound": float(info.mip_dual_bound),
+            "mip_gap": float(info.mip_gap),
+            "nodes": int(info.mip_node_count),
+            "stopped": stopped,
+        }
+
+        log = (
+            f"HiGHS {h.version()} MIP: {model_status}, "
+            f"nodes {info.mip_node_count}, gap {info.mip_gap:.3%}, "
+            f"bound {info.mip_dual_bound:.6g}, "
+            f"objective {info.objective_function_value:.6g}, "
+            f"time {h.getRunTime():.3f}s"
+        )
+
+        if status not in ("Optimal", "Feasible"):
+            return LPSolution(status, log=log, stats=stats)
+
+        return LPSolution(
+            status,
+            x=np.asarray(h.getSolution().col_value, dtype=float),
+            objective=info.objective_function_value,
+            log=log,
+            stats=stats
+        )
+
+    def update(self, h, lp, rows=(), cols=(), coeffs=None, costs=()):
+        """
+        Push changed row/column bounds, matrix entries and the costs of the
+        columns in costs of lp into a loaded instance. HiGHS keeps its basis,
+        so the next run() is a hot start.
+        """
+        rows = np.asarray(rows, dtype=np.int32)
+        cols = np.asarray(cols, dtype=np.int32)
+        costs = np.asarray(costs, dtype=np.int32)
+
+        if rows.size:
+            h.changeRowsBounds(rows.size, rows, lp.row_lower[rows], lp.row_upper[rows])
+        if cols.size:
+            h.changeColsBounds(cols.size, cols, lp.col_lower[cols], lp.col_upper[cols])
+        if costs.size:
+            h.changeColsCost(costs.size, costs, lp.c[costs])
+        if coeffs is not None:
+            for r, j, v in zip(*coeffs):
+                h.changeCoeff(int(r), int(j), float(v))
+
+    def solve(self, lp, warm_start=None, sensitivity=False, **limits):
+        return self.run(self.create(lp), warm_start, sensitivity, **limits)
+
+
+class ScipyBackend:
+    name = "scipy"
+    supports_warm_start = False
+    supports_updates = False
+
+    _STATUS = {0: "Optimal", 2: "Infeasible", 3: "Unbounded"}
+    # linprog / milp status of a solve stopped by one of its limits
+    _LIMIT = 1
+
+    @staticmethod
+    def _limit_reason(res):
+        return "time_limit" if "time" in res.message.lower() else "iteration_limit"
+
+    def solve(self, lp, warm_start=None, sensitivity=False, *, time_limit=None, iteration_limit=None, cancel=None):
+        from scipy.optimize import linprog
+        import scipy.sparse as sp
+
+        if _cancelled(cancel):
+            return _cancelled_solution(self.name)
+
+        options = {}
+        if time_limit is not None:
+            options["time_limit"] = float(time_limit)
+        if iteration_limit is not None:
+            options["maxiter"] = int(iteration_limit)
+
+        # split ranged rows into <= and == blocks for linprog
+        with phase("split"):
+            eq = lp.row_lower == lp.row_upper
+            le = ~eq & np.isfinite(lp.row_upper)
+            ge = ~eq & np.isfinite(lp.row_lower)
+
+            A_ub = sp.vstack([lp.A[le], -lp.A[ge]], format="csr")
+            b_ub = np.concatenate([lp.row_upper[le], -lp.row_lower[ge]])
+
+        t0 = time.perf_counter()
+        with phase("linprog"):
+            res = linprog(
+                -lp.c,
+                A_ub=A_ub if A_ub.shape[0] else None,
+                b_ub=b_ub if A_ub.shape[0] else None,
+                A_eq=lp.A[eq] if eq.any() else None,
+                b_eq=lp.row_upper[eq] if eq.any() else None,
+                bounds=np.column_stack([lp.col_lower, lp.col_upper]),
+                method="highs",
+                options=options
+            )
+        solver_time = time.perf_counter() - t0
+
+        status = self._STATUS.get(res.status, "Not Solved")
+        stopped = None
+        if res.status == self._LIMIT:
+            stopped = self._limit_reason(res)
+            if res.x is not None and _primal_feasible(lp, res.x):
+                status = "Feasible"
+
+        log = f"scipy linprog (HiGHS): {res.message}, iterations {res.nit}"
+        stats = {
+            "backend": self.name,
+            "status": status,
+            "iterations": int(res.nit),
+            "objective": float(-res.fun) if status in ("Optimal", "Feasible") else None,
+            "solver_time": solver_time,
+            "stopped": stopped,
+        }
+
+        if status == "Feasible":
+            return LPSolution(status, x=np.asarray(res.x), objective=-res.fun, log=log, stats=stats)
+        if status != "Optimal":
+            return LPSolution(status, log=log, stats=stats)
+
+        # linprog minimizes -c, so its marginals are d(-objective)/d(rhs)
+        row_dual = np.zeros(lp.n_rows)
+        n_le = int(le.sum())
+        row_dual[le] = -res.ineqlin.marginals[:n_le]
+        row_dual[ge] = res.ineqlin.marginals[n_le:]
+        if eq.any():
+            row_dual[eq] = -res.eqlin.marginals
+
+        col_dual = -(res.lower.marginals + res.upper.marginals)
+
+        return LPSolution(
+            status,
+            x=np.asarray(res.x),
+            objective=-res.fun,
+            log=log,
+            row_dual=row_dual,
+            col_dual=col_dual,
+            stats=stats
+        )
+
+
+    def solve_mip(self, lp, integrality, *, time_limit=None, mip_gap=None, start=None, cancel=None):
+        """
+        scipy.optimize.milp (HiGHS); start is ignored, milp takes no incumbent
+        """
+        from scipy.optimize import Bounds, LinearConstraint, milp
+
+        if _cancelled(cancel):
+            return _cancelled_solution(self.name)
+
+        options = {}
+        if time_limit is not None:
+            options["time_limit"] = float(time_limit)
+        if mip_gap is not None:
+            options["mip_rel_gap"] = float(mip_gap)
+
+        t0 = time.perf_counter()
+        with phase("milp"):
+            res = milp(
+                -lp.c,
+                integrality=np.asarray(integrality, dtype=int),
+                bounds=Bounds(lp.col_lower, lp.col_upper),
+                constraints=LinearConstraint(lp.A, lp.row_lower, lp.row_upper),
+                options=options
+            )
+        solver_time = time.perf_counter() - t0
+
+        status = self._STATUS.get(res.status, "Not Solved")
+        if status == "Not Solved" and res.x is not None:
+            status = "Feasible"
+        has_solution = status in ("Optimal", "Feasible")
+
+        bound = getattr(res, "mip_dual_bound", None)
+        stats = {
+            "backend": self.name,
+            "status": status,
+            "iterations": None,
+            "objective": float(-res.fun) if has_solution else None,
+            "solver_time": solver_time,
+            "bound": None if bound is None else float(-bound),
+            "mip_gap": getattr(res, "mip_gap", None),
+            "nodes": getattr(res, "mip_node_count", None),
+            "stopped": self._limit_reason(res) if res.status == self._LIMIT else None,
+        }
+        log = f"scipy milp (HiGHS): {res.message}"
+
+        if not has_solution:
+            return LPSolution(status, log=log, stats=stats)
+
+        return LPSolution(status, x=np.asarray(res.x), objective=-res.fun, log=log, stats=stats)
+
+
+class CbcBackend:
+    name = "cbc"
+    supports_warm_start = False
+    supports_updates = False
+
+    # IMPORTANT:
+    # logPath must be writable at runtime.
+    # Do NOT use sys._MEIPASS for logs.
+    # Every run logs to its own temporary file: concurrent solves (scenario
+    # threads, service workers) must not read each other's log.
+    log_prefix = "senka-cbc-"
+
+    def _solver(self, log_path, commands=(), **options):
+        """
+        commands are extra CBC command line options, e.g. "maxIterations 100"
+        """
+        import pulp
+        from model import resource_path
+
+        # PyInstaller builds ship their own cbc.exe; elsewhere use PuLP's CBC
+        cbc_path = resource_path(
+            os.path.join("solverdir", "cbc", "win", "i64", "cbc.exe")
+        )
+        if sys.platform == "win32" and os.path.exists(cbc_path):
+            return pulp.COIN_CMD(
+                path=cbc_path,
+                options=["printingOptions", "all", *commands],
+                logPath=log_path,
+                **options
+            )
+        return pulp.PULP_CBC_CMD(msg=False, logPath=log_path, options=list(commands), **options)
+
+    _ITERATIONS = re.compile(r"(\d+) iterations")
+    _WALLCLOCK = re.compile(r"\(Wallclock seconds\):\s*([0-9.]+)")
+    _BOUND = re.compile(r"Upper bound:\s*(-?[0-9.eE+-]+)")
+    _NODES = re.compile(r"Enumerated nodes:\s*(\d+)")
+
+    def _log_stats(self, log):
+        """
+        Iteration count and wall-clock time as reported in the CBC log
+        """
+        iterations = self._ITERATIONS.findall(log)
+        wallclock = self._WALLCLOCK.findall(log)
+        return {
+            "iterations": int(iterations[-1]) if iterations else None,
+            "solver_time": float(wallclock[-1]) if wallclock else None,
+        }
+
+    def _run(self, prob, commands=(), **options):
+        """
+        Solve prob with CBC and return the log of this run ("" if CBC
+        wrote none)
+        """
+        fd, log_path = tempfile.mkstemp(prefix=self.log_prefix, suffix=".log")
+        os.close(fd)
+        try:
+            # covers writing the MPS file, the CBC process and reading it back
+            with phase("cbc"):
+                prob.solve(self._solver(log_path, commands, **options))
+
+            with open(log_path, "r", encoding="utf-8", errors="ignore") as f:
+                return f.read()
+        finally:
+            try:
+                os.remove(log_path)
+            except OSError:
+                pass
+
+    def solve(self, lp, warm_start=None, sensitivity=False, *, time_limit=None, iteration_limit=None, cancel=None):
+        import pulp
+        from lp import to_pulp
+
+        if _cancelled(cancel):
+            return _cancelled_solution(self.name)
+
+        with phase("translate"):
+            prob, variables = to_pulp(lp)
+
+        commands = [] if iteration_limit is None else [f"maxIterations {int(iteration_limit)}"]
+        log = self._run(prob, commands, timeLimit=time_limit)
+        log_stats = self._log_stats(log)
+
+        status = pulp.LpStatus[prob.status]
+        stopped = None
+        if status == "Optimal" and prob.sol_status != pulp.LpSolutionOptimal:
+            # CBC reports an LP stopped by a limit as optimal
+            iterations = log_stats["iterations"]
+            hit_iterations = iteration_limit is not None and iterations is not None and iterations >= iteration_limit
+            stopped = "iteration_limit" if hit_iterations or time_limit is None else "time_limit"
+            x = np.array([v.varValue or 0.0 for v in variables])
+            status = "Feasible" if _primal_feasible(lp, x) else "Not Solved"
+
+        stats = {
+            "backend": self.name,
+            "status": status,
+            **log_stats,
+            "objective": pulp.value(prob.objective) if status in ("Optimal", "Feasible") else None,
+            "stopped": stopped,
+        }
+
+        if status == "Feasible":
+            return LPSolution(status, x=x, objective=pulp.value(prob.objective), log=log, stats=stats)
+        if status != "Optimal":
+            return LPSolution(status, log=log, stats=stats)
+
+        constraints = list(prob.constraints.values())
+
+        return LPSolution(
+            status,
+            x=np.array([v.varValue or 0.0 for v in variables]),
+            objective=pulp.value(prob.objective),
+            log=log,
+            row_dual=np.array([c.pi or 0.0 for c in constraints]),
+            col_dual=np.array([v.dj or 0.0 for v in variables]),
+            stats=stats
+        )
+
+    def solve_mip(self, lp, integrality, *, time_limit=None, mip_gap=None, start=None, cancel=None):
+        import pulp
+        from lp import to_pulp
+
+        if _cancelled(cancel):
+            return _cancelled_solution(self.name)
+
+        with phase("translate"):
+            prob, variables = to_pulp(lp, integrality=integrality)
+            if start is not None:
+                for v, value in zip(variables, start):
+                    v.setInitialValue(float(value))
+
+        log = self._run(prob, timeLimit=time_limit, gapRel=mip_gap, warmStart=start is not None)
+
+        status = pulp.LpStatus[prob.status]
+        if status == "Optimal" and prob.sol_status == pulp.LpSolutionIntegerFeasible:
+            status = "Feasible"
+        has_solution = status in ("Optimal", "Feasible")
+
+        bound = self._BOUND.findall(log)
+        bound = float(bound[-1]) if bound else None
+        nodes = self._NODES.findall(log)
+        objective = float(pulp.value(prob.objective)) if has_solution else None
+        stats = {
+            "backend": self.name,
+            "status": status,
+            **self._log_stats(log),
+            "objective": objective,
+            "bound": bound,
+            "mip_gap": (
+                (bound - objective) / max(abs(objective), 1e-9)
+                if bound is not None and objective is not None else None
+            ),
+            "nodes": int(nodes[-1]) if nodes else None,
+            # an unproven incumbent, or none at all, means CBC ran out of time
+            "stopped": "time_limit" if time_limit is not None and status in ("Feasible", "Not Solved") else None,
+        }
+
+        if not has_solution:
+            return LPSolution(status, log=log, stats=stats)
+
+        return LPSolution(
+            status,
+            x=np.array([v.varValue or 0.0 for v in variables]),
+            objective=pulp.value(prob.objective),
+            log=log,
+            stats=stats
+        )
+
+
+BACKENDS = {
+    "highs": HighsBackend,
+    "scipy": ScipyBackend,
+    "cbc": CbcBackend,
+}
+
+_REQUIRES = {
+    "highs": "highspy",
+    "scipy": "scipy.optimize",
+    "cbc": "pulp",
+}
+
+
+def available_backends():
+    return [name for name in BACKENDS if _module_available(_REQUIRES[name])]
+
+
+def get_backend(name=None):
+    """
+    Resolve a backend by name. None or "auto" picks the first installed one
+    in the order highs, scipy, cbc.
+    """
+    if not isinstance(name, (str, type(None))):
+        return name
+
+    name = (name or os.environ.get(SOLVER_ENV) or "auto").lower()
+
+    if name == "auto":
+        available = available_backends()
+        if not available:
+            raise RuntimeError("利用可能なソルバーがありません (highspy / scipy / pulp)")
+        return BACKENDS[available[0]]()
+
+    if name not in BACKENDS:
+        raise ValueError(f"unknown solver backend: {name!r} (choose from {', '.join(BACKENDS)})")
+
+    if not _module_available(_REQUIRES[name]):
+        raise RuntimeError(f"ソルバー {name} を使うには {_REQUIRES[name]} が必要です")
+
+    return BACKENDS[name]()
@@ -0,0 +1,175 @@
+import itertools
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from catalog import load_catalog
+from model import DECISION_BLOCKS, PARAM_KEYS, SenkaModel, prepare_sorties
+from solvers import get_backend
+
+
+# -----------------------------
+# Parametric sweep over solve_senka parameters
+# -----------------------------
+
+# per-process state, filled once by _init_worker so the sortie arrays and the
+# expedition/shop matrices are shipped to each worker only once
+_shared = {}
+
+
+def _init_worker(sortie_weights, senka, maxproportion, enable_short_bucket, catalog, backend, sortie_labels):
+    _shared.update(
+        sortie_weights=sortie_weights,
+        senka=senka,
+        maxproportion=maxproportion,
+        enable_short_bucket=enable_short_bucket,
+        catalog=catalog,
+        backend=backend,
+        sortie_labels=sortie_labels,
+    )
+
+
+def _solve_chunk(points):
+    """
+    Solve a run of neighbouring grid points in order on one SenkaModel, so
+    each solve only patches bounds and starts from the previous basis when
+    the backend supports it
+    """
+    s = _shared
+    model = None
+    rows = []
+
+    for params in points:
+        row = dict(params)
+
+        try:
+            if model is None:
+                model = SenkaModel(
+                    s["sortie_weights"],
+                    s["senka"],
+                    s["maxproportion"],
+                    s["enable_short_bucket"],
+                    backend=s["backend"],
+                    catalog=s["catalog"],
+                    **params
+                )
+            else:
+                model.update(**params)
+        except ValueError as e:
+            row["status"] = "Invalid"
+            row["error"] = str(e)
+            rows.append(row)
+            continue
+
+        solution = model.solve_lp()
+        row["status"] = solution.status
+
+        if solution.status == "Optimal":
+            result = model.result(solution)
+            row["senka"] = result.senka
+
+            for block in DECISION_BLOCKS:
+                values = getattr(result, block)
+                labels = s["sortie_labels"] if block == "sortie" else range(len(values))
+                for label, v in zip(labels, values):
+                    row[f"{block}_{label}"] = v
+
+        rows.append(row)
+
+    return rows
+
+
+def expand_grid(grid, params):
+    """
+    Cartesian product of the grid values, merged over the fixed params.
+    The last grid key varies fastest, so consecutive points are neighbours.
+    """
+    unknown = set(grid) - set(PARAM_KEYS)
+    if unknown:
+        raise ValueError(f"unknown sweep parameters: {', '.join(sorted(unknown))}")
+
+    missing = set(PARAM_KEYS) - set(grid) - set(params)
+    if missing:
+        raise TypeError(f"missing parameters: {', '.join(sorted(missing))}")
+
+    keys = list(grid)
+    return [
+        {**params, **dict(zip(keys, values))}
+        for values in itertools.product(*(list(grid[k]) for k in keys))
+    ]
+
+
+def solve_senka_sweep(
+    sortie_weights,
+    senka,
+    maxproportion,
+    grid,
+    enable_short_bucket=True,
+    *,
+    sortie_names=None,
+    backend=None,
+    max_workers=None,
+    chunksize=None,
+    **params
+):
+    """
+    Solve the senka LP for every point of a parameter grid.
+
+    grid maps parameter names (same keys as solve_senka) to lists of values;
+    the remaining parameters are passed as keywords and held fixed. Points are
+    solved on a process pool in chunks of neighbouring points, and the result
+    is a DataFrame with one row per grid point: the parameters, status,
+    senka (including special) and every decision value, rounded as in
+    SenkaResult.
+
+    Example:
+        solve_senka_sweep(w, s, m, {"max_money": [0, 1000, 2000]}, **params)
+    """
+    # validate before any worker starts; workers get the raw arrays
+    prepare_sorties(sortie_weights, senka, maxproportion)
+    sortie_weights = np.asarray(sortie_weights, dtype=float)
+    senka = np.asarray(senka, dtype=float)
+    maxproportion = np.asarray(maxproportion, dtype=float)
+
+    points = expand_grid(grid, params)
+
+    if sortie_names is None:
+        sortie_labels = list(range(len(senka)))
+    else:
+        sortie_labels = list(sortie_names)
+
+    # resolve here so a bad backend name fails before any worker starts
+    backend_name = get_backend(backend).name
+
+    init_args = (
+        sortie_weights, senka, maxproportion, enable_short_bucket,
+        load_catalog(), backend_name, sortie_labels
+    )
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, len(points)))
+
+    if chunksize is None:
+        chunksize = math.ceil(len(points) / (max_workers * 2))
+    chunks = [points[i:i + chunksize] for i in range(0, len(points), chunksize)]
+
+    if max_workers == 1:
+        _init_worker(*init_args)
+        rows = [row for chunk in chunks for row in _solve_chunk(chunk)]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_worker,
+            initargs=init_args
+        ) as pool:
+            rows = [row for result in pool.map(_solve_chunk, chunks) for row in result]
+
+    table = pd.DataFrame(rows)
+
+    leading = list(grid) + [k for k in PARAM_KEYS if k not in grid] + ["status", "senka"]
+    leading = [c for c in leading if c in table.columns]
+    return table[leading + [c for c in table.columns if c not in leading]]
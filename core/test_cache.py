@@ -0,0 +1,128 @@
+import contextlib
+import copy
+import io
+import json
+import os
+
+import pytest
+
+from cache import ResultCache, result_key
+from catalog import Catalog, _default_path, load_catalog
+from model import PARAM_DEFAULTS, solve_senka
+from service import WARMUP_SORTIES
+
+
+def key(*, sorties=WARMUP_SORTIES, enable_short_bucket=True, params=PARAM_DEFAULTS, catalog=None,
+        backend="highs", **options):
+    return result_key(
+        *sorties, enable_short_bucket, params, catalog=catalog or load_catalog(), backend=backend, **options
+    )
+
+
+@pytest.fixture(scope="module")
+def result():
+    with contextlib.redirect_stdout(io.StringIO()):
+        return solve_senka(*WARMUP_SORTIES, **PARAM_DEFAULTS)
+
+
+# -----------------------------
+# Keys
+# -----------------------------
+def test_key_is_stable():
+    params = {k: float(v) for k, v in reversed(list(PARAM_DEFAULTS.items()))}
+    assert key() == key()
+    # dict order and int/float spelling do not matter
+    assert key(params=params) == key()
+    # an option left at None is the same as not given
+    assert key(time_limit=None) == key()
+    # the gap only matters in integer mode
+    assert key(mip_gap=0.5) == key()
+    assert key(integer=True, mip_gap=0.5) != key(integer=True, mip_gap=0.1)
+
+
+@pytest.mark.parametrize("param", sorted(PARAM_DEFAULTS))
+def test_key_changes_with_params(param):
+    assert key(params={**PARAM_DEFAULTS, param: PARAM_DEFAULTS[param] + 1}) != key()
+
+
+def test_key_changes_with_inputs_and_options():
+    weights, senka, maxproportion = copy.deepcopy(WARMUP_SORTIES)
+    senka = list(senka)
+    senka[0] += 0.01
+    others = [
+        key(sorties=(weights, senka, maxproportion)),
+        key(enable_short_bucket=False),
+        key(backend="scipy"),
+        key(integer=True),
+        key(sensitivity=True),
+        key(presolve=False),
+        key(time_limit=10.0),
+        key(iteration_limit=100),
+    ]
+    assert len({key(), *others}) == len(others) + 1
+
+
+def test_key_changes_with_catalog():
+    with open(_default_path(), "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    bumped = {**data, "version": data["version"] + 1}
+    edited = copy.deepcopy(data)
+    edited["expeditions"][0]["run"][1] += 1
+
+    assert key(catalog=Catalog(data)) == key()
+    assert key(catalog=Catalog(bumped)) != key()
+    assert key(catalog=Catalog(edited)) != key()
+
+
+# -----------------------------
+# Store
+# -----------------------------
+def test_round_trip(tmp_path, result):
+    cache = ResultCache(str(tmp_path))
+    cache.put("a", result)
+
+    assert cache.get("a").stats["cache"] == "memory"
+    loaded = ResultCache(str(tmp_path)).get("a")
+    assert loaded.stats["cache"] == "disk"
+    assert loaded.senka == result.senka
+    assert cache.get("missing") is None
+
+
+def test_memory_lru(tmp_path, result):
+    cache = ResultCache(str(tmp_path), memory_entries=2)
+    for k in "abc":
+        cache.put(k, result)
+
+    assert cache.get("c").stats["cache"] == "memory"
+    assert cache.get("b").stats["cache"] == "memory"
+    # evicted from memory, still on disk
+    assert cache.get("a").stats["cache"] == "disk"
+
+
+def test_disk_lru(tmp_path, result):
+    cache = ResultCache(str(tmp_path))
+    cache.put("a", result)
+    _, size = cache.size()
+
+    cache = ResultCache(str(tmp_path), max_bytes=2 * size + size // 2, memory_entries=0)
+    cache.put("b", result)
+    os.utime(cache._path("a"), (1000, 1000))
+    os.utime(cache._path("b"), (2000, 2000))
+    # a read counts as a use: b becomes the least recently used
+    assert cache.get("a") is not None
+    cache.put("c", result)
+
+    assert cache.size() == (2, pytest.approx(2 * size, rel=0.1))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+
+def test_stopped_results_are_not_stored(tmp_path, result):
+    cache = ResultCache(str(tmp_path))
+    stopped = copy.copy(result)
+    stopped.stats = {**result.stats, "stopped": "time_limit"}
+    cache.put("a", stopped)
+
+    assert cache.get("a") is None
+    assert cache.size() == (0, 0)
@@ -0,0 +1,96 @@
+import csv
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SORTIE_FILE = os.path.join(HERE, "..", "sortiedata.xlsx")
+BASELINE_SENKA = 15288.28
+
+# run the CLI as `python -m cli` would and report whether tkinter got imported
+RUN_CLI = """
+import runpy, sys
+sys.argv[0] = "cli"
+try:
+    runpy.run_module("cli", run_name="__main__", alter_sys=True)
+finally:
+    print("tkinter loaded:", "tkinter" in sys.modules, file=sys.stderr)
+"""
+
+
+def run_cli(tmp_path, *args):
+    env = {**os.environ, "SENKA_CACHE_DIR": str(tmp_path / "cache")}
+    process = subprocess.run(
+        [sys.executable, "-c", RUN_CLI, *args], cwd=HERE, env=env,
+        capture_output=True, text=True, encoding="utf-8", timeout=300
+    )
+    assert process.stderr.splitlines()[-1] == "tkinter loaded: False"
+    return process
+
+
+def scenario(tmp_path, filename, **data):
+    path = tmp_path / f"{filename}.json"
+    path.write_text(json.dumps(data), encoding="utf-8")
+    return str(path)
+
+
+def test_json_output(tmp_path):
+    process = run_cli(tmp_path, SORTIE_FILE, "-q")
+    assert process.returncode == 0
+
+    record, = json.loads(process.stdout)
+    assert record["status"] == "Optimal"
+    assert record["senka"] == pytest.approx(BASELINE_SENKA, abs=0.01)
+    assert sum(record["sortie"].values()) > 0
+
+
+def test_csv_output(tmp_path):
+    output = str(tmp_path / "results.csv")
+    process = run_cli(tmp_path, SORTIE_FILE, "-q", "--max-money", "3000", "-o", output)
+    assert process.returncode == 0
+    assert process.stdout == ""
+
+    with open(output, "r", encoding="utf-8", newline="") as f:
+        row, = csv.DictReader(f)
+    assert row["status"] == "Optimal"
+    assert row["params_max_money"] == "3000.0"
+    assert float(row["senka"]) > BASELINE_SENKA
+
+
+def test_multiple_scenarios(tmp_path):
+    # sortie paths in a scenario file are relative to the file
+    shutil.copy(SORTIE_FILE, tmp_path / "copy.xlsx")
+    paths = [
+        scenario(tmp_path, "base"),
+        scenario(tmp_path, "money", max_money=3000),
+        scenario(tmp_path, "copied", sorties="copy.xlsx", name="relative"),
+    ]
+    process = run_cli(tmp_path, SORTIE_FILE, "-q", "--scenario", *paths)
+    assert process.returncode == 0
+
+    base, money, relative = json.loads(process.stdout)
+    assert [r["scenario"] for r in (base, money, relative)] == ["base", "money", "relative"]
+    assert money["senka"] > base["senka"]
+    assert relative["sorties_file"] == str(tmp_path / "copy.xlsx")
+    assert relative["senka"] == base["senka"]
+
+
+def test_null_and_bad_options(tmp_path):
+    paths = [
+        # null means the default: MIP_GAP and MIP_TIME_LIMIT in integer mode
+        scenario(tmp_path, "nulls", integer=True, time_limit=None, mip_gap=None, iteration_limit=None),
+        scenario(tmp_path, "bad", time_limit="soon"),
+    ]
+    process = run_cli(tmp_path, SORTIE_FILE, "-q", "--scenario", *paths)
+    assert process.returncode == 1
+
+    nulls, bad = json.loads(process.stdout)
+    assert nulls["status"] in ("Optimal", "Feasible")
+    assert nulls["senka"] <= nulls["lp_bound"] + 0.01
+    assert bad["status"] == "error"
+    assert "time_limit" in bad["error"]
+    assert "bad: time_limit" in process.stderr
@@ -0,0 +1,83 @@
+import contextlib
+import io
+import os
+import threading
+
+import pytest
+
+from daily import DailySenkaModel, parse_schedule
+from loader import load_sorties
+from model import PARAM_DEFAULTS
+from solvers import SolveStopped
+
+SORTIE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "sortiedata.xlsx")
+BASELINE_SENKA = 15288.28
+DAYS = PARAM_DEFAULTS["days"]
+
+
+def quiet(solve, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return solve(*args, **kwargs)
+
+
+@pytest.fixture(scope="module")
+def sorties():
+    _, weights, senka, maxproportion = load_sorties(SORTIE_FILE, use_cache=False)
+    return weights, senka, maxproportion
+
+
+# -----------------------------
+# Schedule
+# -----------------------------
+@pytest.mark.parametrize("schedule", [
+    {"activetime": [12] * (DAYS - 1)},                      # one day short
+    {"sleeptime": [[6] * DAYS]},                            # not one value per day
+    {"activetime": [12] * (DAYS - 1) + [13]},               # 25 hours on the last day
+    {"inactivetime": [-1] * DAYS},
+    {"activetime": ["many"] * DAYS},
+    {"playtime": [12] * DAYS},                              # unknown key
+])
+def test_bad_schedule(schedule):
+    with pytest.raises(ValueError):
+        parse_schedule(PARAM_DEFAULTS, schedule)
+
+
+def test_schedule_defaults_to_params():
+    hours = parse_schedule(PARAM_DEFAULTS, {"activetime": [10] * DAYS})
+    assert hours["activetime"].tolist() == [10] * DAYS
+    assert hours["sleeptime"].tolist() == [PARAM_DEFAULTS["sleeptime"]] * DAYS
+
+
+# -----------------------------
+# Solve
+# -----------------------------
+@pytest.mark.parametrize("schedule", [
+    None,
+    {key: [PARAM_DEFAULTS[key]] * DAYS for key in ("activetime", "inactivetime", "sleeptime")},
+])
+def test_uniform_schedule_matches_aggregate(sorties, schedule):
+    result = quiet(DailySenkaModel(*sorties, schedule=schedule, **PARAM_DEFAULTS).solve)
+
+    assert result.senka == pytest.approx(BASELINE_SENKA, abs=0.01)
+    trajectory = result.trajectory
+    assert trajectory["stock"].shape == (DAYS + 1, 5)
+    # each day is rounded on its own
+    assert trajectory["senka"].sum() + PARAM_DEFAULTS["special"] == pytest.approx(result.senka, abs=0.005 * DAYS)
+
+
+def test_rest_days_cost_senka(sorties):
+    active = [PARAM_DEFAULTS["activetime"]] * DAYS
+    active[::7] = [0] * len(active[::7])
+    result = quiet(DailySenkaModel(*sorties, schedule={"activetime": active}, **PARAM_DEFAULTS).solve)
+    assert result.senka < BASELINE_SENKA
+
+
+def test_limits_stop_the_solve(sorties):
+    model = DailySenkaModel(*sorties, **PARAM_DEFAULTS)
+    with pytest.raises(SolveStopped):
+        quiet(model.solve, iteration_limit=1)
+
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(SolveStopped):
+        quiet(model.solve, cancel=cancel)
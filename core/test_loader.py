@@ -0,0 +1,148 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import loader
+from bench import synthetic_template
+from loader import (
+    SORTIE_CACHE_FILES, SORTIE_FIELDS, _read_raw, cache_dir, load_sorties, parse_sortie_block, read_sortie_sheet
+)
+
+SORTIE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "sortiedata.xlsx")
+
+
+@pytest.fixture(autouse=True)
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("SENKA_CACHE_DIR", str(tmp_path / "cache"))
+
+
+def cached_files():
+    return [e.name for e in os.scandir(cache_dir("sorties")) if e.name.endswith(".npz")]
+
+
+def assert_same(loaded, expected):
+    assert loaded[0] == expected[0]
+    for a, b in zip(loaded[1:], expected[1:]):
+        np.testing.assert_array_equal(a, b)
+
+
+@pytest.fixture(scope="module")
+def expected():
+    return load_sorties(SORTIE_FILE, use_cache=False)
+
+
+# -----------------------------
+# Cache
+# -----------------------------
+def test_cache_hit(tmp_path, monkeypatch, expected):
+    path = str(tmp_path / "sorties.xlsx")
+    shutil.copy(SORTIE_FILE, path)
+    assert_same(load_sorties(path), expected)
+    assert len(cached_files()) == 1
+
+    def unread(path):
+        raise AssertionError("cached file was parsed again")
+
+    monkeypatch.setattr(loader, "read_sortie_sheet", unread)
+    assert_same(load_sorties(path), expected)
+
+
+def test_rewrite_invalidates(tmp_path, expected):
+    import openpyxl
+
+    path = str(tmp_path / "sorties.xlsx")
+    shutil.copy(SORTIE_FILE, path)
+    load_sorties(path)
+
+    workbook = openpyxl.load_workbook(path)
+    workbook.worksheets[0]["B8"] = expected[2][0] + 1
+    workbook.save(path)
+
+    _, _, senka, _ = load_sorties(path)
+    assert senka[0] == pytest.approx(expected[2][0] + 1)
+    # still one entry per path
+    assert len(cached_files()) == 1
+
+
+def test_cache_stays_bounded(tmp_path, expected):
+    source = str(tmp_path / "sorties.csv")
+    pd.read_excel(SORTIE_FILE, header=None).to_csv(source, header=False, index=False)
+    paths = [str(tmp_path / f"sorties{k}.csv") for k in range(SORTIE_CACHE_FILES + 3)]
+    for path in paths:
+        shutil.copy(source, path)
+        load_sorties(path)
+
+    assert len(cached_files()) == SORTIE_CACHE_FILES
+    # the least recently loaded go first
+    assert os.path.basename(loader._cache_file(paths[0])) not in cached_files()
+    assert os.path.basename(loader._cache_file(paths[-1])) in cached_files()
+
+
+# -----------------------------
+# Formats
+# -----------------------------
+def table(expected):
+    names, weights, senka, maxproportion = expected
+    columns = np.column_stack([weights, senka, maxproportion])
+    df = pd.DataFrame(columns, columns=SORTIE_FIELDS[1:])
+    df.insert(0, "name", names)
+    return df
+
+
+@pytest.mark.parametrize("ext", [".csv", ".parquet", ".json"])
+def test_formats_match_xlsx(tmp_path, expected, ext):
+    path = str(tmp_path / ("sorties" + ext))
+    if ext == ".csv":
+        pd.read_excel(SORTIE_FILE, header=None).to_csv(path, header=False, index=False)
+    elif ext == ".parquet":
+        table(expected).to_parquet(path)
+    else:
+        table(expected).to_json(path, orient="records", force_ascii=False, double_precision=15)
+
+    assert_same(load_sorties(path, use_cache=False), expected)
+
+
+# -----------------------------
+# Streaming reader
+# -----------------------------
+def pandas_read(path):
+    return parse_sortie_block(*_read_raw(path))
+
+
+def test_stream_matches_pandas(tmp_path):
+    path = str(tmp_path / "template.xlsx")
+    synthetic_template(path, 50, note_rows=20)
+
+    streamed = read_sortie_sheet(path)
+    assert len(streamed[0]) == 50
+    assert_same(streamed, pandas_read(path))
+
+
+def test_stream_errors_match_pandas(tmp_path):
+    import openpyxl
+
+    path = str(tmp_path / "template.xlsx")
+    synthetic_template(path, 6, note_rows=5)
+    workbook = openpyxl.load_workbook(path)
+    sheet = workbook.worksheets[0]
+    sheet["C2"] = "many"    # not a number
+    sheet["D9"] = 1.5       # maxproportion over 1
+    sheet["E1"] = 7         # name not a string
+    sheet["F5"] = None      # incomplete
+    workbook.save(path)
+
+    with pytest.raises(ValueError) as streamed:
+        read_sortie_sheet(path)
+    with pytest.raises(ValueError) as parsed:
+        pandas_read(path)
+
+    assert str(streamed.value) == str(parsed.value)
+    assert str(streamed.value).splitlines() == [
+        "列 6 が完成されていません．最初の9行にすべて値が入っている必要があります．",
+        "列 5 の出撃の名前が文字列ではありません．",
+        "列 3 に数値以外の値が入っています (行2～9).",
+        "列 4 の最大割合は0～1の間でなければなりません．",
+    ]
@@ -0,0 +1,90 @@
+import contextlib
+import io
+import os
+
+import numpy as np
+import pytest
+
+from frontier import senka_frontier
+from loader import load_sorties
+from model import PARAM_DEFAULTS, SenkaModel, solve_senka
+
+SORTIE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "sortiedata.xlsx")
+
+# optimum of SORTIE_FILE with PARAM_DEFAULTS before presolve and model
+# updates existed
+BASELINE_SENKA = 15288.28
+
+
+def quiet(solve, *args, **kwargs):
+    # the solvers print their logs for the GUI console
+    with contextlib.redirect_stdout(io.StringIO()):
+        return solve(*args, **kwargs)
+
+
+# -----------------------------
+# Presolve
+# -----------------------------
+def test_presolve_all_sorties_capped():
+    # no sortie with maxproportion >= 1: nothing can dominate
+    weights = [[10, 10, 10, 1, 0, 100], [20, 20, 20, 1, 0, 150]]
+    senka = [1.0, 1.5]
+    maxproportion = [0.6, 0.6]
+
+    full = quiet(solve_senka, weights, senka, maxproportion, presolve=False, **PARAM_DEFAULTS)
+    reduced = quiet(solve_senka, weights, senka, maxproportion, presolve=True, **PARAM_DEFAULTS)
+
+    assert reduced.senka == pytest.approx(full.senka, abs=0.01)
+
+
+@pytest.fixture(scope="module")
+def sorties():
+    _, weights, senka, maxproportion = load_sorties(SORTIE_FILE, use_cache=False)
+    return weights, senka, maxproportion
+
+
+@pytest.mark.parametrize("presolve", [True, False])
+def test_baseline_senka(sorties, presolve):
+    result = quiet(solve_senka, *sorties, presolve=presolve, **PARAM_DEFAULTS)
+    assert result.senka == pytest.approx(BASELINE_SENKA, abs=0.01)
+
+
+# -----------------------------
+# Model updates
+# -----------------------------
+def test_update_matches_fresh_solve(sorties):
+    model = SenkaModel(*sorties, **PARAM_DEFAULTS)
+    quiet(model.solve)
+
+    params = {**PARAM_DEFAULTS, "max_money": 3000, "activetime": 14, "inactivetime": 4, "initialcond": 500}
+    model.update(**params)
+    updated = quiet(model.solve)
+    fresh = quiet(SenkaModel(*sorties, **params).solve)
+
+    assert updated.senka == pytest.approx(fresh.senka, abs=0.01)
+
+
+def test_update_sorties_matches_fresh_solve(sorties):
+    weights, senka, maxproportion = sorties
+    model = SenkaModel(weights, senka, maxproportion, **PARAM_DEFAULTS)
+    quiet(model.solve)
+
+    weights = weights.copy()
+    weights[0, :3] *= 1.5
+    senka = senka.copy()
+    senka[-1] *= 0.8
+    update = model.update_sorties(weights, senka, maxproportion)
+    updated = quiet(model.solve)
+    fresh = quiet(SenkaModel(weights, senka, maxproportion, **PARAM_DEFAULTS).solve)
+
+    assert update["mode"] != "unchanged"
+    assert updated.senka == pytest.approx(fresh.senka, abs=0.01)
+
+
+def test_frontier_matches_point_solves(sorties):
+    model = SenkaModel(*sorties, **PARAM_DEFAULTS)
+    frontier = quiet(senka_frontier, model, "max_money", 0, 20000)
+
+    for money in np.linspace(0, 20000, 5):
+        fresh = quiet(SenkaModel(*sorties, **{**PARAM_DEFAULTS, "max_money": money}).solve)
+        assert frontier.value(money) == pytest.approx(fresh.senka, abs=0.01)
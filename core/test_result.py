@@ -0,0 +1,58 @@
+import contextlib
+import io
+import json
+import os
+
+import numpy as np
+import pytest
+
+from loader import load_sorties
+from model import PARAM_DEFAULTS, solve_senka
+from result import ARRAY_FIELDS, SenkaResult
+
+SORTIE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "sortiedata.xlsx")
+
+
+@pytest.fixture(scope="module")
+def result():
+    names, weights, senka, maxproportion = load_sorties(SORTIE_FILE, use_cache=False)
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = solve_senka(weights, senka, maxproportion, sensitivity=True, **PARAM_DEFAULTS)
+    result.sortie_names = list(names)
+    return result
+
+
+def assert_same(loaded, result):
+    assert loaded.senka == result.senka
+    assert loaded.lp_bound == result.lp_bound
+    for field in ARRAY_FIELDS:
+        np.testing.assert_array_equal(getattr(loaded, field), getattr(result, field))
+    assert loaded.sortie_names == result.sortie_names
+    assert loaded.params == result.params
+    assert loaded.stats == json.loads(json.dumps(result.stats))
+
+    assert set(loaded.sensitivity) == set(result.sensitivity)
+    for key, value in result.sensitivity.items():
+        if isinstance(value, dict):
+            assert set(loaded.sensitivity[key]) == set(value)
+            for block, v in value.items():
+                np.testing.assert_array_equal(loaded.sensitivity[key][block], v)
+        else:
+            np.testing.assert_array_equal(loaded.sensitivity[key], value)
+
+
+def test_dict_round_trip(result):
+    # through JSON text, as the CLI and the service send it
+    assert_same(SenkaResult.from_dict(json.loads(json.dumps(result.to_dict()))), result)
+
+
+@pytest.mark.parametrize("ext", [".npz", ".json"])
+def test_file_round_trip(tmp_path, result, ext):
+    path = str(tmp_path / ("result" + ext))
+    result.save(path)
+    assert_same(SenkaResult.load(path), result)
+
+
+def test_unknown_extension(tmp_path, result):
+    with pytest.raises(ValueError):
+        result.save(str(tmp_path / "result.txt"))
@@ -0,0 +1,55 @@
+import contextlib
+import io
+import os
+
+import pytest
+
+from loader import load_sorties
+from model import PARAM_DEFAULTS
+from robust import RESOURCE_KEYS, RobustSenkaModel, sample_sorties
+
+SORTIE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "sortiedata.xlsx")
+BASELINE_SENKA = 15288.28
+
+
+def quiet(solve, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return solve(*args, **kwargs)
+
+
+@pytest.fixture(scope="module")
+def sorties():
+    _, weights, senka, maxproportion = load_sorties(SORTIE_FILE, use_cache=False)
+    return weights, senka, maxproportion
+
+
+@pytest.mark.parametrize("level", [0, 1, -0.5, 1.5])
+def test_level_out_of_range(sorties, level):
+    with pytest.raises(ValueError):
+        RobustSenkaModel(*sorties, level=level, **PARAM_DEFAULTS)
+
+
+def test_no_noise_is_nominal(sorties):
+    result = quiet(RobustSenkaModel(*sorties, noise=0, **PARAM_DEFAULTS).solve)
+    report = result.stats["robust"]
+
+    assert result.senka == pytest.approx(BASELINE_SENKA, abs=0.01)
+    assert report["resources"] == []
+    assert report["evaluation"]["holds"] == 1.0
+    assert report["nominal"]["senka"] == pytest.approx(BASELINE_SENKA, abs=0.01)
+
+
+@pytest.mark.parametrize("level", [0.8, 0.9])
+def test_in_sample_holds(sorties, level):
+    weights = sorties[0]
+    samples = sample_sorties(weights, 0.1, 100, seed=1)
+    result = quiet(RobustSenkaModel(*sorties, samples=samples, level=level, **PARAM_DEFAULTS).solve)
+    evaluation = result.stats["robust"]["evaluation"]
+
+    # the CVaR rows bound each resource on its own: a tail mean >= 0 means
+    # at most a (1 - level) share of the samples runs short
+    assert evaluation["samples"] == len(samples)
+    assert evaluation["out_of_sample"] is False
+    for key in RESOURCE_KEYS:
+        assert evaluation["holds_by_resource"][key] >= level
+    assert result.senka < BASELINE_SENKA
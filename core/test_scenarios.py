@@ -0,0 +1,39 @@
+import os
+import threading
+
+import pytest
+
+from loader import load_sorties
+from model import PARAM_DEFAULTS
+from scenarios import ScenarioPool, run_scenario
+from solvers import SolveStopped
+
+SORTIE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "sortiedata.xlsx")
+BASELINE_SENKA = 15288.28
+
+
+@pytest.fixture(scope="module")
+def sorties():
+    _, weights, senka, maxproportion = load_sorties(SORTIE_FILE, use_cache=False)
+    return weights, senka, maxproportion
+
+
+def test_scenarios_print_no_solver_log(sorties, capsys):
+    pool = ScenarioPool()
+    futures = [
+        pool.submit(sorties, {"params": {**PARAM_DEFAULTS, "max_money": money}, "integer": True})
+        for money in (0, 3000)
+    ]
+    base, money = [f.result(120) for f in futures]
+    pool.shutdown(wait=True)
+
+    assert capsys.readouterr().out == ""
+    assert base.lp_bound == pytest.approx(BASELINE_SENKA, abs=0.01)
+    assert money.senka > base.senka
+
+
+def test_cancelled_scenario(sorties):
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(SolveStopped):
+        run_scenario(sorties, {"params": PARAM_DEFAULTS}, cancel=cancel)
@@ -0,0 +1,137 @@
+import asyncio
+import json
+import socket
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from service import MAX_BODY_BYTES, WARMUP_SORTIES, RequestError, SolveService, post_solve
+
+PAYLOAD = dict(zip(("sortie_weights", "senka", "maxproportion"), WARMUP_SORTIES))
+
+
+@pytest.fixture(scope="module")
+def server(tmp_path_factory):
+    mp = pytest.MonkeyPatch()
+    mp.setenv("SENKA_CACHE_DIR", str(tmp_path_factory.mktemp("cache")))
+
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    # one waiting request at most, so a full queue is easy to reach
+    service = SolveService(port=0, workers=1, queue_size=1, use_cache=False)
+    asyncio.run_coroutine_threadsafe(service.start(), loop).result(120)
+
+    def run(coro):
+        return asyncio.run_coroutine_threadsafe(coro, loop).result(120)
+
+    yield service, run, f"http://127.0.0.1:{service.port}"
+
+    run(service.close())
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(10)
+    mp.undo()
+
+
+def get(url):
+    try:
+        with urllib.request.urlopen(url) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def routed(run, service, *bodies):
+    """
+    (status, body) of /solve bodies submitted in the same loop iteration
+    """
+    async def submit_all():
+        return await asyncio.gather(
+            *(service._route("POST", "/solve", json.dumps(b).encode("utf-8")) for b in bodies),
+            return_exceptions=True
+        )
+
+    return [(r.status, {"error": str(r)}) if isinstance(r, RequestError) else r for r in run(submit_all())]
+
+
+# -----------------------------
+# HTTP
+# -----------------------------
+def test_solve(server):
+    _, _, url = server
+    status, body = post_solve(url, {**PAYLOAD, "max_money": 1000})
+    assert status == 200
+    assert body["senka"] > 0
+    assert len(body["sortie"]) == len(WARMUP_SORTIES[1])
+
+
+@pytest.mark.parametrize("payload", [
+    {"senka": [1.0]},                                   # missing fields
+    {**PAYLOAD, "colour": "red"},                       # unknown field
+    {**PAYLOAD, "integer": "no"},                       # not a bool
+    {**PAYLOAD, "mip_gap": -1, "integer": True},
+    {**PAYLOAD, "activetime": 20},                      # hours over 24
+    {**PAYLOAD, "senka": [float("nan"), 1.0, 1.0]},
+])
+def test_bad_request(server, payload):
+    _, _, url = server
+    status, body = post_solve(url, payload)
+    assert status == 400
+    assert body["error"]
+
+
+def test_unknown_path_and_method(server):
+    _, _, url = server
+    assert get(url + "/nowhere")[0] == 404
+    assert get(url + "/solve")[0] == 405
+    assert get(url + "/health") == (200, {"status": "ok"})
+
+
+def test_body_too_large(server):
+    service, _, _ = server
+    with socket.create_connection(("127.0.0.1", service.port), timeout=10) as s:
+        s.sendall(f"POST /solve HTTP/1.1\r\nContent-Length: {MAX_BODY_BYTES + 1}\r\n\r\n".encode("ascii"))
+        status_line = s.makefile("rb").readline().decode("latin-1")
+    assert status_line.split()[1] == "413"
+
+
+# -----------------------------
+# Queue
+# -----------------------------
+def test_queue_full(server):
+    service, run, _ = server
+    rejected = service.metrics.counters["rejected"]
+    # the first waits in the queue (size 1), the rest find it full
+    statuses = [status for status, _ in routed(
+        run, service, *({**PAYLOAD, "max_money": 2000 + k} for k in range(3))
+    )]
+    assert statuses == [200, 503, 503]
+    assert service.metrics.counters["rejected"] == rejected + 2
+
+
+def test_identical_requests_share_one_solve(server):
+    service, run, _ = server
+    counters = dict(service.metrics.counters)
+    first, second = routed(run, service, {**PAYLOAD, "max_money": 3000}, {**PAYLOAD, "max_money": 3000})
+    assert first == second
+    assert first[0] == 200
+    assert service.metrics.counters["deduplicated"] == counters["deduplicated"] + 1
+    assert service.metrics.counters["completed"] == counters["completed"] + 1
+
+
+def test_metrics(server):
+    _, _, url = server
+    post_solve(url, PAYLOAD)
+    status, metrics = get(url + "/metrics")
+    assert status == 200
+    for key in (
+        "uptime_s", "requests", "completed", "failed", "rejected", "deduplicated", "cache_hits",
+        "queue_depth", "queue_size", "in_flight", "workers",
+        "throughput_per_s", "throughput_last_minute_per_s", "latency_ms", "solve_ms",
+    ):
+        assert key in metrics
+    assert metrics["workers"] == 1 and metrics["queue_size"] == 1
+    assert metrics["completed"] >= 1
+    assert set(metrics["latency_ms"]) == {"mean", "p50", "p95", "max"}